@@ -1,4 +1,4 @@
 from .card_resolver import A2ACardResolver
-from .client import A2AClient
+from .client import A2ABatch, A2AClient
 
-__all__ = ["A2AClient", "A2ACardResolver"]
+__all__ = ["A2AClient", "A2ABatch", "A2ACardResolver"]
@@ -1,5 +1,5 @@
 import json
-from typing import Any, AsyncIterable, Optional
+from typing import Any, AsyncIterable, List, Literal, Optional, Tuple
 
 import httpx
 from common.types import (
@@ -13,6 +13,9 @@ from common.types import (
     GetTaskRequest,
     GetTaskResponse,
     JSONRPCRequest,
+    JSONRPCResponse,
+    ListTasksRequest,
+    ListTasksResponse,
     SendTaskRequest,
     SendTaskResponse,
     SendTaskStreamingRequest,
@@ -20,13 +23,62 @@ from common.types import (
     SetTaskPushNotificationRequest,
     SetTaskPushNotificationResponse,
 )
-from httpx_sse import connect_sse
+from common.utils import json_codec, msgpack_codec
+from common.utils.compression import ACCEPT_ENCODING, compress
+from httpx_sse import EventSource, connect_sse
+
+_RESPONSE_TYPES: dict[type[JSONRPCRequest], type[JSONRPCResponse]] = {
+    SendTaskRequest: SendTaskResponse,
+    GetTaskRequest: GetTaskResponse,
+    ListTasksRequest: ListTasksResponse,
+    CancelTaskRequest: CancelTaskResponse,
+    SetTaskPushNotificationRequest: SetTaskPushNotificationResponse,
+    GetTaskPushNotificationRequest: GetTaskPushNotificationResponse,
+}
+
+
+def _is_busy(response: httpx.Response) -> bool:
+    """Whether a response is a busy server's JSON-RPC error."""
+    media_type = response.headers.get("content-type", "")
+    return response.status_code == 503 and media_type.startswith(
+        ("application/json", msgpack_codec.MEDIA_TYPE)
+    )
 
 
 class A2AClient:
+    """JSON-RPC client of an A2A server.
+
+    Responses are requested gzip or zstd compressed; the server only
+    compresses large ones. Set `request_compression_min_size` to also gzip
+    request bodies of at least that many bytes, for servers that accept
+    compressed requests.
+
+    With `wire_format="msgpack"` (requires the msgpack package) requests are
+    sent as MessagePack and MessagePack responses are asked for, file
+    contents travelling as raw binary. Servers without MessagePack support
+    answer in JSON, which the client also accepts.
+
+    A server too busy for a call, or shutting down, answers HTTP 503 with a
+    JSON-RPC error. The client returns that error like any other, with the
+    seconds to wait before retrying in `error.data["retryAfter"]`.
+    """
+
     def __init__(
-        self, agent_card: Optional[AgentCard] = None, url: Optional[str] = None
+        self,
+        agent_card: Optional[AgentCard] = None,
+        url: Optional[str] = None,
+        request_compression_min_size: Optional[int] = None,
+        wire_format: Literal["json", "msgpack"] = "json",
     ):
+        if wire_format not in ("json", "msgpack"):
+            raise ValueError(f"Unknown wire format: {wire_format}")
+        if wire_format == "msgpack" and not msgpack_codec.available():
+            raise ImportError(
+                "The msgpack wire format requires the msgpack package: "
+                "pip install msgpack"
+            )
+        self.request_compression_min_size = request_compression_min_size
+        self.wire_format = wire_format
         if agent_card:
             self.url = agent_card.url
         elif url:
@@ -42,11 +94,22 @@ class A2AClient:
         self, payload: dict[str, Any]
     ) -> AsyncIterable[SendTaskStreamingResponse]:
         request = SendTaskStreamingRequest(params=payload)
+        if self.wire_format == "msgpack":
+            async for response in self._stream_msgpack(request):
+                yield response
+            return
+
         with httpx.Client(timeout=None) as client:
             with connect_sse(
                 client, "POST", self.url, json=request.model_dump()
             ) as event_source:
                 try:
+                    if _is_busy(event_source.response):
+                        event_source.response.read()
+                        yield SendTaskStreamingResponse(
+                            **self._decode(event_source.response)
+                        )
+                        return
                     for sse in event_source.iter_sse():
                         yield SendTaskStreamingResponse(**json.loads(sse.data))
                 except json.JSONDecodeError as e:
@@ -54,24 +117,109 @@ class A2AClient:
                 except httpx.RequestError as e:
                     raise A2AClientHTTPError(400, str(e)) from e
 
+    async def _stream_msgpack(
+        self, request: SendTaskStreamingRequest
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        content, headers = self._encode(request.model_dump())
+        headers["Accept"] = (
+            f"{msgpack_codec.STREAM_MEDIA_TYPE}, text/event-stream;q=0.5"
+        )
+        async with httpx.AsyncClient(timeout=None) as client:
+            try:
+                async with client.stream(
+                    "POST", self.url, content=content, headers=headers
+                ) as response:
+                    media_type = response.headers.get("content-type", "")
+                    if media_type.startswith(msgpack_codec.STREAM_MEDIA_TYPE):
+                        async for _, message in msgpack_codec.read_frames(
+                            response.aiter_bytes()
+                        ):
+                            yield SendTaskStreamingResponse(**message)
+                    elif media_type.startswith("text/event-stream"):
+                        async for sse in EventSource(response).aiter_sse():
+                            yield SendTaskStreamingResponse(**json.loads(sse.data))
+                    else:
+                        # A JSON-RPC error answered instead of a stream.
+                        await response.aread()
+                        yield SendTaskStreamingResponse(**self._decode(response))
+            except (json.JSONDecodeError, msgpack_codec.DecodeError) as e:
+                raise A2AClientJSONError(str(e)) from e
+            except httpx.RequestError as e:
+                raise A2AClientHTTPError(400, str(e)) from e
+
     async def _send_request(self, request: JSONRPCRequest) -> dict[str, Any]:
+        return dict(await self._post(request.model_dump()))
+
+    def _encode(self, body: Any) -> Tuple[bytes, dict[str, str]]:
+        if self.wire_format == "msgpack":
+            content = msgpack_codec.dumps(body)
+            media_type = msgpack_codec.MEDIA_TYPE
+        else:
+            content = json_codec.dumps(body)
+            media_type = "application/json"
+        headers = {
+            "Content-Type": media_type,
+            "Accept": media_type,
+            "Accept-Encoding": ACCEPT_ENCODING,
+        }
+        min_size = self.request_compression_min_size
+        if min_size is not None and len(content) >= min_size:
+            content = compress(content, "gzip")
+            headers["Content-Encoding"] = "gzip"
+        return content, headers
+
+    def _decode(self, response: httpx.Response) -> Any:
+        media_type = response.headers.get("content-type", "")
+        if media_type.startswith(msgpack_codec.MEDIA_TYPE):
+            return msgpack_codec.loads(response.content)
+        return response.json()
+
+    async def _post(self, body: Any) -> Any:
+        content, headers = self._encode(body)
         async with httpx.AsyncClient() as client:
             try:
                 # Image generation could take time, adding timeout
                 response = await client.post(
-                    self.url, json=request.model_dump(), timeout=30
+                    self.url, content=content, headers=headers, timeout=30
                 )
-                response.raise_for_status()
-                return dict(response.json())
+                if not _is_busy(response):
+                    response.raise_for_status()
+                return self._decode(response)
             except httpx.HTTPStatusError as e:
                 raise A2AClientHTTPError(e.response.status_code, str(e)) from e
-            except json.JSONDecodeError as e:
+            except (json.JSONDecodeError, msgpack_codec.DecodeError) as e:
                 raise A2AClientJSONError(str(e)) from e
 
+    def batch(self) -> "A2ABatch":
+        return A2ABatch(self)
+
+    async def send_batch(self, requests: List[JSONRPCRequest]) -> List[JSONRPCResponse]:
+        """Send several non-streaming requests in one JSON-RPC batch.
+
+        Returns:
+            The responses, in the order of the requests.
+        """
+        body = await self._post([request.model_dump() for request in requests])
+        if not isinstance(body, list):
+            raise A2AClientJSONError(f"Expected a batch response, got: {body}")
+
+        by_id = {response.get("id"): response for response in body}
+        responses = []
+        for request in requests:
+            if request.id not in by_id:
+                raise A2AClientJSONError(f"No response for request {request.id}")
+            response_type = _RESPONSE_TYPES.get(type(request), JSONRPCResponse)
+            responses.append(response_type(**by_id[request.id]))
+        return responses
+
     async def get_task(self, payload: dict[str, Any]) -> GetTaskResponse:
         request = GetTaskRequest(params=payload)
         return GetTaskResponse(**await self._send_request(request))
 
+    async def list_tasks(self, payload: dict[str, Any]) -> ListTasksResponse:
+        request = ListTasksRequest(params=payload)
+        return ListTasksResponse(**await self._send_request(request))
+
     async def cancel_task(self, payload: dict[str, Any]) -> CancelTaskResponse:
         request = CancelTaskRequest(params=payload)
         return CancelTaskResponse(**await self._send_request(request))
@@ -87,3 +235,39 @@ class A2AClient:
     ) -> GetTaskPushNotificationResponse:
         request = GetTaskPushNotificationRequest(params=payload)
         return GetTaskPushNotificationResponse(**await self._send_request(request))
+
+
+class A2ABatch:
+    """Collects calls to send in one JSON-RPC batch request.
+
+    Example:
+        responses = await client.batch().get_task({"id": "a"}).get_task(
+            {"id": "b"}
+        ).send()
+    """
+
+    def __init__(self, client: A2AClient) -> None:
+        self.client = client
+        self.requests: List[JSONRPCRequest] = []
+
+    def __len__(self) -> int:
+        return len(self.requests)
+
+    def add(self, request: JSONRPCRequest) -> "A2ABatch":
+        self.requests.append(request)
+        return self
+
+    def send_task(self, payload: dict[str, Any]) -> "A2ABatch":
+        return self.add(SendTaskRequest(params=payload))
+
+    def get_task(self, payload: dict[str, Any]) -> "A2ABatch":
+        return self.add(GetTaskRequest(params=payload))
+
+    def list_tasks(self, payload: dict[str, Any]) -> "A2ABatch":
+        return self.add(ListTasksRequest(params=payload))
+
+    def cancel_task(self, payload: dict[str, Any]) -> "A2ABatch":
+        return self.add(CancelTaskRequest(params=payload))
+
+    async def send(self) -> List[JSONRPCResponse]:
+        return await self.client.send_batch(self.requests)
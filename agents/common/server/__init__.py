@@ -1,4 +1,24 @@
+from .admission import AdmissionController, MethodLimit
+from .event_bus import EventBus
+from .redis_backend import RedisEventBus, RedisTaskStore
+from .retention import RetentionPolicy
 from .server import A2AServer
+from .streaming import SlowConsumerPolicy
 from .task_manager import InMemoryTaskManager, TaskManager
+from .task_store import InMemoryTaskStore, SQLiteTaskStore, TaskStore
 
-__all__ = ["A2AServer", "TaskManager", "InMemoryTaskManager"]
+__all__ = [
+    "A2AServer",
+    "AdmissionController",
+    "MethodLimit",
+    "TaskManager",
+    "InMemoryTaskManager",
+    "TaskStore",
+    "InMemoryTaskStore",
+    "SQLiteTaskStore",
+    "RedisTaskStore",
+    "EventBus",
+    "RedisEventBus",
+    "RetentionPolicy",
+    "SlowConsumerPolicy",
+]
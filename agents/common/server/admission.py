@@ -0,0 +1,138 @@
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class MethodLimit:
+    """Admission limits of one JSON-RPC method.
+
+    Attributes:
+        max_concurrency: Calls allowed to run at the same time.
+        max_queue: Calls allowed to wait for a slot; further calls are
+            rejected immediately.
+        queue_timeout: Seconds a call may wait for a slot before it is
+            rejected.
+        retry_after: Seconds clients are told to wait before retrying.
+    """
+
+    max_concurrency: int
+    max_queue: int = 0
+    queue_timeout: float = 1.0
+    retry_after: float = 1.0
+
+    def __post_init__(self) -> None:
+        if self.max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if self.max_queue < 0:
+            raise ValueError("max_queue must not be negative")
+
+
+@dataclass(frozen=True)
+class AdmissionStats:
+    method: str
+    active: int
+    queued: int
+    admitted: int
+    rejected_queue_full: int
+    rejected_timeout: int
+
+    @property
+    def rejected(self) -> int:
+        return self.rejected_queue_full + self.rejected_timeout
+
+
+class ServerBusy(Exception):
+    """Raised when a call is not admitted."""
+
+    def __init__(self, method: str, retry_after: float) -> None:
+        super().__init__(f"Too many concurrent {method} calls")
+        self.method = method
+        self.retry_after = retry_after
+
+
+class MethodLimiter:
+    """Concurrency limit with a bounded FIFO wait queue for one method."""
+
+    def __init__(self, method: str, limit: MethodLimit) -> None:
+        self.method = method
+        self.limit = limit
+        self.active = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self._waiters: Deque[asyncio.Future[None]] = deque()
+
+    async def acquire(self) -> None:
+        """Take a slot, waiting in line if needed.
+
+        Raises:
+            ServerBusy: If the queue is full or no slot freed up in time.
+        """
+        if self.active < self.limit.max_concurrency and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+
+        if len(self._waiters) >= self.limit.max_queue:
+            self.rejected_queue_full += 1
+            raise ServerBusy(self.method, self.limit.retry_after)
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.limit.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as the wait ended; pass it on.
+                self.release()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.rejected_timeout += 1
+            raise ServerBusy(self.method, self.limit.retry_after) from None
+        self.admitted += 1
+
+    def release(self) -> None:
+        """Free a slot, handing it straight to the oldest waiting call."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> AdmissionStats:
+        return AdmissionStats(
+            method=self.method,
+            active=self.active,
+            queued=len(self._waiters),
+            admitted=self.admitted,
+            rejected_queue_full=self.rejected_queue_full,
+            rejected_timeout=self.rejected_timeout,
+        )
+
+
+class AdmissionController:
+    """Per-method admission control for A2AServer.
+
+    Methods without a configured limit are always admitted. A call holds its
+    slot until its handler returns or, for streaming methods, until its
+    stream ends, so the limit bounds the agent work in flight.
+    """
+
+    def __init__(self, limits: Mapping[str, MethodLimit]) -> None:
+        self._limiters: Dict[str, MethodLimiter] = {
+            method: MethodLimiter(method, limit) for method, limit in limits.items()
+        }
+
+    def limiter(self, method: str) -> Optional[MethodLimiter]:
+        return self._limiters.get(method)
+
+    def stats(self) -> List[AdmissionStats]:
+        return [limiter.stats() for limiter in self._limiters.values()]
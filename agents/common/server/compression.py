@@ -0,0 +1,66 @@
+from typing import Optional, Tuple
+
+from common.utils.compression import DEFAULT_MINIMUM_SIZE, compress, negotiate
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class CompressionMiddleware:
+    """Compresses responses with the best coding the client accepts.
+
+    Only responses sent as a single body of at least `minimum_size` bytes are
+    compressed. Streamed responses, SSE in particular, pass through as they
+    are: compressing them would hold events back until a block fills. A
+    strong ETag of a compressed response is made weak, since it no longer
+    names the exact bytes sent.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = DEFAULT_MINIMUM_SIZE) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] == "http.response.body" and start is not None:
+                start, message = self._encode(start, message, encoding)
+                await send(start)
+                start = None
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+    def _encode(
+        self, start: Message, message: Message, encoding: str
+    ) -> Tuple[Message, Message]:
+        body = message.get("body", b"")
+        headers = MutableHeaders(raw=list(start["headers"]))
+        if (
+            message.get("more_body", False)
+            or len(body) < self.minimum_size
+            or "content-encoding" in headers
+        ):
+            return start, message
+
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+        headers["Content-Length"] = str(len(body))
+        if "accept-encoding" not in headers.get("vary", "").lower():
+            headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag is not None and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        return {**start, "headers": headers.raw}, {**message, "body": body}
@@ -0,0 +1,63 @@
+import asyncio
+import logging
+import math
+import socket
+from types import FrameType
+from typing import TYPE_CHECKING, List, Optional
+
+import uvicorn
+
+if TYPE_CHECKING:
+    from common.server.server import A2AServer
+
+logger = logging.getLogger(__name__)
+
+
+class DrainingServer(uvicorn.Server):
+    """uvicorn server that drains the A2A server before it stops.
+
+    The first SIGTERM or SIGINT starts `A2AServer.drain` and uvicorn only
+    begins its own shutdown once the drain is over, so open SSE streams stay
+    up until their tasks have sent their final events. A second signal stops
+    the server right away.
+    """
+
+    def __init__(self, a2a_server: "A2AServer", config: uvicorn.Config) -> None:
+        super().__init__(config)
+        self.a2a_server = a2a_server
+        self._drain_requested = False
+        self._drain: Optional[asyncio.Task] = None
+
+    def handle_exit(self, sig: int, frame: Optional[FrameType]) -> None:
+        if self._drain_requested or self.should_exit:
+            logger.warning("Stopping without waiting for the drain to finish")
+            super().handle_exit(sig, frame)
+            return
+        # Signal handlers may interrupt the event loop anywhere, so the drain
+        # is handed to the loop rather than started from here.
+        self._drain_requested = True
+        asyncio.get_event_loop().call_soon_threadsafe(self._start_drain)
+
+    def _start_drain(self) -> None:
+        self._drain = asyncio.create_task(self._drain_then_exit())
+
+    async def _drain_then_exit(self) -> None:
+        logger.info("Draining before shutdown")
+        try:
+            await self.a2a_server.drain()
+        except Exception as e:
+            logger.error(f"Drain failed: {e}")
+        finally:
+            self.should_exit = True
+
+
+def serve(server: "A2AServer", sockets: Optional[List[socket.socket]] = None) -> None:
+    """Run an A2AServer under uvicorn until it has drained."""
+    config = uvicorn.Config(
+        server.app,
+        host=server.host,
+        port=server.port,
+        # Bounds the wait for connections still open once the drain is over.
+        timeout_graceful_shutdown=math.ceil(server.drain_timeout),
+    )
+    DrainingServer(server, config).run(sockets=sockets)
@@ -0,0 +1,29 @@
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable
+
+from common.server.event_journal import JournalEntry, StreamEventPayload
+
+# Called with the task id and the journal entry of every published event.
+EventHandler = Callable[[str, JournalEntry], Awaitable[None]]
+
+
+class EventBus(ABC):
+    """Publish/subscribe channel carrying stream events between replicas.
+
+    Every replica publishes the events of the tasks it runs and receives the
+    events of all tasks, so a client can subscribe to a task on any replica.
+    The bus assigns the sequence numbers, which makes `Last-Event-ID` valid
+    across replicas. Events of one task published from one replica are
+    delivered in order.
+    """
+
+    @abstractmethod
+    async def start(self, handler: EventHandler) -> None:
+        """Start delivering all published events to `handler`."""
+
+    @abstractmethod
+    async def publish(self, task_id: str, event: StreamEventPayload) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
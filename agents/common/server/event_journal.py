@@ -0,0 +1,198 @@
+import json
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Union
+
+from common.types import (
+    JSONRPC_ID,
+    JSONRPCError,
+    SendTaskStreamingResponse,
+    TaskArtifactUpdateEvent,
+    TaskStatusUpdateEvent,
+)
+
+StreamEventPayload = Union[TaskStatusUpdateEvent, TaskArtifactUpdateEvent, JSONRPCError]
+
+
+_RESPONSE_HEAD = b'{"jsonrpc":"2.0"'
+
+
+def encode_event(event: StreamEventPayload) -> bytes:
+    """Serialize a stream event into a response body without its JSON-RPC id.
+
+    The result starts right after the `"jsonrpc"` member, so the response for
+    any subscriber is `_RESPONSE_HEAD`, its `"id"` member and these bytes.
+    """
+    if isinstance(event, JSONRPCError):
+        response = SendTaskStreamingResponse(id=None, error=event)
+    else:
+        response = SendTaskStreamingResponse(id=None, result=event)
+    encoded = response.model_dump_json(exclude_none=True).encode()
+    assert encoded.startswith(_RESPONSE_HEAD)
+    return encoded[len(_RESPONSE_HEAD) :]
+
+
+def decode_event(payload: bytes) -> StreamEventPayload:
+    """Parse bytes produced by `encode_event` back into the stream event."""
+    response = SendTaskStreamingResponse.model_validate_json(_RESPONSE_HEAD + payload)
+    if response.error is not None:
+        return response.error
+    if response.result is None:
+        raise ValueError("Stream event carries neither a result nor an error")
+    return response.result
+
+
+@dataclass(frozen=True)
+class JournalEntry:
+    """A journaled stream event together with its encoded form.
+
+    The event is serialized once when it is journaled; every subscriber and
+    every replay shares the same immutable bytes.
+    """
+
+    seq: int
+    event: StreamEventPayload
+    payload: bytes
+
+    @classmethod
+    def create(cls, seq: int, event: StreamEventPayload) -> "JournalEntry":
+        return cls(seq=seq, event=event, payload=encode_event(event))
+
+    @classmethod
+    def decode(cls, seq: int, payload: bytes) -> "JournalEntry":
+        return cls(seq=seq, event=decode_event(payload), payload=payload)
+
+    @property
+    def is_final(self) -> bool:
+        if isinstance(self.event, JSONRPCError):
+            return True
+        return isinstance(self.event, TaskStatusUpdateEvent) and self.event.final
+
+
+@dataclass(frozen=True)
+class StreamEvent:
+    """A journal entry addressed to one subscriber's request.
+
+    The sequence number is sent as the SSE event id, which clients hand back
+    as `Last-Event-ID` to resume a stream. Only the JSON-RPC id differs
+    between subscribers, so rendering a frame is a concatenation.
+    """
+
+    entry: JournalEntry
+    request_id: JSONRPC_ID
+    encoded_request_id: bytes
+
+    @classmethod
+    def for_request(cls, entry: JournalEntry, request_id: JSONRPC_ID) -> "StreamEvent":
+        return cls(
+            entry, request_id, json.dumps(request_id, ensure_ascii=False).encode()
+        )
+
+    @property
+    def seq(self) -> int:
+        return self.entry.seq
+
+    @property
+    def response(self) -> SendTaskStreamingResponse:
+        event = self.entry.event
+        if isinstance(event, JSONRPCError):
+            return SendTaskStreamingResponse(id=self.request_id, error=event)
+        return SendTaskStreamingResponse(id=self.request_id, result=event)
+
+    def to_json(self) -> bytes:
+        if self.request_id is None:
+            return _RESPONSE_HEAD + self.entry.payload
+        return b"".join(
+            (_RESPONSE_HEAD, b',"id":', self.encoded_request_id, self.entry.payload)
+        )
+
+    def to_sse(self) -> bytes:
+        return b"".join(
+            (
+                b"id: ",
+                str(self.seq).encode(),
+                b"\r\ndata: ",
+                self.to_json(),
+                b"\r\n\r\n",
+            )
+        )
+
+
+class EventJournal:
+    """Bounded log of the events streamed for one task.
+
+    Sequence numbers increase monotonically for the lifetime of the journal,
+    including across turns of a multi-turn task, and are never reused when old
+    entries fall out of the window.
+    """
+
+    def __init__(self, max_events: int = 256) -> None:
+        self._entries: Deque[JournalEntry] = deque(maxlen=max_events)
+        self.last_seq = 0
+
+    def append(self, event: StreamEventPayload) -> JournalEntry:
+        entry = JournalEntry.create(self.last_seq + 1, event)
+        self.add(entry)
+        return entry
+
+    def add(self, entry: JournalEntry) -> None:
+        """Record an entry whose sequence number was assigned elsewhere."""
+        self.last_seq = max(self.last_seq, entry.seq)
+        self._entries.append(entry)
+
+    @property
+    def first_seq(self) -> int:
+        return self._entries[0].seq if self._entries else self.last_seq + 1
+
+    @property
+    def closed(self) -> bool:
+        """Whether the most recent event ended the stream."""
+        return bool(self._entries) and self._entries[-1].is_final
+
+    def covers(self, last_event_id: int) -> bool:
+        """Whether every event after `last_event_id` is still retained."""
+        return last_event_id + 1 >= self.first_seq
+
+    def since(self, last_event_id: Optional[int]) -> List[JournalEntry]:
+        """Return the retained entries newer than `last_event_id`."""
+        if last_event_id is None:
+            return list(self._entries)
+        return [entry for entry in self._entries if entry.seq > last_event_id]
+
+
+class JournalRegistry:
+    """Per-task journals, keeping at most `max_journals` of them.
+
+    When full, the least recently written journal is dropped.
+    """
+
+    def __init__(self, max_journals: int = 1024, max_events: int = 256) -> None:
+        self.max_journals = max_journals
+        self.max_events = max_events
+        self._journals: "OrderedDict[str, EventJournal]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._journals)
+
+    def get(self, task_id: str) -> Optional[EventJournal]:
+        return self._journals.get(task_id)
+
+    def append(self, task_id: str, event: StreamEventPayload) -> JournalEntry:
+        return self._journal_for(task_id).append(event)
+
+    def add(self, task_id: str, entry: JournalEntry) -> None:
+        self._journal_for(task_id).add(entry)
+
+    def _journal_for(self, task_id: str) -> EventJournal:
+        journal = self._journals.get(task_id)
+        if journal is None:
+            journal = EventJournal(self.max_events)
+            self._journals[task_id] = journal
+            if len(self._journals) > self.max_journals:
+                self._journals.popitem(last=False)
+        else:
+            self._journals.move_to_end(task_id)
+        return journal
+
+    def discard(self, task_id: str) -> None:
+        self._journals.pop(task_id, None)
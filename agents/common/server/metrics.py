@@ -0,0 +1,202 @@
+"""Server metrics rendered in the Prometheus text exposition format.
+
+Metrics are plain Python counters updated from the event loop thread, so
+recording a sample is a dict lookup and a few additions, without locks. With
+several worker processes each process reports its own metrics.
+"""
+
+import bisect
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    300.0,
+)
+
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        # One slot per bucket plus the overflow slot for +Inf.
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Family:
+    type_name = ""
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str]) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+
+    def _header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class HistogramFamily(_Family):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str],
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, label_names)
+        self.buckets = tuple(buckets)
+        self.children: Dict[Labels, Histogram] = {}
+
+    def labels(self, *values: str) -> Histogram:
+        histogram = self.children.get(values)
+        if histogram is None:
+            histogram = self.children[values] = Histogram(self.buckets)
+        return histogram
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        names = self.label_names + ("le",)
+        for values, histogram in self.children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), histogram.counts):
+                cumulative += count
+                labels = _format_labels(names, values + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(histogram.sum)}")
+            lines.append(f"{self.name}_count{labels} {histogram.count}")
+        return lines
+
+
+class CounterFamily(_Family):
+    type_name = "counter"
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str]) -> None:
+        super().__init__(name, help, label_names)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, *values: str, amount: float = 1) -> None:
+        self.values[values] = self.values.get(values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for values, value in self.values.items():
+            labels = _format_labels(self.label_names, values)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class GaugeFamily(CounterFamily):
+    """Point-in-time values, usually collected right before rendering."""
+
+    type_name = "gauge"
+
+    def set(self, *values: str, value: float) -> None:
+        self.values[values] = value
+
+
+class ServerMetrics:
+    """Request, phase and stream metrics recorded by A2AServer.
+
+    Agents can add their own metrics with `register`.
+    """
+
+    def __init__(self) -> None:
+        self.collectors: List[Callable[[], Iterable[_Family]]] = []
+        self.requests = CounterFamily(
+            "a2a_requests_total",
+            "JSON-RPC calls handled, by method and outcome.",
+            ("method", "outcome"),
+        )
+        self.request_seconds = HistogramFamily(
+            "a2a_request_seconds",
+            "Time to handle a JSON-RPC call, excluding streamed responses.",
+            ("method",),
+        )
+        self.phase_seconds = HistogramFamily(
+            "a2a_request_phase_seconds",
+            "Time spent in each phase of handling a JSON-RPC call.",
+            ("method", "phase"),
+        )
+        self.stream_seconds = HistogramFamily(
+            "a2a_stream_seconds",
+            "Duration of SSE streams.",
+            ("method",),
+        )
+        self.stream_events = HistogramFamily(
+            "a2a_stream_events",
+            "Events sent per SSE stream.",
+            ("method",),
+            COUNT_BUCKETS,
+        )
+
+    def register(self, collector: Callable[[], Iterable[_Family]]) -> None:
+        """Add a callable returning metric families to render on every scrape."""
+        self.collectors.append(collector)
+
+    def render(self, gauges: Iterable[_Family] = ()) -> str:
+        lines: List[str] = []
+        for family in (
+            self.requests,
+            self.request_seconds,
+            self.phase_seconds,
+            self.stream_seconds,
+            self.stream_events,
+            *gauges,
+            *(family for collect in self.collectors for family in collect()),
+        ):
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
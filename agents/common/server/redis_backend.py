@@ -0,0 +1,278 @@
+import asyncio
+import logging
+import time
+from typing import Any, List, Optional, Tuple
+
+from common.server.event_bus import EventBus, EventHandler
+from common.server.event_journal import JournalEntry, StreamEventPayload, encode_event
+from common.server.retention import TERMINAL_STATES
+from common.server.task_store import ListKey, TaskStore
+from common.types import PushNotificationConfig, Task, TaskState
+
+logger = logging.getLogger(__name__)
+
+
+def _connect(url: str) -> Any:
+    try:
+        import redis.asyncio
+    except ImportError as e:
+        raise ImportError(
+            "The Redis backend requires the redis package: pip install redis"
+        ) from e
+    return redis.asyncio.Redis.from_url(url)
+
+
+def _text(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+# Saves a task and updates its indexes in one step. When asked to, refuses the
+# write if the stored task is in one of the given terminal states, so a state
+# checked by one replica cannot be overwritten by another in between.
+#   KEYS: task, update time index, session index, index of the new state,
+#         indexes of the other states
+#   ARGV: body, task id, score, has session, check state, terminal states...
+_SAVE_TASK_SCRIPT = """
+if ARGV[5] == '1' then
+  local stored = redis.call('GET', KEYS[1])
+  if stored then
+    local state = cjson.decode(stored)['status']['state']
+    for i = 6, #ARGV do
+      if state == ARGV[i] then
+        return 0
+      end
+    end
+  end
+end
+redis.call('SET', KEYS[1], ARGV[1])
+redis.call('ZADD', KEYS[2], ARGV[3], ARGV[2])
+if ARGV[4] == '1' then
+  redis.call('ZADD', KEYS[3], ARGV[3], ARGV[2])
+end
+redis.call('ZADD', KEYS[4], ARGV[3], ARGV[2])
+for i = 5, #KEYS do
+  redis.call('ZREM', KEYS[i], ARGV[2])
+end
+return 1
+"""
+
+# Numbers an event and publishes it in one step, so events reach subscribers
+# in the order of their sequence numbers.
+#   KEYS: sequence counter
+#   ARGV: counter ttl, channel, encoded event
+_PUBLISH_SCRIPT = """
+local seq = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('PUBLISH', ARGV[2], seq .. ' ' .. ARGV[3])
+return seq
+"""
+
+
+class RedisTaskStore(TaskStore):
+    """Task store shared by several replicas through a Redis server.
+
+    `redis` is a `redis.asyncio.Redis` client, or any object implementing the
+    same commands and `register_script`. Each task is stored as one JSON value;
+    sorted sets keyed by update time index all tasks, the tasks of each
+    session and the tasks in each state. A task and its indexes are written by
+    one Lua script, which also makes `save_task_if_active` atomic across
+    replicas.
+    """
+
+    def __init__(self, redis: Any, prefix: str = "a2a:") -> None:
+        self.redis = redis
+        self.prefix = prefix
+        self._save_script = redis.register_script(_SAVE_TASK_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = "a2a:") -> "RedisTaskStore":
+        return cls(_connect(url), prefix)
+
+    def _task_key(self, task_id: str) -> str:
+        return f"{self.prefix}task:{task_id}"
+
+    def _push_key(self, task_id: str) -> str:
+        return f"{self.prefix}push:{task_id}"
+
+    def _updated_key(self) -> str:
+        return f"{self.prefix}tasks:updated"
+
+    def _session_key(self, session_id: str) -> str:
+        return f"{self.prefix}tasks:session:{session_id}"
+
+    def _state_key(self, state: TaskState) -> str:
+        return f"{self.prefix}tasks:state:{state.value}"
+
+    async def get_task(self, task_id: str) -> Optional[Task]:
+        body = await self.redis.get(self._task_key(task_id))
+        return None if body is None else Task.model_validate_json(body)
+
+    async def save_task(self, task: Task) -> None:
+        await self._save(task, check_state=False)
+
+    async def save_task_if_active(self, task: Task) -> bool:
+        return await self._save(task, check_state=True)
+
+    async def _save(self, task: Task, check_state: bool) -> bool:
+        state = task.status.state
+        # The script ignores the session index of a task without a session.
+        session_key = (
+            self._session_key(task.sessionId)
+            if task.sessionId is not None
+            else self._updated_key()
+        )
+        keys = [self._task_key(task.id), self._updated_key(), session_key]
+        keys.append(self._state_key(state))
+        keys.extend(self._state_key(other) for other in TaskState if other != state)
+        args = [
+            task.model_dump_json(exclude_none=True),
+            task.id,
+            time.time(),
+            int(task.sessionId is not None),
+            int(check_state),
+            *(terminal.value for terminal in TERMINAL_STATES),
+        ]
+        return bool(await self._save_script(keys=keys, args=args))
+
+    async def delete_task(self, task_id: str) -> None:
+        task = await self.get_task(task_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(self._task_key(task_id), self._push_key(task_id))
+            pipe.zrem(self._updated_key(), task_id)
+            if task is not None:
+                if task.sessionId is not None:
+                    pipe.zrem(self._session_key(task.sessionId), task_id)
+                pipe.zrem(self._state_key(task.status.state), task_id)
+            await pipe.execute()
+
+    async def get_push_notification_info(
+        self, task_id: str
+    ) -> Optional[PushNotificationConfig]:
+        body = await self.redis.get(self._push_key(task_id))
+        return (
+            None if body is None else PushNotificationConfig.model_validate_json(body)
+        )
+
+    async def set_push_notification_info(
+        self, task_id: str, notification_config: PushNotificationConfig
+    ) -> None:
+        await self.redis.set(
+            self._push_key(task_id),
+            notification_config.model_dump_json(exclude_none=True),
+        )
+
+    async def list_tasks(
+        self,
+        session_id: Optional[str] = None,
+        state: Optional[TaskState] = None,
+        before: Optional[ListKey] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Task], Optional[ListKey]]:
+        if session_id is not None:
+            index = self._session_key(session_id)
+        elif state is not None:
+            index = self._state_key(state)
+        else:
+            index = self._updated_key()
+
+        # Members with equal scores come back in descending id order, which
+        # matches the listing order, so the cursor comparison skips them.
+        page: List[Tuple[ListKey, Task]] = []
+        offset = 0
+        while len(page) <= limit:
+            members = await self.redis.zrevrangebyscore(
+                index,
+                "+inf" if before is None else before[0],
+                "-inf",
+                start=offset,
+                num=limit + 1,
+                withscores=True,
+            )
+            if not members:
+                break
+            offset += len(members)
+            keys = [(float(score), _text(member)) for member, score in members]
+            keys = [key for key in keys if before is None or key < before]
+            if not keys:
+                continue
+            bodies = await self.redis.mget([self._task_key(key[1]) for key in keys])
+            for key, body in zip(keys, bodies):
+                if body is None:
+                    continue
+                task = Task.model_validate_json(body)
+                if state is not None and task.status.state != state:
+                    continue
+                page.append((key, task))
+
+        tasks = [task for _, task in page[:limit]]
+        return tasks, page[limit - 1][0] if len(page) > limit else None
+
+    async def count_tasks(self) -> Optional[int]:
+        return int(await self.redis.zcard(self._updated_key()))
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+class RedisEventBus(EventBus):
+    """Event bus over Redis pub/sub.
+
+    Events of a task are published on the channel `<prefix><task id>` as the
+    sequence number, a space and the encoded event. Sequence numbers come from
+    a per-task counter that expires `seq_ttl` seconds after its last event; one
+    Lua script increments the counter and publishes the event.
+    Redis pub/sub does not buffer, so a replica only sees the events published
+    while it is subscribed.
+    """
+
+    def __init__(
+        self, redis: Any, prefix: str = "a2a:events:", seq_ttl: int = 86400
+    ) -> None:
+        self.redis = redis
+        self.prefix = prefix
+        self.seq_ttl = seq_ttl
+        self._publish_script = redis.register_script(_PUBLISH_SCRIPT)
+        self._pubsub: Any = None
+        self._listener: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = "a2a:events:") -> "RedisEventBus":
+        return cls(_connect(url), prefix)
+
+    async def start(self, handler: EventHandler) -> None:
+        if self._listener is not None:
+            return
+        self._pubsub = self.redis.pubsub()
+        await self._pubsub.psubscribe(f"{self.prefix}*")
+        self._listener = asyncio.create_task(
+            self._listen(handler), name="a2a-event-bus"
+        )
+
+    async def publish(self, task_id: str, event: StreamEventPayload) -> None:
+        seq_key = f"{self.prefix.rstrip(':')}-seq:{task_id}"
+        await self._publish_script(
+            keys=[seq_key],
+            args=[self.seq_ttl, f"{self.prefix}{task_id}", encode_event(event)],
+        )
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        await self.redis.aclose()
+
+    async def _listen(self, handler: EventHandler) -> None:
+        async for message in self._pubsub.listen():
+            if message["type"] != "pmessage":
+                continue
+            task_id = _text(message["channel"])[len(self.prefix) :]
+            seq, _, payload = bytes(message["data"]).partition(b" ")
+            try:
+                entry = JournalEntry.decode(int(seq), payload)
+                await handler(task_id, entry)
+            except Exception as e:
+                logger.error(f"Failed to deliver event for task {task_id}: {e}")
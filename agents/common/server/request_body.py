@@ -0,0 +1,284 @@
+"""Bounded reading and decoding of JSON-RPC request bodies.
+
+Bodies are read as they arrive and rejected as soon as they pass the size
+limit. Bodies larger than `spool_size` are spooled to a temporary file and
+memory-mapped rather than joined in memory. When the reader is given a
+`SpilledFiles`, long base64 strings, the content of inline file parts, are
+cut out before the JSON is decoded and written decoded to files in a spill
+directory. The JSON decoder then only sees a short placeholder, and the file
+part holds a reference to the spilled file in its `bytes` instead of the
+content as one large Python string. MessagePack bodies carry file contents
+as binary, which are spilled as is.
+
+Decoding a large body, spilling included, runs on a worker thread so that
+it does not hold up the event loop.
+"""
+
+import asyncio
+import base64
+import binascii
+import logging
+import mmap
+import os
+import re
+import shutil
+import tempfile
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from common.server.spilled_files import SpilledFiles
+from common.utils import compression, json_codec, msgpack_codec
+from starlette.datastructures import Headers
+from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+# Base64 is decoded in slices of this many characters, a multiple of 4.
+_DECODE_STEP = 4 * 64 * 1024
+# Long base64 strings are scanned in steps of this many bytes. `re` holds the
+# GIL for a whole search, which would stall the event loop for as long.
+_SCAN_STEP = 1024 * 1024
+_BASE64_END = re.compile(rb"[^A-Za-z0-9+/]")
+_STRING_END = re.compile(rb'={0,2}"')
+# Uncompressed bodies smaller than this are decoded on the event loop, where
+# they take less time than a hand-off to a thread.
+_OFFLOAD_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class BodyLimits:
+    """Limits applied to request bodies.
+
+    Attributes:
+        max_body_size: Largest body accepted, in bytes, after decompression.
+        spool_size: Bodies larger than this are spooled to a temporary file.
+        spill_threshold: Base64 strings at least this long are spilled to
+            files, when the reader has a `SpilledFiles`; None keeps them
+            inline.
+        spill_dir: Directory for spilled files; a temporary directory removed
+            at shutdown by default.
+    """
+
+    max_body_size: int = 32 * 1024 * 1024
+    spool_size: int = 1024 * 1024
+    spill_threshold: Optional[int] = 256 * 1024
+    spill_dir: Optional[str] = None
+
+
+class BodyTooLarge(Exception):
+    def __init__(self, limit: int) -> None:
+        super().__init__(f"Request body exceeds {limit} bytes")
+        self.limit = limit
+
+
+class UnsupportedMediaType(Exception):
+    def __init__(self, media_type: str) -> None:
+        super().__init__(f"Unsupported content type: {media_type}")
+        self.media_type = media_type
+
+
+def _loads(data: Any) -> Any:
+    """Decode JSON from any bytes-like object, a memory map included, in place."""
+    with memoryview(data) as view:
+        return json_codec.loads(view)
+
+
+class BodyReader:
+    """Reads request bodies within `BodyLimits`.
+
+    Args:
+        limits: The limits applied.
+        spilled_files: Registry taking ownership of spilled file contents;
+            without one, file contents stay in the decoded body.
+    """
+
+    def __init__(
+        self, limits: BodyLimits, spilled_files: Optional[SpilledFiles] = None
+    ) -> None:
+        self.limits = limits
+        self.spilled_files = spilled_files
+        self._spill_dir = limits.spill_dir
+        self._owns_spill_dir = False
+        self._spill_dir_lock = threading.Lock()
+        self._large_string_start = (
+            # An unescaped quote is preceded by a value separator; quotes
+            # inside strings are always escaped, so this only matches the
+            # start of whole string values.
+            re.compile(rb'[:\[,]\s*"([A-Za-z0-9+/]{%d})' % limits.spill_threshold)
+            if limits.spill_threshold is not None and spilled_files is not None
+            else None
+        )
+
+    async def read(self, request: Request) -> Any:
+        """Read and decode the JSON body of a request.
+
+        Raises:
+            BodyTooLarge: If the body is over `max_body_size`.
+        """
+        limit = self.limits.max_body_size
+        length = request.headers.get("content-length", "")
+        if length.isdigit() and int(length) > limit:
+            raise BodyTooLarge(limit)
+
+        size = 0
+        chunks: List[bytes] = []
+        spool: Optional[IO[bytes]] = None
+        try:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > limit:
+                    raise BodyTooLarge(limit)
+                if spool is None and size > self.limits.spool_size:
+                    spool = tempfile.TemporaryFile()
+                    spool.writelines(chunks)
+                    chunks = []
+                if spool is not None:
+                    spool.write(chunk)
+                else:
+                    chunks.append(chunk)
+
+            if spool is None:
+                body = b"".join(chunks)
+                # A compressed body may expand to much more than its size.
+                if size < _OFFLOAD_SIZE and "content-encoding" not in request.headers:
+                    return self._decode(body, request.headers)
+                return await asyncio.to_thread(self._decode, body, request.headers)
+            spool.flush()
+            return await asyncio.to_thread(self._decode_spool, spool, request.headers)
+        finally:
+            if spool is not None:
+                spool.close()
+
+    def close(self) -> None:
+        if self._owns_spill_dir and self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+            self._owns_spill_dir = False
+
+    def _decode_spool(self, spool: IO[bytes], headers: Headers) -> Any:
+        with mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return self._decode(mapped, headers)
+
+    def _decode(self, data: Any, headers: Headers) -> Any:
+        encoding = headers.get("content-encoding")
+        if encoding is not None:
+            try:
+                data = compression.decompress(
+                    data, encoding, max_size=self.limits.max_body_size
+                )
+            except compression.SizeLimitExceeded:
+                raise BodyTooLarge(self.limits.max_body_size) from None
+
+        media_type = headers.get("content-type", "").split(";")[0].strip()
+        if media_type == msgpack_codec.MEDIA_TYPE:
+            if not msgpack_codec.available():
+                raise UnsupportedMediaType(media_type)
+            spill = self._spill_binary if self.spilled_files is not None else None
+            with memoryview(data) as view:
+                return msgpack_codec.loads(view, spill=spill)
+
+        threshold = self.limits.spill_threshold
+        if (
+            self._large_string_start is None
+            or threshold is None
+            or len(data) < threshold
+        ):
+            return _loads(data)
+
+        token = uuid.uuid4().hex
+        spilled: Dict[str, str] = {}
+        pieces: List[bytes] = []
+        last = 0
+        for start, end in self._large_strings(data):
+            if (end - start) % 4:
+                continue
+            placeholder = f"a2a-spill:{token}:{len(spilled)}"
+            try:
+                spilled[placeholder] = self._spill(data, start, end)
+            except binascii.Error:
+                continue
+            pieces += (data[last:start], placeholder.encode())
+            last = end
+        if not spilled:
+            return _loads(data)
+
+        pieces.append(data[last:])
+        try:
+            return self._restore(json_codec.loads(b"".join(pieces)), spilled)
+        finally:
+            # Files of placeholders not restored, as in an invalid body.
+            for path in spilled.values():
+                os.unlink(path)
+
+    def _large_strings(self, data: Any) -> Iterator[Tuple[int, int]]:
+        """Spans of the base64 string values of at least the spill threshold."""
+        assert self._large_string_start is not None
+        pos = 0
+        while True:
+            match = self._large_string_start.search(data, pos)
+            if match is None:
+                return
+            start, end = match.span(1)
+            while True:
+                stop = _BASE64_END.search(data, end, end + _SCAN_STEP)
+                if stop is not None:
+                    end = stop.start()
+                    break
+                end += _SCAN_STEP
+                if end >= len(data):
+                    return
+            closing = _STRING_END.match(data, end)
+            if closing is not None:
+                yield start, closing.end() - 1
+            pos = end
+
+    def _spill_binary(self, content: bytes) -> Optional[str]:
+        threshold = self.limits.spill_threshold
+        if threshold is None or len(content) < threshold:
+            return None
+        assert self.spilled_files is not None
+        fd, path = self._spill_file()
+        with os.fdopen(fd, "wb") as spilled:
+            spilled.write(content)
+        return self.spilled_files.add(path)
+
+    def _spill_file(self) -> Tuple[int, str]:
+        with self._spill_dir_lock:
+            if self._spill_dir is None:
+                self._spill_dir = tempfile.mkdtemp(prefix="a2a-spill-")
+                self._owns_spill_dir = True
+            spill_dir = self._spill_dir
+        return tempfile.mkstemp(suffix=".bin", dir=spill_dir)
+
+    def _spill(self, data: Any, start: int, end: int) -> str:
+        fd, path = self._spill_file()
+        try:
+            with os.fdopen(fd, "wb") as spilled:
+                for offset in range(start, end, _DECODE_STEP):
+                    spilled.write(
+                        base64.b64decode(data[offset : min(offset + _DECODE_STEP, end)])
+                    )
+        except binascii.Error:
+            os.unlink(path)
+            raise
+        return path
+
+    def _restore(self, value: Any, spilled: Dict[str, str]) -> Any:
+        """Hand file part contents to `spilled_files`, inline any other string."""
+        if isinstance(value, dict):
+            content = value.get("bytes")
+            if isinstance(content, str) and content in spilled:
+                assert self.spilled_files is not None
+                value = dict(value)
+                value["bytes"] = self.spilled_files.add(spilled.pop(content))
+            return {key: self._restore(item, spilled) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._restore(item, spilled) for item in value]
+        if isinstance(value, str) and value in spilled:
+            path = spilled.pop(value)
+            with open(path, "rb") as spilled_file:
+                value = base64.b64encode(spilled_file.read()).decode()
+            os.unlink(path)
+        return value
@@ -0,0 +1,123 @@
+import heapq
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from common.types import TaskState
+from pydantic import BaseModel
+
+TERMINAL_STATES = frozenset({TaskState.COMPLETED, TaskState.CANCELED, TaskState.FAILED})
+
+
+def estimate_size(model: BaseModel) -> int:
+    """Approximate the memory footprint of a model by its JSON length."""
+    return len(model.model_dump_json(exclude_none=True))
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """Limits applied to an in-memory task store.
+
+    Only tasks in a terminal state are ever evicted; running tasks are kept even
+    when the store is over its limits.
+
+    Attributes:
+        max_tasks: Maximum number of tasks kept in the store.
+        max_bytes: Maximum estimated size in bytes of all stored tasks.
+        terminal_ttl: Seconds a task is kept after reaching a terminal state.
+    """
+
+    max_tasks: Optional[int] = None
+    max_bytes: Optional[int] = None
+    terminal_ttl: Optional[float] = None
+
+
+@dataclass
+class EvictionStats:
+    expired: int = 0
+    evicted_max_tasks: int = 0
+    evicted_max_bytes: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.expired + self.evicted_max_tasks + self.evicted_max_bytes
+
+
+class TaskRetention:
+    """Tracks task sizes and terminal times to decide which tasks to evict.
+
+    Terminal tasks are kept in a min-heap ordered by the time they became
+    terminal. Because the TTL is the same for every task, the heap head is both
+    the next task to expire and the oldest eviction candidate, so expiry and
+    capacity eviction cost O(log n) per evicted task. Tasks leaving a terminal
+    state are removed lazily: stale heap entries are skipped when popped.
+    """
+
+    def __init__(self, policy: RetentionPolicy) -> None:
+        self.policy = policy
+        self.stats = EvictionStats()
+        self.total_bytes = 0
+        self._sizes: Dict[str, int] = {}
+        self._terminal_since: Dict[str, float] = {}
+        self._heap: List[Tuple[float, str]] = []
+
+    def add_bytes(self, task_id: str, size: int) -> None:
+        self._sizes[task_id] = self._sizes.get(task_id, 0) + size
+        self.total_bytes += size
+
+    def size_of(self, task_id: str) -> int:
+        return self._sizes.get(task_id, 0)
+
+    def on_state(
+        self, task_id: str, state: TaskState, now: Optional[float] = None
+    ) -> None:
+        if state not in TERMINAL_STATES:
+            self._terminal_since.pop(task_id, None)
+            return
+        if task_id in self._terminal_since:
+            return
+        since = time.monotonic() if now is None else now
+        self._terminal_since[task_id] = since
+        heapq.heappush(self._heap, (since, task_id))
+
+    def forget(self, task_id: str) -> None:
+        self.total_bytes -= self._sizes.pop(task_id, 0)
+        self._terminal_since.pop(task_id, None)
+
+    def collect(self, task_count: int, now: Optional[float] = None) -> List[str]:
+        """Select the tasks to evict and forget them.
+
+        Args:
+            task_count: Number of tasks currently in the store.
+            now: Monotonic timestamp to evaluate the TTL against.
+
+        Returns:
+            The ids of the tasks the caller must remove from the store.
+        """
+        now = time.monotonic() if now is None else now
+        policy = self.policy
+        evicted: List[str] = []
+
+        while self._heap:
+            since, task_id = self._heap[0]
+            if self._terminal_since.get(task_id) != since:
+                heapq.heappop(self._heap)
+                continue
+
+            if policy.terminal_ttl is not None and now - since >= policy.terminal_ttl:
+                self.stats.expired += 1
+            elif (
+                policy.max_tasks is not None
+                and task_count - len(evicted) > policy.max_tasks
+            ):
+                self.stats.evicted_max_tasks += 1
+            elif policy.max_bytes is not None and self.total_bytes > policy.max_bytes:
+                self.stats.evicted_max_bytes += 1
+            else:
+                break
+
+            heapq.heappop(self._heap)
+            self.forget(task_id)
+            evicted.append(task_id)
+
+        return evicted
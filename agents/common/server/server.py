@@ -1,34 +1,213 @@
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Any, AsyncIterable, Optional, Union
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
 
-from common.server.task_manager import TaskManager
+from common.server.admission import AdmissionController, MethodLimiter, ServerBusy
+from common.server.compression import CompressionMiddleware
+from common.server.event_journal import StreamEvent
+from common.server.metrics import CounterFamily, GaugeFamily, ServerMetrics
+from common.server.request_body import (
+    BodyLimits,
+    BodyReader,
+    BodyTooLarge,
+    UnsupportedMediaType,
+)
+from common.server.spilled_files import SpilledFiles
+from common.server.task_manager import InMemoryTaskManager, TaskManager
+from common.server.task_store import InMemoryTaskStore
+from common.server.workers import (
+    FORWARDED_HEADER,
+    WorkerPool,
+    decode_list_cursor,
+    encode_list_cursor,
+    serve_workers,
+)
 from common.types import (
-    A2ARequest,
+    JSONRPC_ID,
     AgentCard,
     CancelTaskRequest,
     GetTaskPushNotificationRequest,
     GetTaskRequest,
-    GetTaskResponse,
     InternalError,
+    InvalidParamsError,
     InvalidRequestError,
     JSONParseError,
+    JSONRPCError,
+    JSONRPCRequest,
     JSONRPCResponse,
+    ListTasksRequest,
+    ListTasksResponse,
+    MethodNotFoundError,
     SendTaskRequest,
-    SendTaskResponse,
     SendTaskStreamingRequest,
-    SendTaskStreamingResponse,
+    ServerBusyError,
     SetTaskPushNotificationRequest,
     TaskResubscriptionRequest,
 )
+from common.utils import compression, json_codec, msgpack_codec
+from common.utils.compression import DEFAULT_MINIMUM_SIZE
 from pydantic import ValidationError
 from sse_starlette.sse import EventSourceResponse
 from starlette.applications import Starlette
+from starlette.middleware import Middleware
 from starlette.requests import Request
-from starlette.responses import JSONResponse
+from starlette.responses import (
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
+from starlette.types import Receive, Scope, Send
 
 logger = logging.getLogger(__name__)
 
+# JSON-RPC method -> (request model, TaskManager handler name).
+_METHODS: Dict[str, Tuple[Type[JSONRPCRequest], str]] = {
+    "tasks/get": (GetTaskRequest, "on_get_task"),
+    "tasks/list": (ListTasksRequest, "on_list_tasks"),
+    "tasks/send": (SendTaskRequest, "on_send_task"),
+    "tasks/sendSubscribe": (SendTaskStreamingRequest, "on_send_task_subscribe"),
+    "tasks/cancel": (CancelTaskRequest, "on_cancel_task"),
+    "tasks/pushNotification/set": (
+        SetTaskPushNotificationRequest,
+        "on_set_task_push_notification",
+    ),
+    "tasks/pushNotification/get": (
+        GetTaskPushNotificationRequest,
+        "on_get_task_push_notification",
+    ),
+    "tasks/resubscribe": (TaskResubscriptionRequest, "on_resubscribe_to_task"),
+}
+
+_STREAMING_METHODS = {"tasks/sendSubscribe", "tasks/resubscribe"}
+# Methods refused while the server drains, since they start new work.
+_STARTING_METHODS = {"tasks/send", "tasks/sendSubscribe"}
+
+
+def _metric_method(body: Any) -> str:
+    """Method label for metrics, bounded to the known methods."""
+    if isinstance(body, list):
+        return "batch"
+    method = body.get("method") if isinstance(body, dict) else None
+    return method if isinstance(method, str) and method in _METHODS else "unknown"
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches, using weak comparison."""
+    if if_none_match is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    opaque = etag.removeprefix("W/")
+    return "*" in tags or opaque in (tag.removeprefix("W/") for tag in tags)
+
+
+def _accepts_msgpack(request: Request) -> bool:
+    """Whether the client asked for MessagePack rather than JSON responses."""
+    accept = request.headers.get("accept", "")
+    return msgpack_codec.available() and (
+        msgpack_codec.MEDIA_TYPE in accept or msgpack_codec.STREAM_MEDIA_TYPE in accept
+    )
+
+
+def _encode(
+    content: Any,
+    binary: bool,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    if binary:
+        return Response(
+            msgpack_codec.dumps(content),
+            status_code=status_code,
+            headers=headers,
+            media_type=msgpack_codec.MEDIA_TYPE,
+        )
+    return JSONResponse(content, status_code=status_code, headers=headers)
+
+
+class _AdmittedStream:
+    """A streamed result holding an admission slot until it ends or is closed."""
+
+    def __init__(self, stream: AsyncIterable[Any], limiter: MethodLimiter) -> None:
+        self._iterator = stream.__aiter__()
+        self._limiter: Optional[MethodLimiter] = limiter
+
+    def __aiter__(self) -> "_AdmittedStream":
+        return self
+
+    async def __anext__(self) -> Any:
+        try:
+            return await self._iterator.__anext__()
+        except BaseException:
+            self._release()
+            raise
+
+    async def aclose(self) -> None:
+        self._release()
+        aclose = getattr(self._iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+    def _release(self) -> None:
+        if self._limiter is not None:
+            self._limiter.release()
+            self._limiter = None
+
+
+class _ClosingResponse(Response):
+    """Sends a streamed response, then closes the admitted stream behind it.
+
+    The stream is closed even when the response never started reading it,
+    for instance because the client went away first.
+    """
+
+    def __init__(self, response: Response, stream: _AdmittedStream) -> None:
+        self.response = response
+        self.stream = stream
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.response(scope, receive, send)
+        finally:
+            await self.stream.aclose()
+
+
+def _sse_frame(item: Any) -> Union[bytes, Dict[str, str]]:
+    if isinstance(item, StreamEvent):
+        # Pre-encoded frame shared with the other subscribers.
+        return item.to_sse()
+    return {"data": item.model_dump_json(exclude_none=True)}
+
+
+def _msgpack_frame(item: Any) -> bytes:
+    if isinstance(item, StreamEvent):
+        return msgpack_codec.frame(
+            item.seq, item.response.model_dump(exclude_none=True)
+        )
+    return msgpack_codec.frame(None, item.model_dump(exclude_none=True))
+
+
+class _MethodNotFound(Exception):
+    def __init__(self, request_id: Any) -> None:
+        super().__init__("Method not found")
+        self.request_id = request_id
+
 
 class A2AServer:
     def __init__(
@@ -38,105 +217,573 @@ class A2AServer:
         endpoint: str = "/",
         agent_card: Optional[AgentCard] = None,
         task_manager: Optional[TaskManager] = None,
+        max_batch_size: int = 100,
+        admission: Optional[AdmissionController] = None,
+        agent_card_max_age: int = 300,
+        compression_min_size: Optional[int] = DEFAULT_MINIMUM_SIZE,
+        drain_timeout: float = 30.0,
+        body_limits: BodyLimits = BodyLimits(),
+        task_manager_factory: Optional[Callable[[], TaskManager]] = None,
     ):
         self.host = host
         self.port = port
         self.endpoint = endpoint
-        self.task_manager = task_manager
+        self.task_manager_factory = task_manager_factory
         self.agent_card = agent_card
-        self.app = Starlette()
+        self.agent_card_max_age = agent_card_max_age
+        self.max_batch_size = max_batch_size
+        self.admission = admission
+        self.metrics = ServerMetrics()
+        self.drain_timeout = drain_timeout
+        self.draining = False
+        self.body_limits = body_limits
+        self.use_task_manager(task_manager)
+        # Set in each worker process when serving with several workers.
+        self.worker_pool: Optional[WorkerPool] = None
+        middleware = []
+        if compression_min_size is not None:
+            middleware.append(
+                Middleware(CompressionMiddleware, minimum_size=compression_min_size)
+            )
+        self.app = Starlette(middleware=middleware, lifespan=self._lifespan)
         self.app.add_route(self.endpoint, self._process_request, methods=["POST"])
         self.app.add_route(
             "/.well-known/agent.json", self._get_agent_card, methods=["GET"]
         )
+        self.app.add_route("/metrics", self._get_metrics, methods=["GET"])
+
+    def use_task_manager(self, task_manager: Optional[TaskManager]) -> None:
+        """Serve the calls with `task_manager`; only before serving starts."""
+        self.task_manager = task_manager
+        # Spilled file contents are only kept for tasks held in this process;
+        # other stores get the content inline.
+        self.spilled_files: Optional[SpilledFiles] = None
+        if isinstance(task_manager, InMemoryTaskManager) and isinstance(
+            task_manager.task_store, InMemoryTaskStore
+        ):
+            self.spilled_files = task_manager.task_store.spilled_files
+        self.body_reader = BodyReader(self.body_limits, self.spilled_files)
+
+    def build_task_manager(self) -> None:
+        """Build the task manager with `task_manager_factory`, if one was given.
+
+        Called in each worker process once it has been forked, so clients,
+        connection pools and threads of the task manager are never shared
+        between workers.
+        """
+        if self.task_manager_factory is not None:
+            self.use_task_manager(self.task_manager_factory())
+
+    def start(self, workers: int = 1) -> None:
+        """Serve until interrupted.
 
-    def start(self) -> None:
+        Args:
+            workers: Number of worker processes. With more than one, each
+                worker owns a share of the tasks and calls are routed to the
+                owner of their task; see `WorkerPool`.
+        """
         if self.agent_card is None:
             raise ValueError("agent_card is not defined")
 
-        if self.task_manager is None:
+        if self.task_manager is None and self.task_manager_factory is None:
             raise ValueError("request_handler is not defined")
 
-        import uvicorn
+        if workers > 1:
+            serve_workers(self, workers)
+            return
 
-        uvicorn.run(self.app, host=self.host, port=self.port)
+        from common.server.drain import serve
 
-    def _get_agent_card(self, request: Request) -> JSONResponse:
-        if self.agent_card is None:
-            raise ValueError("agent_card is not defined")
-        return JSONResponse(self.agent_card.model_dump(exclude_none=True))
+        self.build_task_manager()
+        serve(self)
+
+    async def drain(self, timeout: Optional[float] = None) -> None:
+        """Stop admitting new tasks and let the running ones finish.
+
+        From then on `tasks/send` and `tasks/sendSubscribe` are refused with a
+        ServerBusyError so clients retry on another replica, while the other
+        methods are still served. Work still running after `timeout` seconds
+        (`drain_timeout` by default) is interrupted and its subscribers get a
+        final event; see `InMemoryTaskManager.drain`.
+        """
+        self.draining = True
+        if self.task_manager is not None:
+            await self.task_manager.drain(
+                self.drain_timeout if timeout is None else timeout
+            )
+
+    @asynccontextmanager
+    async def _lifespan(self, app: Starlette) -> AsyncIterator[None]:
+        if self.task_manager is not None:
+            await self.task_manager.start()
+        try:
+            yield
+        finally:
+            if self.task_manager is not None:
+                await self.task_manager.close()
+            if self.worker_pool is not None:
+                await self.worker_pool.close()
+            self.body_reader.close()
+
+    @property
+    def agent_card(self) -> Optional[AgentCard]:
+        """The served agent card.
+
+        The card is serialized once and the bytes are reused until a new card
+        is assigned; assign a new card rather than mutating the current one.
+        """
+        return self._agent_card
+
+    @agent_card.setter
+    def agent_card(self, agent_card: Optional[AgentCard]) -> None:
+        self._agent_card = agent_card
+        self._agent_card_document: Optional[Tuple[bytes, str]] = None
+
+    def _serialized_agent_card(self) -> Tuple[bytes, str]:
+        if self._agent_card_document is None:
+            if self._agent_card is None:
+                raise ValueError("agent_card is not defined")
+            body = json_codec.dumps(self._agent_card.model_dump(exclude_none=True))
+            # Weak: the gzip and identity encodings of the card share it.
+            etag = 'W/"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+            self._agent_card_document = body, etag
+        return self._agent_card_document
+
+    def _get_agent_card(self, request: Request) -> Response:
+        body, etag = self._serialized_agent_card()
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={self.agent_card_max_age}",
+            # Sent with every encoding, so caches key the card on it.
+            "Vary": "Accept-Encoding",
+        }
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+
+    async def _get_metrics(self, request: Request) -> PlainTextResponse:
+        return PlainTextResponse(
+            self.metrics.render(await self._collect_gauges()),
+            media_type="text/plain; version=0.0.4",
+        )
+
+    async def _collect_gauges(self) -> List[CounterFamily]:
+        """Sample the current size of the task manager and admission queues."""
+        gauges: List[CounterFamily] = []
+        if isinstance(self.task_manager, InMemoryTaskManager):
+            manager = self.task_manager
+            sizes = GaugeFamily(
+                "a2a_task_manager_size", "Task manager state.", ("kind",)
+            )
+            task_count = await manager.task_store.count_tasks()
+            if task_count is not None:
+                sizes.set("tasks", value=task_count)
+            sizes.set(
+                "sse_subscribers",
+                value=sum(map(len, manager.task_sse_subscribers.values())),
+            )
+            sizes.set("event_journals", value=len(manager.event_journals))
+            sizes.set("running_tasks", value=len(manager.task_registry))
+            retention = getattr(manager.task_store, "retention", None)
+            if retention is not None:
+                sizes.set("task_bytes", value=retention.total_bytes)
+            gauges.append(sizes)
+
+        if self.admission is not None:
+            admission = GaugeFamily(
+                "a2a_admission_calls", "Calls running or waiting.", ("method", "kind")
+            )
+            rejected = CounterFamily(
+                "a2a_admission_rejected_total",
+                "Calls rejected since start, by reason.",
+                ("method", "reason"),
+            )
+            for stats in self.admission.stats():
+                admission.set(stats.method, "active", value=stats.active)
+                admission.set(stats.method, "queued", value=stats.queued)
+                rejected.inc(
+                    stats.method, "queue_full", amount=stats.rejected_queue_full
+                )
+                rejected.inc(stats.method, "timeout", amount=stats.rejected_timeout)
+            gauges.extend((admission, rejected))
+        return gauges
 
-    async def _process_request(
-        self, request: Request
-    ) -> JSONResponse | EventSourceResponse:
+    async def _process_request(self, request: Request) -> Response:
         if self.task_manager is None:
             raise ValueError("task_manager is not defined")
 
+        started = time.perf_counter()
+        method, outcome = "unknown", "error"
+        binary = _accepts_msgpack(request)
+        claimed: Optional[str] = None
         try:
-            body = await request.json()
-            json_rpc_request = A2ARequest.validate_python(body)
-
-            result: Union[
-                AsyncIterable[SendTaskStreamingResponse | SendTaskResponse],
-                JSONRPCResponse,
-                GetTaskResponse,
-            ]
-
-            if isinstance(json_rpc_request, GetTaskRequest):
-                result = await self.task_manager.on_get_task(json_rpc_request)
-            elif isinstance(json_rpc_request, SendTaskRequest):
-                result = await self.task_manager.on_send_task(json_rpc_request)
-            elif isinstance(json_rpc_request, SendTaskStreamingRequest):
-                result = await self.task_manager.on_send_task_subscribe(
-                    json_rpc_request
-                )
-            elif isinstance(json_rpc_request, CancelTaskRequest):
-                result = await self.task_manager.on_cancel_task(json_rpc_request)
-            elif isinstance(json_rpc_request, SetTaskPushNotificationRequest):
-                result = await self.task_manager.on_set_task_push_notification(
-                    json_rpc_request
-                )
-            elif isinstance(json_rpc_request, GetTaskPushNotificationRequest):
-                result = await self.task_manager.on_get_task_push_notification(
-                    json_rpc_request
+            body = await self.body_reader.read(request)
+            method = _metric_method(body)
+            mark = self._observe_phase(method, "decode", started)
+            if isinstance(body, list):
+                response: Response = await self._process_batch(body, request)
+                outcome = "ok" if response.status_code == 200 else "error"
+                return response
+
+            owner = self._remote_owner(body, request)
+            if owner is not None:
+                assert self.worker_pool is not None
+                response = await self.worker_pool.forward(
+                    owner, request, json_codec.dumps(self._inline_files(body))
                 )
-            elif isinstance(json_rpc_request, TaskResubscriptionRequest):
-                result = await self.task_manager.on_resubscribe_to_task(
-                    json_rpc_request
+                self._observe_phase(method, "forward", mark)
+                outcome = "ok" if response.status_code == 200 else "error"
+                return response
+
+            body, claimed = self._claim_files(body)
+            json_rpc_request = self._parse(body)
+            mark = self._observe_phase(method, "validate", mark)
+            result = await self._dispatch(json_rpc_request, request)
+            mark = self._observe_phase(method, "handle", mark)
+            response = self._create_response(result, method, binary)
+            self._observe_phase(method, "serialize", mark)
+            if not (isinstance(result, JSONRPCResponse) and result.error is not None):
+                outcome = "ok"
+            return response
+
+        except Exception as e:
+            return self._handle_exception(e, binary)
+        finally:
+            if claimed is not None:
+                await self._release_unsaved(claimed)
+            self.metrics.requests.inc(method, outcome)
+            self.metrics.request_seconds.labels(method).observe(
+                time.perf_counter() - started
+            )
+
+    def _inline_files(self, call: Any) -> Any:
+        """Put the spilled file contents of a call back inline."""
+        if not self.spilled_files:
+            return call
+        references = self.spilled_files.references(call)
+        if not references:
+            return call
+        call = self.spilled_files.rehydrate(call)
+        self.spilled_files.discard(references)
+        return call
+
+    def _claim_files(self, call: Any) -> Tuple[Any, Optional[str]]:
+        """Give the spilled files of a call to the task it sends a message to.
+
+        Calls of other methods get the contents inline.
+
+        Returns:
+            The call, and the id of the task given files, if any.
+        """
+        if not self.spilled_files or not isinstance(call, dict):
+            return call, None
+        params = call.get("params")
+        task_id = params.get("id") if isinstance(params, dict) else None
+        if call.get("method") not in _STARTING_METHODS or not isinstance(task_id, str):
+            return self._inline_files(call), None
+        references = self.spilled_files.references(call)
+        if not references:
+            return call, None
+        self.spilled_files.claim(task_id, references)
+        return call, task_id
+
+    async def _release_unsaved(self, task_id: str) -> None:
+        """Delete the files given to a task the call failed to create."""
+        assert isinstance(self.task_manager, InMemoryTaskManager)
+        assert self.spilled_files is not None
+        if await self.task_manager.task_store.get_task(task_id) is None:
+            self.spilled_files.release(task_id)
+
+    def _export(self, content: Any) -> Any:
+        """Response content with spilled file contents inline."""
+        if not self.spilled_files:
+            return content
+        return self.spilled_files.rehydrate(content)
+
+    def _observe_phase(self, method: str, phase: str, since: float) -> float:
+        now = time.perf_counter()
+        self.metrics.phase_seconds.labels(method, phase).observe(now - since)
+        return now
+
+    def _parse(self, body: Any) -> JSONRPCRequest:
+        """Validate a decoded call against the model of its method only."""
+        method = body.get("method") if isinstance(body, dict) else None
+        entry = _METHODS.get(method) if isinstance(method, str) else None
+        if entry is None:
+            # Report a malformed call as such before reporting the method.
+            call = JSONRPCRequest.model_validate(body)
+            raise _MethodNotFound(call.id)
+        request_model, _ = entry
+        return request_model.model_validate(body)
+
+    async def _dispatch(
+        self, json_rpc_request: JSONRPCRequest, request: Request
+    ) -> Any:
+        if isinstance(json_rpc_request, TaskResubscriptionRequest):
+            last_event_id = request.headers.get("last-event-id")
+            if (
+                json_rpc_request.params.lastEventId is None
+                and last_event_id is not None
+                and last_event_id.isdigit()
+            ):
+                json_rpc_request.params.lastEventId = int(last_event_id)
+
+        if isinstance(json_rpc_request, ListTasksRequest) and self._spans_workers(
+            request
+        ):
+            return await self._list_tasks_across_workers(json_rpc_request, request)
+
+        if self._refused_by_drain(json_rpc_request.method):
+            return self._shutting_down(json_rpc_request.id)
+
+        _, handler_name = _METHODS[json_rpc_request.method]
+        handler = getattr(self.task_manager, handler_name)
+        limiter = (
+            self.admission.limiter(json_rpc_request.method) if self.admission else None
+        )
+        if limiter is None:
+            return await handler(json_rpc_request)
+
+        try:
+            await limiter.acquire()
+        except ServerBusy as e:
+            logger.warning(f"Rejecting {e.method} call: {e}")
+            error = ServerBusyError(data={"retryAfter": e.retry_after})
+            return JSONRPCResponse(id=json_rpc_request.id, error=error)
+        # Calls queued for a slot may be admitted after the drain started.
+        if self._refused_by_drain(json_rpc_request.method):
+            limiter.release()
+            return self._shutting_down(json_rpc_request.id)
+        try:
+            result = await handler(json_rpc_request)
+        except BaseException:
+            limiter.release()
+            raise
+        if isinstance(result, AsyncIterable):
+            return _AdmittedStream(result, limiter)
+        limiter.release()
+        return result
+
+    def _refused_by_drain(self, method: str) -> bool:
+        return self.draining and method in _STARTING_METHODS
+
+    def _shutting_down(self, request_id: JSONRPC_ID) -> JSONRPCResponse:
+        error = ServerBusyError(
+            message="Server is shutting down, retry later", data={"retryAfter": 1.0}
+        )
+        return JSONRPCResponse(id=request_id, error=error)
+
+    def _spans_workers(self, request: Request) -> bool:
+        """Whether this call is served on behalf of the whole worker pool."""
+        return self.worker_pool is not None and FORWARDED_HEADER not in request.headers
+
+    def _remote_owner(self, call: Any, request: Request) -> Optional[int]:
+        """Index of the worker owning the task of a call, if it is not this one."""
+        if self.worker_pool is None or not self._spans_workers(request):
+            return None
+        params = call.get("params") if isinstance(call, dict) else None
+        task_id = params.get("id") if isinstance(params, dict) else None
+        if not isinstance(task_id, str):
+            return None
+        owner = self.worker_pool.owner_of(task_id)
+        return None if owner == self.worker_pool.index else owner
+
+    async def _list_tasks_across_workers(
+        self, json_rpc_request: ListTasksRequest, request: Request
+    ) -> ListTasksResponse:
+        """List tasks worker by worker until the page is full.
+
+        Tasks are ordered by recency within each worker, not across workers.
+        The cursor records the worker to continue from and its own cursor.
+        """
+        assert self.worker_pool is not None and self.task_manager is not None
+        params = json_rpc_request.params
+        try:
+            worker, cursor = (
+                decode_list_cursor(params.cursor) if params.cursor else (0, None)
+            )
+        except ValueError as e:
+            return ListTasksResponse(
+                id=json_rpc_request.id, error=InvalidParamsError(message=str(e))
+            )
+
+        tasks: List[Any] = []
+        while worker < self.worker_pool.count and len(tasks) < params.limit:
+            worker_params = params.model_copy(
+                update={"cursor": cursor, "limit": params.limit - len(tasks)}
+            )
+            call = json_rpc_request.model_copy(update={"params": worker_params})
+            if worker == self.worker_pool.index:
+                response = await self.task_manager.on_list_tasks(call)
+            else:
+                response = ListTasksResponse(
+                    **await self.worker_pool.call(
+                        worker, call.model_dump(mode="json", exclude_none=True), request
+                    )
                 )
+            if response.error is not None or response.result is None:
+                return response
+            tasks.extend(response.result.tasks)
+            cursor = response.result.nextCursor
+            if cursor is None:
+                worker += 1
+
+        next_cursor = None
+        if worker < self.worker_pool.count:
+            next_cursor = encode_list_cursor(worker, cursor)
+        return ListTasksResponse(
+            id=json_rpc_request.id,
+            result={"tasks": tasks, "nextCursor": next_cursor},
+        )
+
+    async def _process_batch(self, batch: List[Any], request: Request) -> Response:
+        """Run the calls of a JSON-RPC batch concurrently.
+
+        Streaming methods cannot share a response with other calls, so they are
+        answered with an error. The responses are returned in request order.
+        """
+        if not batch or len(batch) > self.max_batch_size:
+            error = InvalidRequestError(
+                message=f"Batch must hold 1 to {self.max_batch_size} requests"
+            )
+            response = JSONRPCResponse(id=None, error=error)
+            return _encode(
+                response.model_dump(exclude_none=True),
+                _accepts_msgpack(request),
+                status_code=400,
+            )
+
+        responses = await asyncio.gather(
+            *(self._process_batch_item(item, request) for item in batch)
+        )
+        return _encode(
+            self._export(
+                [response.model_dump(exclude_none=True) for response in responses]
+            ),
+            _accepts_msgpack(request),
+        )
+
+    async def _process_batch_item(self, item: Any, request: Request) -> JSONRPCResponse:
+        started = time.perf_counter()
+        method = _metric_method(item)
+        response = await self._run_batch_item(item, request)
+        outcome = "ok" if response.error is None else "error"
+        self.metrics.requests.inc(method, outcome)
+        self.metrics.request_seconds.labels(method).observe(
+            time.perf_counter() - started
+        )
+        return response
+
+    async def _run_batch_item(self, item: Any, request: Request) -> JSONRPCResponse:
+        request_id = item.get("id") if isinstance(item, dict) else None
+        claimed: Optional[str] = None
+        try:
+            owner = self._remote_owner(item, request)
+            if owner is None:
+                item, claimed = self._claim_files(item)
             else:
-                logger.warning(f"Unexpected request type: {type(json_rpc_request)}")
-                raise ValueError(f"Unexpected request type: {type(request)}")
+                item = self._inline_files(item)
+            json_rpc_request = self._parse(item)
+            if json_rpc_request.method in _STREAMING_METHODS:
+                error = InvalidRequestError(
+                    message="Streaming methods are not supported in a batch"
+                )
+                return JSONRPCResponse(id=json_rpc_request.id, error=error)
 
-            return self._create_response(result)
+            if owner is not None:
+                assert self.worker_pool is not None
+                return JSONRPCResponse(
+                    **await self.worker_pool.call(owner, item, request)
+                )
 
+            result = await self._dispatch(json_rpc_request, request)
+            if not isinstance(result, JSONRPCResponse):
+                raise ValueError(f"Unexpected result type: {type(result)}")
+            return result
         except Exception as e:
-            return self._handle_exception(e)
+            return JSONRPCResponse(id=request_id, error=self._error_for(e))
+        finally:
+            if claimed is not None:
+                await self._release_unsaved(claimed)
+
+    def _handle_exception(self, e: Exception, binary: bool = False) -> Response:
+        if isinstance(e, compression.UnsupportedEncoding):
+            return Response(
+                str(e),
+                status_code=415,
+                headers={"Accept-Encoding": compression.ACCEPT_ENCODING},
+            )
+        if isinstance(e, UnsupportedMediaType):
+            return Response(str(e), status_code=415)
+        if isinstance(e, BodyTooLarge):
+            error = InvalidRequestError(message=str(e))
+            return _encode(
+                JSONRPCResponse(error=error).model_dump(exclude_none=True),
+                binary,
+                status_code=413,
+            )
+        request_id = e.request_id if isinstance(e, _MethodNotFound) else None
+        response = JSONRPCResponse(id=request_id, error=self._error_for(e))
+        return _encode(response.model_dump(exclude_none=True), binary, status_code=400)
 
-    def _handle_exception(self, e: Exception) -> JSONResponse:
-        if isinstance(e, json.decoder.JSONDecodeError):
-            json_rpc_error = JSONParseError()
+    def _error_for(self, e: Exception) -> JSONRPCError:
+        if isinstance(
+            e,
+            (
+                json.decoder.JSONDecodeError,
+                compression.DecodingError,
+                msgpack_codec.DecodeError,
+            ),
+        ):
+            return JSONParseError()
+        elif isinstance(e, _MethodNotFound):
+            return MethodNotFoundError()
         elif isinstance(e, ValidationError):
-            json_rpc_error = InvalidRequestError(data=json.loads(e.json()))
+            return InvalidRequestError(data=json.loads(e.json()))
         else:
             logger.error(f"Unhandled exception: {e}")
-            json_rpc_error = InternalError()
-
-        response = JSONRPCResponse(id=None, error=json_rpc_error)
-        return JSONResponse(response.model_dump(exclude_none=True), status_code=400)
+            return InternalError()
 
-    def _create_response(self, result: Any) -> JSONResponse | EventSourceResponse:
+    def _create_response(
+        self, result: Any, method: str = "unknown", binary: bool = False
+    ) -> Response:
         if isinstance(result, AsyncIterable):
+            render = _msgpack_frame if binary else _sse_frame
 
             async def event_generator(
                 result: AsyncIterable[Any],
-            ) -> AsyncIterable[dict[str, str]]:
-                async for item in result:
-                    yield {"data": item.model_dump_json(exclude_none=True)}
+            ) -> AsyncIterable[Union[bytes, dict[str, str]]]:
+                started, events = time.perf_counter(), 0
+                try:
+                    async for item in result:
+                        events += 1
+                        yield render(item)
+                finally:
+                    self.metrics.stream_seconds.labels(method).observe(
+                        time.perf_counter() - started
+                    )
+                    self.metrics.stream_events.labels(method).observe(events)
 
-            return EventSourceResponse(event_generator(result))
+            response: Response
+            if binary:
+                response = StreamingResponse(
+                    event_generator(result), media_type=msgpack_codec.STREAM_MEDIA_TYPE
+                )
+            else:
+                response = EventSourceResponse(event_generator(result))
+            if isinstance(result, _AdmittedStream):
+                return _ClosingResponse(response, result)
+            return response
         elif isinstance(result, JSONRPCResponse):
-            return JSONResponse(result.model_dump(exclude_none=True))
+            if isinstance(result.error, ServerBusyError):
+                retry_after = math.ceil(result.error.data["retryAfter"])
+                return _encode(
+                    result.model_dump(exclude_none=True),
+                    binary,
+                    status_code=503,
+                    headers={"Retry-After": str(retry_after)},
+                )
+            return _encode(self._export(result.model_dump(exclude_none=True)), binary)
         else:
             logger.error(f"Unexpected result type: {type(result)}")
             raise ValueError(f"Unexpected result type: {type(result)}")
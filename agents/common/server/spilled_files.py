@@ -0,0 +1,118 @@
+import base64
+import logging
+import os
+import uuid
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Set
+
+logger = logging.getLogger(__name__)
+
+# File parts whose content was spilled hold a reference with this prefix as
+# their `bytes`; it is never valid base64, so it cannot be mistaken for
+# content.
+REFERENCE_PREFIX = "a2a-spill:"
+
+
+class SpilledFiles:
+    """Content of file parts kept in files instead of memory.
+
+    The request body reader writes large file part contents to files and
+    puts a reference in place of their base64 `bytes`, from a worker thread.
+    `rehydrate` turns references back into content whenever a message leaves
+    the process; agents read the content with `open`, usually through
+    `InMemoryTaskManager.open_file`. Each file belongs to the task whose
+    message carried it and is deleted with that task.
+    """
+
+    def __init__(self) -> None:
+        self._paths: Dict[str, str] = {}
+        self._by_task: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def add(self, path: str) -> str:
+        """Take ownership of a file, returning the reference to it.
+
+        Safe to call from any thread.
+        """
+        reference = f"{REFERENCE_PREFIX}{uuid.uuid4().hex}"
+        self._paths[reference] = path
+        return reference
+
+    def read(self, reference: str) -> bytes:
+        """The content behind a reference.
+
+        Raises:
+            KeyError: If the reference is unknown or its file was deleted.
+        """
+        with self.open(reference) as spilled:
+            return spilled.read()
+
+    def open(self, reference: str) -> BinaryIO:
+        """Open the content behind a reference for reading.
+
+        Raises:
+            KeyError: If the reference is unknown or its file was deleted.
+        """
+        return open(self._paths[reference], "rb")
+
+    def references(self, value: Any) -> List[str]:
+        """The references held by the file parts within a message."""
+        found: List[str] = []
+        self._walk(value, found.append)
+        return found
+
+    def claim(self, task_id: str, references: List[str]) -> None:
+        """Make files belong to a task, to be deleted along with it."""
+        self._by_task.setdefault(task_id, set()).update(references)
+
+    def release(self, task_id: str) -> None:
+        """Delete the files of a task."""
+        self.discard(self._by_task.pop(task_id, ()))
+
+    def discard(self, references: Iterable[str]) -> None:
+        for reference in references:
+            path = self._paths.pop(reference, None)
+            if path is None:
+                continue
+            try:
+                os.unlink(path)
+            except OSError as e:
+                logger.warning(f"Could not delete spilled file {path}: {e}")
+
+    def rehydrate(self, value: Any) -> Any:
+        """Return a message with the content of its spilled file parts inline.
+
+        `value` is a JSON-compatible message; parts of it holding references
+        are copied, the rest is shared.
+        """
+        if not self._paths:
+            return value
+        return self._rehydrate(value)
+
+    def close(self) -> None:
+        self.discard(list(self._paths))
+        self._by_task.clear()
+
+    def _rehydrate(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            content = value.get("bytes")
+            if isinstance(content, str) and content in self._paths:
+                value = dict(value)
+                value["bytes"] = base64.b64encode(self.read(content)).decode()
+                return value
+            return {key: self._rehydrate(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._rehydrate(item) for item in value]
+        return value
+
+    def _walk(self, value: Any, found: Callable[[str], None]) -> None:
+        if isinstance(value, dict):
+            content = value.get("bytes")
+            if isinstance(content, str) and content in self._paths:
+                found(content)
+            for item in value.values():
+                self._walk(item, found)
+        elif isinstance(value, list):
+            for item in value:
+                self._walk(item, found)
@@ -0,0 +1,139 @@
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Deque, Iterable
+
+from common.server.event_journal import JournalEntry
+from common.types import InternalError, TaskStatusUpdateEvent
+
+
+class SlowConsumerPolicy(str, Enum):
+    """What a full subscriber queue does with a new event.
+
+    DROP_OLDEST discards the oldest pending event. COALESCE discards the
+    oldest pending non-final status update, which a newer status supersedes,
+    and disconnects the subscriber if only artifacts or final events are
+    pending. DISCONNECT ends the subscriber's stream with an error; the client
+    can resubscribe with its Last-Event-ID to catch up from the journal.
+    """
+
+    DROP_OLDEST = "drop-oldest"
+    COALESCE = "coalesce"
+    DISCONNECT = "disconnect"
+
+
+@dataclass(frozen=True)
+class SubscriberStats:
+    task_id: str
+    pending: int
+    delivered: int
+    dropped: int
+    coalesced: int
+    lag: int
+    disconnected: bool
+
+
+class SubscriberQueue:
+    """Bounded, non-blocking queue feeding one SSE subscriber.
+
+    Producers call `offer`, which never waits, so a stalled client can neither
+    grow memory without bound nor hold up delivery to other subscribers.
+    `maxsize` must be positive.
+    """
+
+    def __init__(
+        self,
+        task_id: str,
+        maxsize: int = 64,
+        policy: SlowConsumerPolicy = SlowConsumerPolicy.COALESCE,
+    ) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive integer")
+        self.task_id = task_id
+        self.maxsize = maxsize
+        self.policy = policy
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.disconnected = False
+        self._items: Deque[JournalEntry] = deque()
+        self._ready = asyncio.Event()
+        self._last_offered_seq = 0
+        self._last_delivered_seq = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def prefill(self, entries: Iterable[JournalEntry]) -> None:
+        """Queue replayed entries, bypassing the size bound."""
+        for entry in entries:
+            self._push(entry)
+
+    def offer(self, entry: JournalEntry) -> bool:
+        """Queue an entry without waiting.
+
+        Returns:
+            False if this entry made the subscriber disconnect, True otherwise.
+        """
+        if self.disconnected:
+            return True
+
+        if len(self._items) >= self.maxsize and not self._make_room():
+            self.disconnected = True
+            self._items.clear()
+            self._ready.set()
+            return False
+
+        self._push(entry)
+        return True
+
+    async def get(self) -> JournalEntry:
+        while not self._items:
+            if self.disconnected:
+                return JournalEntry.create(
+                    self._last_delivered_seq,
+                    InternalError(
+                        message="Subscriber is too slow, resubscribe to resume"
+                    ),
+                )
+            self._ready.clear()
+            await self._ready.wait()
+
+        entry = self._items.popleft()
+        self.delivered += 1
+        self._last_delivered_seq = entry.seq
+        return entry
+
+    def stats(self) -> SubscriberStats:
+        return SubscriberStats(
+            task_id=self.task_id,
+            pending=len(self._items),
+            delivered=self.delivered,
+            dropped=self.dropped,
+            coalesced=self.coalesced,
+            lag=self._last_offered_seq - self._last_delivered_seq,
+            disconnected=self.disconnected,
+        )
+
+    def _push(self, entry: JournalEntry) -> None:
+        self._items.append(entry)
+        self._last_offered_seq = max(self._last_offered_seq, entry.seq)
+        self._ready.set()
+
+    def _make_room(self) -> bool:
+        if self.policy == SlowConsumerPolicy.DROP_OLDEST:
+            self._items.popleft()
+            self.dropped += 1
+            return True
+
+        if self.policy == SlowConsumerPolicy.COALESCE:
+            for index, pending in enumerate(self._items):
+                if isinstance(pending.event, TaskStatusUpdateEvent) and not (
+                    pending.is_final
+                ):
+                    del self._items[index]
+                    self.coalesced += 1
+                    return True
+
+        return False
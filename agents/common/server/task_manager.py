@@ -1,20 +1,45 @@
 import asyncio
+import base64
+import io
 import logging
 from abc import ABC, abstractmethod
-from typing import AsyncIterable, List, Optional, Union, cast
-
-from common.server.utils import new_not_implemented_error
+from typing import Any, AsyncIterable, BinaryIO, List, Optional, Union, cast
+
+from common.server.event_bus import EventBus
+from common.server.event_journal import (
+    EventJournal,
+    JournalEntry,
+    JournalRegistry,
+    StreamEvent,
+    StreamEventPayload,
+)
+from common.server.retention import TERMINAL_STATES
+from common.server.spilled_files import REFERENCE_PREFIX
+from common.server.streaming import SlowConsumerPolicy, SubscriberQueue, SubscriberStats
+from common.server.task_registry import TaskRegistry
+from common.server.task_store import (
+    InMemoryTaskStore,
+    TaskStore,
+    decode_cursor,
+    encode_cursor,
+)
 from common.types import (
+    JSONRPC_ID,
     Artifact,
     CancelTaskRequest,
     CancelTaskResponse,
+    FileContent,
     GetTaskPushNotificationRequest,
     GetTaskPushNotificationResponse,
     GetTaskRequest,
     GetTaskResponse,
+    GetTaskResult,
     InternalError,
-    JSONRPCError,
+    InvalidParamsError,
     JSONRPCResponse,
+    ListTasksRequest,
+    ListTasksResponse,
+    Message,
     PushNotificationConfig,
     SendTaskRequest,
     SendTaskResponse,
@@ -24,25 +49,61 @@ from common.types import (
     SetTaskPushNotificationResponse,
     Task,
     TaskIdParams,
+    TaskListParams,
+    TaskListResult,
     TaskNotCancelableError,
     TaskNotFoundError,
     TaskPushNotificationConfig,
     TaskQueryParams,
+    TaskResubscriptionParams,
     TaskResubscriptionRequest,
     TaskSendParams,
     TaskState,
     TaskStatus,
     TaskStatusUpdateEvent,
+    TextPart,
 )
+from common.utils.striped_lock import StripedLock
 
 logger = logging.getLogger(__name__)
 
+# Seconds the work cancelled at shutdown is given to unwind.
+CANCEL_TIMEOUT = 5.0
+
+
+def _history_window(
+    size: int, historyLength: Optional[int], historyCursor: Optional[int]
+) -> tuple[int, int]:
+    """The start and end positions of the history returned for a task."""
+    end = size if historyCursor is None else min(historyCursor, size)
+    start = end
+    if historyLength is not None and historyLength > 0:
+        start = max(end - historyLength, 0)
+    return start, end
+
 
 class TaskManager(ABC):
+    async def start(self) -> None:
+        """Called by the server before it accepts requests."""
+
+    async def drain(self, timeout: float) -> None:
+        """Called by the server when it starts shutting down.
+
+        New tasks are no longer sent to the manager; running work should end
+        within `timeout` seconds.
+        """
+
+    async def close(self) -> None:
+        """Called by the server when it shuts down."""
+
     @abstractmethod
     async def on_get_task(self, request: GetTaskRequest) -> GetTaskResponse:
         pass
 
+    @abstractmethod
+    async def on_list_tasks(self, request: ListTasksRequest) -> ListTasksResponse:
+        pass
+
     @abstractmethod
     async def on_cancel_task(self, request: CancelTaskRequest) -> CancelTaskResponse:
         pass
@@ -54,7 +115,9 @@ class TaskManager(ABC):
     @abstractmethod
     async def on_send_task_subscribe(
         self, request: SendTaskStreamingRequest
-    ) -> Union[AsyncIterable[SendTaskStreamingResponse], JSONRPCResponse]:
+    ) -> Union[
+        AsyncIterable[Union[SendTaskStreamingResponse, StreamEvent]], JSONRPCResponse
+    ]:
         pass
 
     @abstractmethod
@@ -72,43 +135,177 @@ class TaskManager(ABC):
     @abstractmethod
     async def on_resubscribe_to_task(
         self, request: TaskResubscriptionRequest
-    ) -> Union[AsyncIterable[SendTaskResponse], JSONRPCResponse]:
+    ) -> Union[
+        AsyncIterable[Union[SendTaskStreamingResponse, StreamEvent]], JSONRPCResponse
+    ]:
         pass
 
 
 class InMemoryTaskManager(TaskManager):
-    def __init__(self) -> None:
-        self.tasks: dict[str, Task] = {}
-        self.push_notification_infos: dict[str, PushNotificationConfig] = {}
-        self.lock = asyncio.Lock()
-        self.task_sse_subscribers: dict[str, List[asyncio.Queue]] = {}
+    """Task manager serving tasks from a pluggable task store.
+
+    Task state lives in `task_store`, an in-memory store unless another
+    backend is given. Writes are serialized per task through a striped lock,
+    so a busy task only contends with the few tasks sharing its stripe; reads
+    take no lock and rely on the store returning consistent snapshots.
+
+    Background work for a task should be started through `task_registry`, so
+    that `tasks/cancel` can stop it.
+
+    With an `event_bus`, stream events travel through the bus instead of being
+    delivered locally, so subscribers connected to any replica sharing the bus
+    and the task store receive them. The manager must then be started before
+    it serves requests.
+    """
+
+    def __init__(
+        self,
+        task_store: Optional[TaskStore] = None,
+        lock_stripes: int = 64,
+        subscriber_queue_size: int = 64,
+        slow_consumer_policy: SlowConsumerPolicy = SlowConsumerPolicy.COALESCE,
+        event_bus: Optional[EventBus] = None,
+    ) -> None:
+        self.task_store = task_store if task_store is not None else InMemoryTaskStore()
+        self.task_locks = StripedLock(lock_stripes)
+        # Checked here rather than on the first subscription.
+        if subscriber_queue_size < 1:
+            raise ValueError("subscriber_queue_size must be a positive integer")
+        self.subscriber_queue_size = subscriber_queue_size
+        self.slow_consumer_policy = slow_consumer_policy
+        self.task_sse_subscribers: dict[str, List[SubscriberQueue]] = {}
         self.subscriber_lock = asyncio.Lock()
+        self.event_journals = JournalRegistry()
+        self.task_registry = TaskRegistry()
+        self.event_bus = event_bus
+
+    async def start(self) -> None:
+        if self.event_bus is not None:
+            await self.event_bus.start(self._deliver_entry)
+
+    async def drain(self, timeout: float) -> None:
+        """Let running work finish, interrupting what is left after `timeout`."""
+        leftover = await self.task_registry.wait(timeout)
+        for task_id in leftover:
+            logger.warning(f"Interrupting task {task_id} at shutdown")
+            self.task_registry.request_cancel(task_id)
+        # The cancelled work unwinds concurrently, within one shared deadline.
+        if leftover and await self.task_registry.wait(CANCEL_TIMEOUT):
+            logger.warning(f"Work still running {CANCEL_TIMEOUT}s after cancelling")
+        for task_id in leftover:
+            await self.interrupt_task(task_id)
+
+    async def interrupt_task(self, task_id: str) -> None:
+        """Record that the work of a task was stopped by a shutdown.
+
+        The task is marked failed and its subscribers receive a final status
+        update asking the client to send the task again. Override to save
+        agent state before the task is marked.
+        """
+        task = await self.task_store.get_task(task_id)
+        if task is None or task.status.state in TERMINAL_STATES:
+            return
+        status = TaskStatus(
+            state=TaskState.FAILED,
+            message=Message(
+                role="agent",
+                parts=[
+                    TextPart(
+                        text="The agent shut down before finishing the task, "
+                        "send it again to resume."
+                    )
+                ],
+            ),
+        )
+        await self.update_store(task_id, status, [])
+        await self.enqueue_events_for_sse(
+            task_id, TaskStatusUpdateEvent(id=task_id, status=status, final=True)
+        )
+
+    async def close(self) -> None:
+        if self.event_bus is not None:
+            await self.event_bus.close()
+        await self.task_store.close()
 
     async def on_get_task(self, request: GetTaskRequest) -> GetTaskResponse:
         logger.info(f"Getting task {request.params.id}")
         task_query_params: TaskQueryParams = request.params
 
-        async with self.lock:
-            task = self.tasks.get(task_query_params.id)
-            if task is None:
-                return GetTaskResponse(id=request.id, error=TaskNotFoundError())
+        task = await self.task_store.get_task(task_query_params.id)
+        if task is None:
+            return GetTaskResponse(id=request.id, error=TaskNotFoundError())
+
+        task_result = self.append_task_history(
+            task, task_query_params.historyLength, task_query_params.historyCursor
+        )
+        start, end = _history_window(
+            len(task.history or []),
+            task_query_params.historyLength,
+            task_query_params.historyCursor,
+        )
+        # The view is already validated; only the cursor is added to it.
+        result = GetTaskResult.model_construct(
+            **dict(task_result), nextHistoryCursor=start if 0 < start < end else None
+        )
+
+        return GetTaskResponse(id=request.id, result=result)
+
+    async def on_list_tasks(self, request: ListTasksRequest) -> ListTasksResponse:
+        task_list_params: TaskListParams = request.params
 
-            task_result = self.append_task_history(
-                task, task_query_params.historyLength
+        try:
+            before = (
+                decode_cursor(task_list_params.cursor)
+                if task_list_params.cursor
+                else None
+            )
+        except ValueError as e:
+            return ListTasksResponse(
+                id=request.id, error=InvalidParamsError(message=str(e))
             )
 
-        return GetTaskResponse(id=request.id, result=task_result)
+        tasks, next_key = await self.task_store.list_tasks(
+            session_id=task_list_params.sessionId,
+            state=task_list_params.state,
+            before=before,
+            limit=task_list_params.limit,
+        )
+        result = TaskListResult(
+            tasks=[
+                self.append_task_history(task, task_list_params.historyLength)
+                for task in tasks
+            ],
+            nextCursor=encode_cursor(next_key) if next_key is not None else None,
+        )
+        return ListTasksResponse(id=request.id, result=result)
 
     async def on_cancel_task(self, request: CancelTaskRequest) -> CancelTaskResponse:
         logger.info(f"Cancelling task {request.params.id}")
         task_id_params: TaskIdParams = request.params
 
-        async with self.lock:
-            task = self.tasks.get(task_id_params.id)
-            if task is None:
-                return CancelTaskResponse(id=request.id, error=TaskNotFoundError())
+        task = await self.task_store.get_task(task_id_params.id)
+        if task is None:
+            return CancelTaskResponse(id=request.id, error=TaskNotFoundError())
+
+        if task.status.state in TERMINAL_STATES:
+            return CancelTaskResponse(id=request.id, error=TaskNotCancelableError())
+
+        status = TaskStatus(state=TaskState.CANCELED)
+        # Recorded before the work is stopped: the work may have finished the
+        # task meanwhile, and whatever it still writes must not replace this.
+        updated = await self.update_store_if_active(task_id_params.id, status, [])
+        if updated is None:
+            return CancelTaskResponse(id=request.id, error=TaskNotCancelableError())
+        task = updated
+        await self.task_registry.cancel(task_id_params.id)
+        await self.enqueue_events_for_sse(
+            task_id_params.id,
+            TaskStatusUpdateEvent(id=task_id_params.id, status=status, final=True),
+        )
 
-        return CancelTaskResponse(id=request.id, error=TaskNotCancelableError())
+        return CancelTaskResponse(
+            id=request.id, result=self.append_task_history(task, None)
+        )
 
     @abstractmethod
     async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
@@ -117,30 +314,36 @@ class InMemoryTaskManager(TaskManager):
     @abstractmethod
     async def on_send_task_subscribe(
         self, request: SendTaskStreamingRequest
-    ) -> Union[AsyncIterable[SendTaskStreamingResponse], JSONRPCResponse]:
+    ) -> Union[
+        AsyncIterable[Union[SendTaskStreamingResponse, StreamEvent]], JSONRPCResponse
+    ]:
         pass
 
     async def set_push_notification_info(
         self, task_id: str, notification_config: PushNotificationConfig
     ) -> None:
-        async with self.lock:
-            task = self.tasks.get(task_id)
+        async with self.task_locks.for_key(task_id):
+            task = await self.task_store.get_task(task_id)
             if task is None:
                 raise ValueError(f"Task not found for {task_id}")
 
-            self.push_notification_infos[task_id] = notification_config
+            await self.task_store.set_push_notification_info(
+                task_id, notification_config
+            )
 
     async def get_push_notification_info(self, task_id: str) -> PushNotificationConfig:
-        async with self.lock:
-            task = self.tasks.get(task_id)
-            if task is None:
-                raise ValueError(f"Task not found for {task_id}")
+        task = await self.task_store.get_task(task_id)
+        if task is None:
+            raise ValueError(f"Task not found for {task_id}")
+
+        notification_config = await self.task_store.get_push_notification_info(task_id)
+        if notification_config is None:
+            raise ValueError(f"Push notification info not found for {task_id}")
 
-            return self.push_notification_infos[task_id]
+        return notification_config
 
     async def has_push_notification_info(self, task_id: str) -> bool:
-        async with self.lock:
-            return task_id in self.push_notification_infos
+        return await self.task_store.get_push_notification_info(task_id) is not None
 
     async def on_set_task_push_notification(
         self, request: SetTaskPushNotificationRequest
@@ -192,8 +395,8 @@ class InMemoryTaskManager(TaskManager):
 
     async def upsert_task(self, task_send_params: TaskSendParams) -> Task:
         logger.info(f"Upserting task {task_send_params.id}")
-        async with self.lock:
-            task = self.tasks.get(task_send_params.id)
+        async with self.task_locks.for_key(task_send_params.id):
+            task = await self.task_store.get_task(task_send_params.id)
             if task is None:
                 task = Task(
                     id=task_send_params.id,
@@ -202,28 +405,73 @@ class InMemoryTaskManager(TaskManager):
                     status=TaskStatus(state=TaskState.SUBMITTED),
                     history=[task_send_params.message],
                 )
-                self.tasks[task_send_params.id] = task
             else:
                 if task.history is None:
                     task.history = []
                 task.history.append(task_send_params.message)
 
+            await self.task_store.save_task(task)
             return task
 
     async def on_resubscribe_to_task(
         self, request: TaskResubscriptionRequest
-    ) -> Union[AsyncIterable[SendTaskResponse], JSONRPCResponse]:
-        return new_not_implemented_error(request.id)
+    ) -> Union[AsyncIterable[StreamEvent], JSONRPCResponse]:
+        logger.info(f"Resubscribing to task {request.params.id}")
+        task_params: TaskResubscriptionParams = request.params
+
+        task = await self.task_store.get_task(task_params.id)
+        if task is None:
+            return JSONRPCResponse(id=request.id, error=TaskNotFoundError())
+
+        try:
+            sse_event_queue = await self.setup_sse_consumer(
+                task_params.id, True, task_params.lastEventId
+            )
+        except ValueError as e:
+            logger.error(f"Error while reconnecting to SSE stream: {e}")
+            return JSONRPCResponse(
+                id=request.id,
+                error=InternalError(
+                    message=f"An error occurred while reconnecting to stream: {e}"
+                ),
+            )
+
+        return self.dequeue_events_for_sse(request.id, task_params.id, sse_event_queue)
 
     async def update_store(
         self, task_id: str, status: TaskStatus, artifacts: list[Artifact]
     ) -> Task:
-        async with self.lock:
-            try:
-                task = self.tasks[task_id]
-            except KeyError:
+        task = await self._update_store(task_id, status, artifacts, if_active=False)
+        return cast(Task, task)
+
+    async def update_store_if_active(
+        self, task_id: str, status: TaskStatus, artifacts: list[Artifact]
+    ) -> Optional[Task]:
+        """Update a task unless it already reached a terminal state.
+
+        The state is checked and written under the task's lock, and the store
+        checks it again as it writes, so of a run finishing the task and a
+        cancellation, possibly on another replica, only the first is recorded.
+
+        Returns:
+            The updated task, or None if the task was already terminal.
+        """
+        return await self._update_store(task_id, status, artifacts, if_active=True)
+
+    async def _update_store(
+        self,
+        task_id: str,
+        status: TaskStatus,
+        artifacts: Optional[list[Artifact]],
+        if_active: bool,
+    ) -> Optional[Task]:
+        async with self.task_locks.for_key(task_id):
+            task = await self.task_store.get_task(task_id)
+            if task is None:
                 logger.error(f"Task {task_id} not found for updating the task")
                 raise ValueError(f"Task {task_id} not found")
+            if if_active and task.status.state in TERMINAL_STATES:
+                return None
 
             task.status = status
 
@@ -237,66 +485,172 @@ class InMemoryTaskManager(TaskManager):
                     task.artifacts = []
                 task.artifacts.extend(artifacts)
 
+            if not if_active:
+                await self.task_store.save_task(task)
+            elif not await self.task_store.save_task_if_active(task):
+                return None
             return task
 
-    def append_task_history(self, task: Task, historyLength: Optional[int]) -> Task:
-        new_task = cast(Task, task.model_copy())
-        if new_task.history is None:
-            new_task.history = []
-            return new_task
-
-        if new_task.history and historyLength is not None and historyLength > 0:
-            new_task.history = new_task.history[-historyLength:]
-        else:
-            new_task.history = []
+    def open_file(self, file: FileContent) -> BinaryIO:
+        """Open the content of a file part of a task message for reading.
+
+        When the server spilled a large file part to disk, the part holds a
+        reference in `file.bytes` rather than base64 content. Agents should
+        read file parts through this method, which handles both forms.
+
+        Raises:
+            ValueError: If the file is only given by its URI.
+            KeyError: If the spilled content was deleted along with its task.
+        """
+        if file.bytes is None:
+            raise ValueError("The file has no content, only a URI")
+        if file.bytes.startswith(REFERENCE_PREFIX) and isinstance(
+            self.task_store, InMemoryTaskStore
+        ):
+            return self.task_store.spilled_files.open(file.bytes)
+        return io.BytesIO(base64.b64decode(file.bytes))
+
+    def task_document(self, task: Task) -> dict[str, Any]:
+        """A task as sent out of the process, with spilled file contents inline."""
+        document = task.model_dump(exclude_none=True)
+        if isinstance(self.task_store, InMemoryTaskStore):
+            return self.task_store.spilled_files.rehydrate(document)
+        return document
+
+    def append_task_history(
+        self,
+        task: Task,
+        historyLength: Optional[int],
+        historyCursor: Optional[int] = None,
+    ) -> Task:
+        """Return a view of a task holding only the tail of its history.
 
-        return new_task
+        The view is a shallow copy sharing the stored message objects, so the
+        cost is proportional to `historyLength`, not to the whole history.
+        When `historyCursor` is given, the window ends before that position
+        instead of at the newest message.
+        """
+        history = task.history or []
+        start, end = _history_window(len(history), historyLength, historyCursor)
+        return cast(Task, task.model_copy(update={"history": history[start:end]}))
 
     async def setup_sse_consumer(
-        self, task_id: str, is_resubscribe: bool = False
-    ) -> asyncio.Queue:
+        self,
+        task_id: str,
+        is_resubscribe: bool = False,
+        last_event_id: Optional[int] = None,
+    ) -> SubscriberQueue:
+        """Register a subscriber queue for the task's stream events.
+
+        On resubscription the queue is first filled with the journaled events
+        newer than `last_event_id` (all retained events when it is None), so
+        the subscriber resumes where it left off without missing events.
+        """
         async with self.subscriber_lock:
+            journal = self.event_journals.get(task_id)
             if task_id not in self.task_sse_subscribers:
-                if is_resubscribe:
+                if is_resubscribe and journal is None:
                     raise ValueError("Task not found for resubscription")
                 else:
                     self.task_sse_subscribers[task_id] = []
 
-            sse_event_queue: asyncio.Queue[
-                Union[TaskStatusUpdateEvent, JSONRPCError]
-            ] = asyncio.Queue(
-                maxsize=0
-            )  # <=0 is unlimited
+            sse_event_queue = SubscriberQueue(
+                task_id, self.subscriber_queue_size, self.slow_consumer_policy
+            )
+            if is_resubscribe and journal is not None:
+                sse_event_queue.prefill(
+                    self._replay_entries(task_id, journal, last_event_id)
+                )
             self.task_sse_subscribers[task_id].append(sse_event_queue)
             return sse_event_queue
 
+    def _replay_entries(
+        self, task_id: str, journal: EventJournal, last_event_id: Optional[int]
+    ) -> List[JournalEntry]:
+        if last_event_id is not None and not journal.covers(last_event_id):
+            logger.warning(
+                f"Events after {last_event_id} for task {task_id} are no longer "
+                "retained, replaying the retained window"
+            )
+            last_event_id = None
+
+        entries = journal.since(last_event_id)
+        if not entries and journal.closed:
+            # The subscriber already saw the end of the stream; repeat the final
+            # event so the resumed stream terminates instead of hanging.
+            entries = journal.since(journal.last_seq - 1)
+        return entries
+
     async def enqueue_events_for_sse(
         self,
         task_id: str,
-        task_update_event: Union[TaskStatusUpdateEvent, JSONRPCError],
+        task_update_event: StreamEventPayload,
     ) -> None:
+        if self.event_bus is not None:
+            await self.event_bus.publish(task_id, task_update_event)
+            return
+
         async with self.subscriber_lock:
-            if task_id not in self.task_sse_subscribers:
-                return
+            entry = self.event_journals.append(task_id, task_update_event)
+            current_subscribers = list(self.task_sse_subscribers.get(task_id, ()))
+        self._fan_out(task_id, entry, current_subscribers)
 
-            current_subscribers = self.task_sse_subscribers[task_id]
-            for subscriber in current_subscribers:
-                await subscriber.put(task_update_event)
+    async def _deliver_entry(self, task_id: str, entry: JournalEntry) -> None:
+        """Journal and fan out an event received from the event bus."""
+        async with self.subscriber_lock:
+            self.event_journals.add(task_id, entry)
+            current_subscribers = list(self.task_sse_subscribers.get(task_id, ()))
+        self._fan_out(task_id, entry, current_subscribers)
+
+        event = entry.event
+        if (
+            isinstance(event, TaskStatusUpdateEvent)
+            and event.status.state == TaskState.CANCELED
+            and self.task_registry.request_cancel(task_id)
+        ):
+            # The task was cancelled through another replica.
+            logger.info(f"Stopped work of task {task_id} cancelled elsewhere")
+
+    def _fan_out(
+        self, task_id: str, entry: JournalEntry, subscribers: List[SubscriberQueue]
+    ) -> None:
+        # Offering never blocks, so a stalled subscriber cannot delay the others.
+        for subscriber in subscribers:
+            if not subscriber.offer(entry):
+                logger.warning(f"Disconnecting slow subscriber of task {task_id}")
+
+    def subscriber_stats(self, task_id: Optional[str] = None) -> List[SubscriberStats]:
+        """Report queue depth and lag of the SSE subscribers.
+
+        Args:
+            task_id: Only report the subscribers of this task when given.
+
+        Returns:
+            One entry per connected subscriber.
+        """
+        if task_id is not None:
+            subscribers = self.task_sse_subscribers.get(task_id, [])
+        else:
+            subscribers = [
+                subscriber
+                for queues in self.task_sse_subscribers.values()
+                for subscriber in queues
+            ]
+        return [subscriber.stats() for subscriber in subscribers]
 
     async def dequeue_events_for_sse(
-        self, request_id: str, task_id: str, sse_event_queue: asyncio.Queue
-    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        self, request_id: JSONRPC_ID, task_id: str, sse_event_queue: SubscriberQueue
+    ) -> AsyncIterable[StreamEvent]:
         try:
             while True:
-                event = await sse_event_queue.get()
-                if isinstance(event, JSONRPCError):
-                    yield SendTaskStreamingResponse(id=request_id, error=event)
-                    break
-
-                yield SendTaskStreamingResponse(id=request_id, result=event)
-                if isinstance(event, TaskStatusUpdateEvent) and event.final:
+                entry = await sse_event_queue.get()
+                yield StreamEvent.for_request(entry, request_id)
+                if entry.is_final:
                     break
         finally:
             async with self.subscriber_lock:
-                if task_id in self.task_sse_subscribers:
-                    self.task_sse_subscribers[task_id].remove(sse_event_queue)
+                subscribers = self.task_sse_subscribers.get(task_id)
+                if subscribers is not None:
+                    subscribers.remove(sse_event_queue)
+                    if not subscribers:
+                        del self.task_sse_subscribers[task_id]
@@ -0,0 +1,86 @@
+import asyncio
+import logging
+from typing import Coroutine, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class TaskRegistry:
+    """Tracks the asyncio tasks doing the work of each A2A task.
+
+    The event loop only keeps weak references to running tasks, so a
+    fire-and-forget `asyncio.create_task` may be garbage collected mid-flight.
+    The registry holds strong references until each task finishes, which also
+    lets `tasks/cancel` find and cancel the work of a task.
+    """
+
+    def __init__(self) -> None:
+        self._running: Dict[str, Set[asyncio.Task]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(tasks) for tasks in self._running.values())
+
+    def spawn(self, task_id: str, coro: Coroutine) -> asyncio.Task:
+        """Run a coroutine on behalf of a task and track it until it finishes."""
+        running = asyncio.create_task(coro, name=f"a2a-task-{task_id}")
+        self.track(task_id, running)
+        return running
+
+    def track(self, task_id: str, running: asyncio.Task) -> None:
+        """Track an already scheduled asyncio task on behalf of a task."""
+        self._running.setdefault(task_id, set()).add(running)
+        running.add_done_callback(lambda done: self._discard(task_id, done))
+
+    def is_running(self, task_id: str) -> bool:
+        return bool(self._running.get(task_id))
+
+    def running_task_ids(self) -> List[str]:
+        return list(self._running)
+
+    async def wait(self, timeout: Optional[float] = None) -> List[str]:
+        """Wait for all tracked work to finish.
+
+        Returns:
+            The ids of the tasks still running after `timeout` seconds.
+        """
+        running = {task for tasks in self._running.values() for task in tasks}
+        if running:
+            await asyncio.wait(running, timeout=timeout)
+        return self.running_task_ids()
+
+    async def cancel(self, task_id: str, timeout: float = 5.0) -> bool:
+        """Cancel the work of a task and wait for it to unwind.
+
+        Args:
+            task_id: The task whose asyncio tasks are cancelled.
+            timeout: Seconds to wait for the cancelled tasks to finish.
+
+        Returns:
+            True if anything was running for the task.
+        """
+        running = self.request_cancel(task_id)
+        if running:
+            _, still_running = await asyncio.wait(running, timeout=timeout)
+            if still_running:
+                logger.warning(f"Task {task_id} did not stop within {timeout}s")
+        return bool(running)
+
+    def request_cancel(self, task_id: str) -> List[asyncio.Task]:
+        """Cancel the work of a task without waiting for it to unwind.
+
+        Returns:
+            The asyncio tasks that were cancelled.
+        """
+        current = asyncio.current_task()
+        running = [t for t in self._running.get(task_id, ()) if t is not current]
+        for pending in running:
+            pending.cancel()
+        return running
+
+    def _discard(self, task_id: str, done: asyncio.Task) -> None:
+        tasks = self._running.get(task_id)
+        if tasks is None:
+            return
+        tasks.discard(done)
+        if not tasks:
+            del self._running[task_id]
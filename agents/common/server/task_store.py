@@ -0,0 +1,548 @@
+import asyncio
+import base64
+import bisect
+import json
+import logging
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from common.server.retention import (
+    EvictionStats,
+    RetentionPolicy,
+    TaskRetention,
+    estimate_size,
+)
+from common.server.spilled_files import SpilledFiles
+from common.types import PushNotificationConfig, Task, TaskState
+
+logger = logging.getLogger(__name__)
+
+# Position of a task in listing order: its update time, then its id.
+ListKey = Tuple[float, str]
+
+
+def encode_cursor(key: ListKey) -> str:
+    """Encode a listing position as an opaque `tasks/list` cursor."""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> ListKey:
+    """Decode a `tasks/list` cursor, raising ValueError if it is malformed."""
+    try:
+        updated_at, task_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(updated_at), str(task_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class TaskStore(ABC):
+    """Storage backend for task state and push notification configs."""
+
+    @abstractmethod
+    async def get_task(self, task_id: str) -> Optional[Task]:
+        pass
+
+    @abstractmethod
+    async def save_task(self, task: Task) -> None:
+        pass
+
+    async def save_task_if_active(self, task: Task) -> bool:
+        """Save a task unless the stored version reached a terminal state.
+
+        The default saves unconditionally: it relies on the caller having
+        checked the state under the task's lock, which is enough when a single
+        process writes to the store. Stores shared by several processes check
+        and write atomically.
+
+        Returns:
+            Whether the task was saved.
+        """
+        await self.save_task(task)
+        return True
+
+    @abstractmethod
+    async def delete_task(self, task_id: str) -> None:
+        pass
+
+    @abstractmethod
+    async def get_push_notification_info(
+        self, task_id: str
+    ) -> Optional[PushNotificationConfig]:
+        pass
+
+    @abstractmethod
+    async def set_push_notification_info(
+        self, task_id: str, notification_config: PushNotificationConfig
+    ) -> None:
+        pass
+
+    @abstractmethod
+    async def list_tasks(
+        self,
+        session_id: Optional[str] = None,
+        state: Optional[TaskState] = None,
+        before: Optional[ListKey] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Task], Optional[ListKey]]:
+        """List tasks, most recently updated first.
+
+        Args:
+            session_id: Only list tasks of this session.
+            state: Only list tasks in this state.
+            before: Only list tasks positioned after this key, as returned by
+                the previous page.
+            limit: Maximum number of tasks to return.
+
+        Returns:
+            The page of tasks, and the key to continue from or None if there
+            are no more tasks.
+        """
+
+    async def count_tasks(self) -> Optional[int]:
+        """Number of stored tasks, or None if the backend cannot tell cheaply."""
+        return None
+
+    async def close(self) -> None:
+        pass
+
+
+class _SortedKeys:
+    """Listing keys of a set of tasks, kept in ascending order."""
+
+    def __init__(self) -> None:
+        self._keys: List[ListKey] = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: ListKey) -> None:
+        bisect.insort(self._keys, key)
+
+    def remove(self, key: ListKey) -> None:
+        index = bisect.bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            del self._keys[index]
+
+    def descending(self, before: Optional[ListKey] = None) -> Iterable[ListKey]:
+        end = (
+            len(self._keys)
+            if before is None
+            else bisect.bisect_left(self._keys, before)
+        )
+        for index in range(end - 1, -1, -1):
+            yield self._keys[index]
+
+
+class InMemoryTaskStore(TaskStore):
+    """Task store keeping live Task objects in process memory.
+
+    None of the methods yield to the event loop, so callers observe each call
+    as atomic. When a retention policy is given, terminal tasks are evicted as
+    described in `TaskRetention`; sizes are accounted incrementally from the
+    history entries and artifacts added since the previous save.
+
+    Listing is served from sorted indexes by update time, session and state
+    that are maintained on every save, so a page costs O(log n + limit).
+
+    Large file contents of task messages may be kept in `spilled_files`
+    rather than in memory; they are deleted when their task is deleted or
+    evicted.
+    """
+
+    def __init__(self, retention_policy: Optional[RetentionPolicy] = None) -> None:
+        self.tasks: Dict[str, Task] = {}
+        self.spilled_files = SpilledFiles()
+        self.push_notification_infos: Dict[str, PushNotificationConfig] = {}
+        self.retention = (
+            TaskRetention(retention_policy) if retention_policy is not None else None
+        )
+        self._accounted: Dict[str, Tuple[int, int]] = {}
+        self._index_entries: Dict[str, Tuple[ListKey, Optional[str], TaskState]] = {}
+        self._by_updated = _SortedKeys()
+        self._by_session: Dict[str, _SortedKeys] = {}
+        self._by_state: Dict[TaskState, _SortedKeys] = {}
+
+    async def get_task(self, task_id: str) -> Optional[Task]:
+        self.evict_tasks()
+        return self.tasks.get(task_id)
+
+    async def save_task(self, task: Task) -> None:
+        self.tasks[task.id] = task
+        self._unindex(task.id)
+        self._index(task)
+        if self.retention is not None:
+            self._account(task)
+            self.retention.on_state(task.id, task.status.state)
+        self.evict_tasks()
+
+    async def delete_task(self, task_id: str) -> None:
+        self._drop(task_id)
+        if self.retention is not None:
+            self.retention.forget(task_id)
+
+    async def get_push_notification_info(
+        self, task_id: str
+    ) -> Optional[PushNotificationConfig]:
+        return self.push_notification_infos.get(task_id)
+
+    async def set_push_notification_info(
+        self, task_id: str, notification_config: PushNotificationConfig
+    ) -> None:
+        self.push_notification_infos[task_id] = notification_config
+
+    async def list_tasks(
+        self,
+        session_id: Optional[str] = None,
+        state: Optional[TaskState] = None,
+        before: Optional[ListKey] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Task], Optional[ListKey]]:
+        self.evict_tasks()
+        candidates = [self._by_updated]
+        if session_id is not None:
+            candidates.append(self._by_session.get(session_id, _SortedKeys()))
+        if state is not None:
+            candidates.append(self._by_state.get(state, _SortedKeys()))
+        # Walk the most selective index and filter on the other conditions.
+        index = min(candidates, key=len)
+
+        page: List[Task] = []
+        for key in index.descending(before):
+            _, task_session_id, task_state = self._index_entries[key[1]]
+            if session_id is not None and task_session_id != session_id:
+                continue
+            if state is not None and task_state != state:
+                continue
+            if len(page) == limit:
+                return page, self._index_entries[page[-1].id][0]
+            page.append(self.tasks[key[1]])
+        return page, None
+
+    async def count_tasks(self) -> Optional[int]:
+        return len(self.tasks)
+
+    def evict_tasks(self) -> None:
+        """Drop the tasks selected by the retention policy, if any."""
+        if self.retention is None:
+            return
+
+        for task_id in self.retention.collect(len(self.tasks)):
+            logger.info(f"Evicting task {task_id}")
+            self._drop(task_id)
+
+    @property
+    def eviction_stats(self) -> EvictionStats:
+        if self.retention is None:
+            return EvictionStats()
+        return self.retention.stats
+
+    async def close(self) -> None:
+        self.spilled_files.close()
+
+    def _drop(self, task_id: str) -> None:
+        self.tasks.pop(task_id, None)
+        self.spilled_files.release(task_id)
+        self.push_notification_infos.pop(task_id, None)
+        self._accounted.pop(task_id, None)
+        self._unindex(task_id)
+
+    def _index(self, task: Task) -> None:
+        key = (time.time(), task.id)
+        state = task.status.state
+        self._index_entries[task.id] = (key, task.sessionId, state)
+        self._by_updated.add(key)
+        if task.sessionId is not None:
+            self._by_session.setdefault(task.sessionId, _SortedKeys()).add(key)
+        self._by_state.setdefault(state, _SortedKeys()).add(key)
+
+    def _unindex(self, task_id: str) -> None:
+        entry = self._index_entries.pop(task_id, None)
+        if entry is None:
+            return
+        key, session_id, state = entry
+        self._by_updated.remove(key)
+        if session_id is not None:
+            self._remove_key(self._by_session, session_id, key)
+        self._remove_key(self._by_state, state, key)
+
+    @staticmethod
+    def _remove_key(indexes: dict, value, key: ListKey) -> None:
+        keys = indexes[value]
+        keys.remove(key)
+        if not keys:
+            del indexes[value]
+
+    def _account(self, task: Task) -> None:
+        assert self.retention is not None
+        history = task.history or []
+        artifacts = task.artifacts or []
+        if task.id not in self._accounted:
+            added = estimate_size(task)
+        else:
+            seen_history, seen_artifacts = self._accounted[task.id]
+            added = sum(estimate_size(m) for m in history[seen_history:])
+            added += sum(estimate_size(a) for a in artifacts[seen_artifacts:])
+        self._accounted[task.id] = (len(history), len(artifacts))
+        self.retention.add_bytes(task.id, added)
+
+
+_TaskRow = Tuple[str, Optional[str], str, float, str]
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS tasks (
+        id TEXT PRIMARY KEY,
+        session_id TEXT,
+        state TEXT NOT NULL,
+        updated_at REAL NOT NULL,
+        body TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS push_notifications (
+        task_id TEXT PRIMARY KEY,
+        body TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS tasks_by_updated ON tasks (updated_at, id)",
+    "CREATE INDEX IF NOT EXISTS tasks_by_session ON tasks (session_id, updated_at, id)",
+    "CREATE INDEX IF NOT EXISTS tasks_by_state ON tasks (state, updated_at, id)",
+)
+
+
+class _Batch:
+    """Writes accumulated between two commits."""
+
+    def __init__(self) -> None:
+        self.tasks: Dict[str, Optional[_TaskRow]] = {}
+        self.push_notifications: Dict[str, Optional[str]] = {}
+        self.done: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        # The task committing the batch; the event loop only keeps a weak
+        # reference to it.
+        self.commit: Optional[asyncio.Task[None]] = None
+
+    def __len__(self) -> int:
+        return len(self.tasks) + len(self.push_notifications)
+
+
+class SQLiteTaskStore(TaskStore):
+    """Durable task store backed by a SQLite database in WAL mode.
+
+    Writes are group-committed: saves issued within `commit_interval` seconds
+    of each other (or until `max_batch_size` rows are pending) are written in
+    a single transaction on a dedicated writer thread, and repeated saves of
+    the same task within a batch collapse into one row write. Each save still
+    returns only once its batch is committed. Reads run on a separate
+    connection, which WAL allows to proceed while a commit is in progress, and
+    see writes that are pending or being committed. Listing is served by
+    indexes on update time, session and state, and reflects committed writes
+    only.
+
+    The database may be shared by several processes on the same host.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        commit_interval: float = 0.002,
+        max_batch_size: int = 512,
+    ) -> None:
+        self.path = path
+        self.commit_interval = commit_interval
+        self.max_batch_size = max_batch_size
+        self.commit_count = 0
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="task-store-writer")
+        self._reader = ThreadPoolExecutor(1, thread_name_prefix="task-store-reader")
+        self._write_conn = self._connect()
+        for statement in _SCHEMA:
+            self._write_conn.execute(statement)
+        self._write_conn.commit()
+        self._read_conn = self._connect()
+        self._pending: Optional[_Batch] = None
+        self._inflight: List[_Batch] = []
+        self._batch_full = asyncio.Event()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    async def get_task(self, task_id: str) -> Optional[Task]:
+        for batch in self._unflushed():
+            if task_id in batch.tasks:
+                row = batch.tasks[task_id]
+                return None if row is None else Task.model_validate_json(row[4])
+
+        body = await self._read_one("SELECT body FROM tasks WHERE id = ?", task_id)
+        return None if body is None else Task.model_validate_json(body)
+
+    async def save_task(self, task: Task) -> None:
+        row = (
+            task.id,
+            task.sessionId,
+            task.status.state.value,
+            time.time(),
+            task.model_dump_json(exclude_none=True),
+        )
+        batch = self._current_batch()
+        batch.tasks[task.id] = row
+        await self._wait_for_commit(batch)
+
+    async def delete_task(self, task_id: str) -> None:
+        batch = self._current_batch()
+        batch.tasks[task_id] = None
+        batch.push_notifications[task_id] = None
+        await self._wait_for_commit(batch)
+
+    async def get_push_notification_info(
+        self, task_id: str
+    ) -> Optional[PushNotificationConfig]:
+        for batch in self._unflushed():
+            if task_id in batch.push_notifications:
+                body = batch.push_notifications[task_id]
+                break
+        else:
+            body = await self._read_one(
+                "SELECT body FROM push_notifications WHERE task_id = ?", task_id
+            )
+        return (
+            None if body is None else PushNotificationConfig.model_validate_json(body)
+        )
+
+    async def set_push_notification_info(
+        self, task_id: str, notification_config: PushNotificationConfig
+    ) -> None:
+        batch = self._current_batch()
+        batch.push_notifications[task_id] = notification_config.model_dump_json(
+            exclude_none=True
+        )
+        await self._wait_for_commit(batch)
+
+    async def list_tasks(
+        self,
+        session_id: Optional[str] = None,
+        state: Optional[TaskState] = None,
+        before: Optional[ListKey] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Task], Optional[ListKey]]:
+        conditions, args = [], []
+        if session_id is not None:
+            conditions.append("session_id = ?")
+            args.append(session_id)
+        if state is not None:
+            conditions.append("state = ?")
+            args.append(state.value)
+        if before is not None:
+            conditions.append("(updated_at, id) < (?, ?)")
+            args.extend(before)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = (
+            f"SELECT updated_at, id, body FROM tasks {where} "
+            "ORDER BY updated_at DESC, id DESC LIMIT ?"
+        )
+        args.append(limit + 1)
+
+        def run() -> List[Tuple[float, str, str]]:
+            return self._read_conn.execute(query, args).fetchall()
+
+        rows = await asyncio.get_running_loop().run_in_executor(self._reader, run)
+        tasks = [Task.model_validate_json(body) for _, _, body in rows[:limit]]
+        if len(rows) <= limit:
+            return tasks, None
+        updated_at, task_id, _ = rows[limit - 1]
+        return tasks, (updated_at, task_id)
+
+    async def count_tasks(self) -> Optional[int]:
+        def run() -> int:
+            return int(
+                self._read_conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+            )
+
+        return await asyncio.get_running_loop().run_in_executor(self._reader, run)
+
+    async def close(self) -> None:
+        if self._pending is not None:
+            self._batch_full.set()
+        await asyncio.gather(
+            *(batch.done for batch in self._unflushed()), return_exceptions=True
+        )
+        self._writer.shutdown(wait=True)
+        self._reader.shutdown(wait=True)
+        self._write_conn.close()
+        self._read_conn.close()
+
+    def _unflushed(self) -> List[_Batch]:
+        """Batches not yet visible to readers, newest first."""
+        batches = list(reversed(self._inflight))
+        if self._pending is not None:
+            batches.insert(0, self._pending)
+        return batches
+
+    async def _read_one(self, query: str, key: str) -> Optional[str]:
+        def run() -> Optional[str]:
+            row = self._read_conn.execute(query, (key,)).fetchone()
+            return None if row is None else str(row[0])
+
+        return await asyncio.get_running_loop().run_in_executor(self._reader, run)
+
+    def _current_batch(self) -> _Batch:
+        if self._pending is None:
+            self._pending = _Batch()
+            self._batch_full.clear()
+            self._pending.commit = asyncio.create_task(self._commit_pending())
+        return self._pending
+
+    async def _wait_for_commit(self, batch: _Batch) -> None:
+        if len(batch) >= self.max_batch_size:
+            self._batch_full.set()
+        await asyncio.shield(batch.done)
+
+    async def _commit_pending(self) -> None:
+        try:
+            await asyncio.wait_for(self._batch_full.wait(), self.commit_interval)
+        except asyncio.TimeoutError:
+            pass
+
+        batch = self._pending
+        assert batch is not None
+        self._pending = None
+        self._inflight.append(batch)
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                self._writer, self._write_batch, batch
+            )
+        except Exception as e:
+            logger.error(f"Failed to commit task store batch: {e}")
+            batch.done.set_exception(e)
+        else:
+            self.commit_count += 1
+            batch.done.set_result(None)
+        finally:
+            self._inflight.remove(batch)
+
+    def _write_batch(self, batch: _Batch) -> None:
+        upserts = [row for row in batch.tasks.values() if row is not None]
+        deletes = [(key,) for key, row in batch.tasks.items() if row is None]
+        push_upserts = [
+            (key, body) for key, body in batch.push_notifications.items() if body
+        ]
+        push_deletes = [
+            (key,) for key, body in batch.push_notifications.items() if body is None
+        ]
+        with self._write_conn:
+            self._write_conn.executemany(
+                "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?)", upserts
+            )
+            self._write_conn.executemany("DELETE FROM tasks WHERE id = ?", deletes)
+            self._write_conn.executemany(
+                "INSERT OR REPLACE INTO push_notifications VALUES (?, ?)",
+                push_upserts,
+            )
+            self._write_conn.executemany(
+                "DELETE FROM push_notifications WHERE task_id = ?", push_deletes
+            )
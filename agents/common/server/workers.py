@@ -0,0 +1,227 @@
+import base64
+import json
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import zlib
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Tuple
+
+import httpx
+from starlette.background import BackgroundTask
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+
+if TYPE_CHECKING:
+    from common.server.server import A2AServer
+
+logger = logging.getLogger(__name__)
+
+# Set on requests forwarded between workers so they are not forwarded again.
+FORWARDED_HEADER = "x-a2a-forwarded-by"
+
+_HOP_BY_HOP = {
+    "connection",
+    "content-length",
+    "host",
+    "keep-alive",
+    "transfer-encoding",
+}
+
+_BODY_HEADERS = {"content-encoding", "content-type"}
+
+
+def owner_of(task_id: str, count: int) -> int:
+    """Index of the worker owning a task."""
+    return zlib.crc32(task_id.encode()) % count
+
+
+def encode_list_cursor(worker: int, cursor: Optional[str]) -> str:
+    """Encode a `tasks/list` position spanning the workers of a pool."""
+    return base64.urlsafe_b64encode(json.dumps([worker, cursor]).encode()).decode()
+
+
+def decode_list_cursor(cursor: str) -> Tuple[int, Optional[str]]:
+    try:
+        worker, worker_cursor = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(worker), None if worker_cursor is None else str(worker_cursor)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class WorkerPool:
+    """The view one worker process has of the pool it belongs to.
+
+    Every task is owned by exactly one worker, chosen by hashing its id, and
+    all calls for the task are served by that worker, so per-worker in-memory
+    state (tasks, journals, subscribers, running work) never diverges. Calls
+    reaching another worker are forwarded to the owner over its Unix socket
+    and the response, streamed or not, is relayed back unchanged.
+
+    Args:
+        index: Index of this worker.
+        count: Number of workers in the pool.
+        socket_dir: Directory holding the `worker-<index>.sock` sockets.
+        transport_factory: Builds the httpx transport used to reach a worker;
+            defaults to its Unix socket.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        count: int,
+        socket_dir: str,
+        transport_factory: Optional[Callable[[int], httpx.AsyncBaseTransport]] = None,
+    ) -> None:
+        self.index = index
+        self.count = count
+        self.socket_dir = socket_dir
+        self._transport_factory = transport_factory or (
+            lambda index: httpx.AsyncHTTPTransport(uds=self.socket_path(index))
+        )
+        self._clients: Dict[int, httpx.AsyncClient] = {}
+
+    def socket_path(self, index: int) -> str:
+        return os.path.join(self.socket_dir, f"worker-{index}.sock")
+
+    def owner_of(self, task_id: str) -> int:
+        return owner_of(task_id, self.count)
+
+    def _client(self, index: int) -> httpx.AsyncClient:
+        client = self._clients.get(index)
+        if client is None:
+            client = httpx.AsyncClient(
+                transport=self._transport_factory(index),
+                base_url="http://a2a-worker",
+                timeout=None,
+            )
+            self._clients[index] = client
+        return client
+
+    def _headers(self, request: Optional[Request]) -> Dict[str, str]:
+        headers = {"content-type": "application/json"}
+        if request is not None:
+            headers.update(
+                (name, value)
+                for name, value in request.headers.items()
+                # Forwarded bodies are re-encoded as plain JSON.
+                if name not in _HOP_BY_HOP and name not in _BODY_HEADERS
+            )
+        headers[FORWARDED_HEADER] = str(self.index)
+        return headers
+
+    async def forward(
+        self, index: int, request: Request, body: bytes
+    ) -> StreamingResponse:
+        """Relay a whole HTTP request to another worker."""
+        client = self._client(index)
+        upstream = await client.send(
+            client.build_request(
+                "POST", request.url.path, content=body, headers=self._headers(request)
+            ),
+            stream=True,
+        )
+        headers = {
+            name: value
+            for name, value in upstream.headers.items()
+            if name not in _HOP_BY_HOP
+        }
+        return StreamingResponse(
+            upstream.aiter_raw(),
+            status_code=upstream.status_code,
+            headers=headers,
+            background=BackgroundTask(upstream.aclose),
+        )
+
+    async def call(
+        self, index: int, call: Any, request: Optional[Request] = None
+    ) -> Dict[str, Any]:
+        """Run a single non-streaming JSON-RPC call on another worker."""
+        path = request.url.path if request is not None else "/"
+        headers = self._headers(request)
+        headers["accept"] = "application/json"
+        response = await self._client(index).post(path, json=call, headers=headers)
+        return dict(response.json())
+
+    async def close(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+def _bind_reuse_port(host: str, port: int) -> socket.socket:
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise RuntimeError("Multiple workers require SO_REUSEPORT support")
+    return socket.create_server((host, port), reuse_port=True)
+
+
+def _bind_unix(path: str) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    sock.listen()
+    return sock
+
+
+def _run_worker(server: "A2AServer", pool: WorkerPool) -> None:
+    from common.server.drain import serve
+
+    server.worker_pool = pool
+    server.build_task_manager()
+    sockets = [
+        _bind_reuse_port(server.host, server.port),
+        _bind_unix(pool.socket_path(pool.index)),
+    ]
+    serve(server, sockets=sockets)
+
+
+def serve_workers(server: "A2AServer", workers: int) -> None:
+    """Serve with a pre-forked pool of worker processes.
+
+    Every worker binds the public port with SO_REUSEPORT, so the kernel
+    spreads connections over them, and a Unix socket the other workers
+    forward calls to. A server given a `task_manager_factory` builds its task
+    manager in each worker after the fork; otherwise every worker starts from
+    a copy of the one built before. Each worker then owns its share of the
+    tasks. If a worker exits, the whole pool is stopped. Signals are passed
+    on to the workers, which drain before exiting; a second signal makes them
+    stop right away.
+    """
+    socket_dir = tempfile.mkdtemp(prefix="a2a-workers-")
+    context = multiprocessing.get_context("fork")
+    processes: List[multiprocessing.process.BaseProcess] = []
+    signalled: Set[int] = set()
+
+    def terminate(process: multiprocessing.process.BaseProcess) -> None:
+        if process.is_alive() and process.pid is not None:
+            os.kill(process.pid, signal.SIGTERM)
+            signalled.add(process.pid)
+
+    def stop(signum: int, frame: Any) -> None:
+        for process in processes:
+            terminate(process)
+
+    try:
+        for index in range(workers):
+            pool = WorkerPool(index, workers, socket_dir)
+            process = context.Process(
+                target=_run_worker, args=(server, pool), name=f"a2a-worker-{index}"
+            )
+            process.start()
+            processes.append(process)
+        logger.info(f"Started {workers} workers on {server.host}:{server.port}")
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        multiprocessing.connection.wait([p.sentinel for p in processes])
+        # Signalling a worker twice would cut its drain short.
+        for process in processes:
+            if process.pid not in signalled:
+                terminate(process)
+        for process in processes:
+            process.join()
+    finally:
+        shutil.rmtree(socket_dir, ignore_errors=True)
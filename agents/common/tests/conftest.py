@@ -0,0 +1,138 @@
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import time
+from typing import AsyncIterable, Union
+
+import pytest
+from common.server import InMemoryTaskManager
+from common.server.event_journal import StreamEvent
+from common.types import (
+    AgentCapabilities,
+    AgentCard,
+    JSONRPCResponse,
+    SendTaskRequest,
+    SendTaskResponse,
+    SendTaskStreamingRequest,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+)
+
+
+@pytest.fixture
+def agent_card():
+    return AgentCard(
+        name="Echo Agent",
+        url="http://localhost:5000/",
+        version="1.0.0",
+        capabilities=AgentCapabilities(streaming=True),
+        skills=[],
+    )
+
+
+@pytest.fixture(scope="session")
+def redis_server():
+    """URL of a Redis server for the tests, emptied before each test using it.
+
+    `A2A_TEST_REDIS_URL` names a server to use; otherwise a `redis-server`
+    found on the PATH is started on a free port for the session.
+    """
+    url = os.environ.get("A2A_TEST_REDIS_URL")
+    if url is not None:
+        yield url
+        return
+    binary = shutil.which("redis-server")
+    if binary is None:
+        pytest.skip("needs redis-server on the PATH or A2A_TEST_REDIS_URL")
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [binary, "--port", str(port), "--save", "", "--appendonly", "no"],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port), 0.1).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+        yield f"redis://127.0.0.1:{port}/0"
+    finally:
+        process.terminate()
+        process.wait()
+
+
+@pytest.fixture
+def redis_url(redis_server):
+    redis = pytest.importorskip("redis")
+    client = redis.Redis.from_url(redis_server)
+    client.flushdb()
+    client.close()
+    return redis_server
+
+
+class EchoTaskManager(InMemoryTaskManager):
+    """Completes every task immediately, streaming one working update first."""
+
+    async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
+        await self.upsert_task(request.params)
+        task = await self.update_store(
+            request.params.id, TaskStatus(state=TaskState.COMPLETED), []
+        )
+        return SendTaskResponse(id=request.id, result=task)
+
+    async def on_send_task_subscribe(
+        self, request: SendTaskStreamingRequest
+    ) -> Union[AsyncIterable[StreamEvent], JSONRPCResponse]:
+        task_id = request.params.id
+        await self.upsert_task(request.params)
+        queue = await self.setup_sse_consumer(task_id)
+        asyncio.get_running_loop().create_task(self._stream(task_id))
+        return self.dequeue_events_for_sse(request.id, task_id, queue)
+
+    async def _stream(self, task_id: str) -> None:
+        for state, final in ((TaskState.WORKING, False), (TaskState.COMPLETED, True)):
+            status = TaskStatus(state=state)
+            await self.update_store(task_id, status, [])
+            await self.enqueue_events_for_sse(
+                task_id, TaskStatusUpdateEvent(id=task_id, status=status, final=final)
+            )
+
+
+def rpc(method: str, params: dict, request_id: Union[int, str] = 1) -> dict:
+    return {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+
+
+def send_params(task_id: str, text: str = "hi") -> dict:
+    return {
+        "id": task_id,
+        "sessionId": "s1",
+        "message": {"role": "user", "parts": [{"type": "text", "text": text}]},
+    }
+
+
+def status_event(task_id: str, final: bool = False) -> TaskStatusUpdateEvent:
+    state = TaskState.COMPLETED if final else TaskState.WORKING
+    return TaskStatusUpdateEvent(
+        id=task_id, status=TaskStatus(state=state), final=final
+    )
+
+
+def read_sse(response) -> list:
+    events, current = [], {}
+    for line in response.iter_lines():
+        if not line:
+            if current:
+                events.append(current)
+            current = {}
+            continue
+        field, _, value = line.partition(": ")
+        current[field] = value
+    if current:
+        events.append(current)
+    return events
@@ -0,0 +1,197 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from common.client import A2AClient
+from common.client import client as client_module
+from common.server import A2AServer, AdmissionController, MethodLimit
+from common.server.admission import MethodLimiter, ServerBusy
+from common.types import ServerBusyError
+from conftest import EchoTaskManager, rpc, send_params
+from starlette.testclient import TestClient
+
+
+# --- MethodLimiter tests ---
+def test_full_queue_rejects_immediately():
+    async def scenario() -> None:
+        limiter = MethodLimiter("tasks/send", MethodLimit(1, max_queue=0))
+        await limiter.acquire()
+        with pytest.raises(ServerBusy):
+            await limiter.acquire()
+        assert limiter.stats().rejected_queue_full == 1
+
+    asyncio.run(scenario())
+
+
+def test_queued_call_times_out():
+    async def scenario() -> None:
+        limit = MethodLimit(1, max_queue=1, queue_timeout=0.01, retry_after=2)
+        limiter = MethodLimiter("tasks/send", limit)
+        await limiter.acquire()
+        with pytest.raises(ServerBusy) as busy:
+            await limiter.acquire()
+        assert busy.value.retry_after == 2
+        stats = limiter.stats()
+        assert (stats.active, stats.queued, stats.rejected_timeout) == (1, 0, 1)
+
+    asyncio.run(scenario())
+
+
+def test_released_slot_goes_to_oldest_waiter():
+    async def scenario() -> None:
+        limiter = MethodLimiter("tasks/send", MethodLimit(1, max_queue=2))
+        await limiter.acquire()
+        order = []
+
+        async def call(name: str) -> None:
+            await limiter.acquire()
+            order.append(name)
+            limiter.release()
+
+        waiters = [asyncio.create_task(call(name)) for name in ("first", "second")]
+        await asyncio.sleep(0)
+        assert limiter.stats().queued == 2
+        limiter.release()
+        await asyncio.gather(*waiters)
+
+        assert order == ["first", "second"]
+        assert limiter.stats().active == 0
+
+    asyncio.run(scenario())
+
+
+# --- A2AServer tests ---
+def test_busy_server_answers_503_with_retry_after(agent_card):
+    admission = AdmissionController({"tasks/send": MethodLimit(1, retry_after=1.5)})
+    server = A2AServer(
+        agent_card=agent_card, task_manager=EchoTaskManager(), admission=admission
+    )
+    limiter = admission.limiter("tasks/send")
+    assert limiter is not None
+
+    with TestClient(server.app) as client:
+        limiter.active = 1  # the only slot is taken
+        response = client.post("/", json=rpc("tasks/send", send_params("t1"), 5))
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "2"
+        body = response.json()
+        assert body["id"] == 5
+        assert body["error"]["code"] == -32099
+        assert body["error"]["data"]["retryAfter"] == 1.5
+
+        limiter.active = 0
+        response = client.post("/", json=rpc("tasks/send", send_params("t1")))
+        assert response.status_code == 200
+
+    stats = admission.stats()[0]
+    assert (stats.admitted, stats.rejected, stats.active) == (1, 1, 0)
+
+
+def test_stream_holds_its_slot_until_it_ends(agent_card):
+    admission = AdmissionController({"tasks/sendSubscribe": MethodLimit(1)})
+    server = A2AServer(
+        agent_card=agent_card, task_manager=EchoTaskManager(), admission=admission
+    )
+
+    with TestClient(server.app) as client:
+        with client.stream(
+            "POST", "/", json=rpc("tasks/sendSubscribe", send_params("t1"))
+        ) as response:
+            response.read()
+            assert response.status_code == 200
+
+    stats = admission.stats()[0]
+    assert (stats.admitted, stats.active) == (1, 0)
+
+
+def test_calls_queued_when_the_drain_starts_are_refused(agent_card):
+    admission = AdmissionController(
+        {"tasks/send": MethodLimit(1, max_queue=1, queue_timeout=5)}
+    )
+    server = A2AServer(
+        agent_card=agent_card, task_manager=EchoTaskManager(), admission=admission
+    )
+    limiter = admission.limiter("tasks/send")
+    assert limiter is not None
+
+    async def scenario():
+        await limiter.acquire()  # the only slot is taken
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            queued = asyncio.ensure_future(
+                client.post("/", json=rpc("tasks/send", send_params("t1")))
+            )
+            while not limiter.stats().queued:
+                await asyncio.sleep(0.001)
+            await server.drain(timeout=0)
+            limiter.release()
+            return await queued
+
+    response = asyncio.run(scenario())
+
+    assert response.status_code == 503
+    assert response.json()["error"]["code"] == -32099
+    assert limiter.stats().active == 0
+    assert asyncio.run(server.task_manager.task_store.get_task("t1")) is None
+
+
+def test_stream_never_sent_gives_back_its_slot(agent_card):
+    admission = AdmissionController({"tasks/sendSubscribe": MethodLimit(1)})
+    server = A2AServer(
+        agent_card=agent_card, task_manager=EchoTaskManager(), admission=admission
+    )
+    limiter = admission.limiter("tasks/sendSubscribe")
+    assert limiter is not None
+    body = json.dumps(rpc("tasks/sendSubscribe", send_params("t1"))).encode()
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/",
+        "headers": [(b"content-type", b"application/json")],
+        "query_string": b"",
+    }
+
+    async def scenario() -> None:
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+        async def receive() -> dict:
+            return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+        async def send(message: dict) -> None:
+            # The client went away before the response started.
+            raise OSError("connection lost")
+
+        with pytest.raises(OSError):
+            await server.app(scope, receive, send)
+
+    asyncio.run(scenario())
+
+    assert limiter.stats().active == 0
+
+
+def test_client_returns_the_busy_error_with_retry_after(agent_card, monkeypatch):
+    admission = AdmissionController({"tasks/send": MethodLimit(1, retry_after=1.5)})
+    server = A2AServer(
+        agent_card=agent_card, task_manager=EchoTaskManager(), admission=admission
+    )
+    limiter = admission.limiter("tasks/send")
+    assert limiter is not None
+    limiter.active = 1  # the only slot is taken
+
+    transport = httpx.ASGITransport(app=server.app)
+    async_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        client_module.httpx,
+        "AsyncClient",
+        lambda **kwargs: async_client(transport=transport, **kwargs),
+    )
+    client = A2AClient(url="http://test/")
+
+    response = asyncio.run(client.send_task(send_params("t1")))
+
+    assert response.result is None and response.error is not None
+    assert response.error.code == ServerBusyError().code
+    assert response.error.data == {"retryAfter": 1.5}
@@ -0,0 +1,159 @@
+import asyncio
+
+from common.server.redis_backend import RedisEventBus, RedisTaskStore
+from common.types import (
+    CancelTaskRequest,
+    GetTaskRequest,
+    TaskSendParams,
+    TaskState,
+    TaskStatus,
+)
+from conftest import EchoTaskManager, send_params, status_event
+
+
+def make_replicas(url: str, count: int) -> list:
+    return [
+        EchoTaskManager(
+            task_store=RedisTaskStore.from_url(url),
+            event_bus=RedisEventBus.from_url(url),
+        )
+        for _ in range(count)
+    ]
+
+
+async def until(condition) -> None:
+    for _ in range(500):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+# --- Multi-replica tests ---
+def test_any_replica_serves_reads_and_streams(redis_url):
+    async def scenario() -> None:
+        first, second = make_replicas(redis_url, 2)
+        await first.start()
+        await second.start()
+        await first.upsert_task(TaskSendParams(**send_params("t1")))
+
+        response = await second.on_get_task(GetTaskRequest(params={"id": "t1"}))
+        assert response.result is not None and response.result.id == "t1"
+
+        local = await first.setup_sse_consumer("t1")
+        await first.enqueue_events_for_sse("t1", status_event("t1"))
+        await until(lambda: second.event_journals.get("t1") is not None)
+
+        remote = await second.setup_sse_consumer("t1", is_resubscribe=True)
+        await first.enqueue_events_for_sse("t1", status_event("t1", final=True))
+
+        assert [(await local.get()).seq for _ in range(2)] == [1, 2]
+        assert [(await remote.get()).seq for _ in range(2)] == [1, 2]
+
+        await first.close()
+        await second.close()
+
+    asyncio.run(scenario())
+
+
+def test_cancel_on_another_replica_stops_the_work(redis_url):
+    async def scenario() -> None:
+        first, second = make_replicas(redis_url, 2)
+        await first.start()
+        await second.start()
+        await first.upsert_task(TaskSendParams(**send_params("t1")))
+        running = first.task_registry.spawn("t1", asyncio.sleep(3600))
+
+        response = await second.on_cancel_task(CancelTaskRequest(params={"id": "t1"}))
+        assert response.result is not None
+        assert response.result.status.state == TaskState.CANCELED
+
+        await until(running.done)
+        assert running.cancelled()
+
+        await first.close()
+        await second.close()
+
+    asyncio.run(scenario())
+
+
+def test_terminal_state_is_not_overwritten_by_another_replica(redis_url):
+    async def scenario() -> None:
+        first, second = make_replicas(redis_url, 2)
+        await first.upsert_task(TaskSendParams(**send_params("t1")))
+
+        # The first replica read the task before the second one canceled it.
+        stale = await first.task_store.get_task("t1")
+        assert stale is not None
+        canceled = await second.update_store_if_active(
+            "t1", TaskStatus(state=TaskState.CANCELED), []
+        )
+        assert canceled is not None
+        stale.status = TaskStatus(state=TaskState.COMPLETED)
+        assert not await first.task_store.save_task_if_active(stale)
+
+        task = await second.task_store.get_task("t1")
+        assert task is not None and task.status.state == TaskState.CANCELED
+        page, _ = await first.task_store.list_tasks(state=TaskState.COMPLETED)
+        assert page == []
+
+        await first.close()
+        await second.close()
+
+    asyncio.run(scenario())
+
+
+def test_completion_and_cancel_on_two_replicas_record_one_outcome(redis_url):
+    async def scenario() -> None:
+        first, second = make_replicas(redis_url, 2)
+        for i in range(20):
+            await first.upsert_task(TaskSendParams(**send_params(f"t{i}")))
+
+        async def complete(task_id: str):
+            status = TaskStatus(state=TaskState.COMPLETED)
+            return await first.update_store_if_active(task_id, status, [])
+
+        async def cancel(task_id: str):
+            request = CancelTaskRequest(params={"id": task_id})
+            return await second.on_cancel_task(request)
+
+        for i in range(20):
+            completed, canceled = await asyncio.gather(
+                complete(f"t{i}"), cancel(f"t{i}")
+            )
+            # Exactly one of the two transitions is recorded.
+            assert (completed is None) != (canceled.result is None)
+            task = await first.task_store.get_task(f"t{i}")
+            assert task is not None
+            expected = TaskState.COMPLETED if completed else TaskState.CANCELED
+            assert task.status.state == expected
+
+        await first.close()
+        await second.close()
+
+    asyncio.run(scenario())
+
+
+def test_events_of_concurrent_publishers_arrive_in_sequence(redis_url):
+    async def scenario() -> None:
+        first, second, listener = [RedisEventBus.from_url(redis_url) for _ in range(3)]
+        seqs = []
+
+        async def handle(task_id, entry) -> None:
+            seqs.append(entry.seq)
+
+        await listener.start(handle)
+        await asyncio.gather(
+            *(
+                bus.publish("t1", status_event("t1"))
+                for _ in range(25)
+                for bus in (first, second)
+            )
+        )
+        await until(lambda: len(seqs) == 50)
+        assert seqs == list(range(1, 51))
+
+        for bus in (first, second, listener):
+            await bus.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,112 @@
+import asyncio
+from typing import List
+
+from common.server.event_journal import EventJournal, JournalRegistry, StreamEvent
+from common.types import InternalError, TaskResubscriptionRequest, TaskSendParams
+from conftest import EchoTaskManager, send_params, status_event
+
+
+async def collect(stream) -> List[StreamEvent]:
+    return [item async for item in stream]
+
+
+# --- EventJournal tests ---
+def test_journal_assigns_increasing_sequence_numbers():
+    journal = EventJournal(max_events=2)
+    seqs = [journal.append(status_event("t1")).seq for _ in range(3)]
+
+    assert seqs == [1, 2, 3]
+    assert journal.first_seq == 2
+    assert [e.seq for e in journal.since(1)] == [2, 3]
+    assert journal.covers(1)
+    assert not journal.covers(0)
+
+
+def test_journal_closed_after_final_or_error():
+    journal = EventJournal()
+    journal.append(status_event("t1"))
+    assert not journal.closed
+    journal.append(InternalError())
+    assert journal.closed
+
+
+def test_registry_drops_least_recently_written_journal():
+    registry = JournalRegistry(max_journals=2)
+    registry.append("a", status_event("a"))
+    registry.append("b", status_event("b"))
+    registry.append("a", status_event("a"))
+    registry.append("c", status_event("c"))
+
+    assert registry.get("b") is None
+    assert registry.get("a") is not None
+
+
+# --- Resubscription tests ---
+def test_resubscribe_replays_events_after_last_event_id():
+    async def scenario() -> None:
+        manager = EchoTaskManager()
+        await manager.upsert_task(TaskSendParams(**send_params("t1")))
+        await manager.setup_sse_consumer("t1")
+        for final in (False, False, True):
+            await manager.enqueue_events_for_sse("t1", status_event("t1", final))
+
+        stream = await manager.on_resubscribe_to_task(
+            TaskResubscriptionRequest(id="r1", params={"id": "t1", "lastEventId": 1})
+        )
+        events = await collect(stream)
+
+        assert [e.seq for e in events] == [2, 3]
+        assert events[-1].response.id == "r1"
+        assert events[-1].response.result.final
+
+    asyncio.run(scenario())
+
+
+def test_resubscribe_to_finished_stream_repeats_final_event():
+    async def scenario() -> None:
+        manager = EchoTaskManager()
+        await manager.upsert_task(TaskSendParams(**send_params("t1")))
+        await manager.enqueue_events_for_sse("t1", status_event("t1", final=True))
+
+        stream = await manager.on_resubscribe_to_task(
+            TaskResubscriptionRequest(params={"id": "t1", "lastEventId": 1})
+        )
+
+        assert [e.seq for e in await collect(stream)] == [1]
+
+    asyncio.run(scenario())
+
+
+def test_resubscribe_to_unknown_task():
+    async def scenario() -> None:
+        manager = EchoTaskManager()
+        response = await manager.on_resubscribe_to_task(
+            TaskResubscriptionRequest(params={"id": "missing"})
+        )
+        assert response.error is not None
+        assert response.error.code == -32001
+
+    asyncio.run(scenario())
+
+
+# --- Encoding tests ---
+def test_stream_event_matches_pydantic_serialization():
+    journal = EventJournal()
+    entry = journal.append(status_event("t1", final=True))
+
+    for request_id in (7, "req-é", None):
+        event = StreamEvent.for_request(entry, request_id)
+        assert event.to_json() == event.response.model_dump_json(
+            exclude_none=True
+        ).encode("utf-8")
+
+
+def test_error_events_are_encoded_once():
+    journal = EventJournal()
+    entry = journal.append(InternalError(message="boom"))
+
+    first = StreamEvent.for_request(entry, 1)
+    second = StreamEvent.for_request(entry, 2)
+    assert first.entry.payload is second.entry.payload
+    assert first.to_sse().startswith(b"id: 1\r\ndata: ")
+    assert b'"error":{"code":-32603' in second.to_json()
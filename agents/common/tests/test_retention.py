@@ -0,0 +1,75 @@
+import asyncio
+
+from common.server.retention import RetentionPolicy, TaskRetention, estimate_size
+from common.server.task_store import InMemoryTaskStore
+from common.types import TaskSendParams, TaskState, TaskStatus
+from conftest import EchoTaskManager, send_params
+
+
+# --- TaskRetention tests ---
+def test_terminal_tasks_expire_after_ttl():
+    retention = TaskRetention(RetentionPolicy(terminal_ttl=10))
+    retention.on_state("t1", TaskState.COMPLETED, now=0)
+    retention.on_state("t2", TaskState.WORKING, now=0)
+
+    assert retention.collect(task_count=2, now=5) == []
+    assert retention.collect(task_count=2, now=10) == ["t1"]
+    assert retention.stats.expired == 1
+
+
+def test_reopened_task_is_not_evicted():
+    retention = TaskRetention(RetentionPolicy(terminal_ttl=10))
+    retention.on_state("t1", TaskState.COMPLETED, now=0)
+    retention.on_state("t1", TaskState.WORKING, now=1)
+
+    assert retention.collect(task_count=1, now=100) == []
+
+
+def test_max_tasks_evicts_oldest_terminal_first():
+    retention = TaskRetention(RetentionPolicy(max_tasks=2))
+    retention.on_state("old", TaskState.FAILED, now=1)
+    retention.on_state("new", TaskState.COMPLETED, now=2)
+
+    assert retention.collect(task_count=3, now=3) == ["old"]
+    assert retention.stats.evicted_max_tasks == 1
+
+
+def test_max_bytes_evicts_until_under_budget():
+    retention = TaskRetention(RetentionPolicy(max_bytes=100))
+    for i, task_id in enumerate(["a", "b", "c"]):
+        retention.add_bytes(task_id, 60)
+        retention.on_state(task_id, TaskState.COMPLETED, now=i)
+
+    assert retention.collect(task_count=3, now=5) == ["a", "b"]
+    assert retention.total_bytes == 60
+    assert retention.stats.evicted_max_bytes == 2
+
+
+# --- InMemoryTaskStore integration ---
+def test_store_evicts_completed_tasks_over_capacity():
+    async def scenario() -> None:
+        store = InMemoryTaskStore(retention_policy=RetentionPolicy(max_tasks=1))
+        manager = EchoTaskManager(task_store=store)
+        await manager.upsert_task(TaskSendParams(**send_params("t1")))
+        await manager.update_store("t1", TaskStatus(state=TaskState.COMPLETED), [])
+        await manager.upsert_task(TaskSendParams(**send_params("t2")))
+
+        assert list(store.tasks) == ["t2"]
+        assert store.eviction_stats.evicted_max_tasks == 1
+
+    asyncio.run(scenario())
+
+
+def test_store_accounts_only_new_history_entries():
+    async def scenario() -> None:
+        store = InMemoryTaskStore(retention_policy=RetentionPolicy())
+        manager = EchoTaskManager(task_store=store)
+        task = await manager.upsert_task(TaskSendParams(**send_params("t1")))
+        initial = store.retention.size_of("t1")
+        await manager.upsert_task(TaskSendParams(**send_params("t1", "again")))
+
+        assert store.retention.size_of("t1") == initial + estimate_size(
+            task.history[-1]
+        )
+
+    asyncio.run(scenario())
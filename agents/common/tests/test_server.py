@@ -0,0 +1,398 @@
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import os
+
+import pytest
+from common.server import A2AServer, request_body
+from common.server.request_body import BodyLimits
+from common.server.spilled_files import REFERENCE_PREFIX
+from common.types import (
+    Artifact,
+    FilePart,
+    SendTaskRequest,
+    SendTaskResponse,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+from conftest import EchoTaskManager, read_sse, rpc, send_params
+from starlette.testclient import TestClient
+
+
+@pytest.fixture
+def server(agent_card):
+    return A2AServer(agent_card=agent_card, task_manager=EchoTaskManager())
+
+
+@pytest.fixture
+def client(server):
+    with TestClient(server.app) as client:
+        yield client
+
+
+# --- JSON-RPC tests ---
+def test_send_and_get_task(client):
+    response = client.post("/", json=rpc("tasks/send", send_params("t1")))
+    assert response.json()["result"]["status"]["state"] == "completed"
+
+    response = client.post("/", json=rpc("tasks/get", {"id": "t1"}, request_id=2))
+    body = response.json()
+    assert body["id"] == 2
+    assert body["result"]["id"] == "t1"
+
+
+def test_list_tasks_pages_with_cursor(client):
+    for task_id in ("t1", "t2", "t3"):
+        client.post("/", json=rpc("tasks/send", send_params(task_id)))
+
+    listed, cursor = [], None
+    while True:
+        params = {"sessionId": "s1", "limit": 2, "cursor": cursor}
+        body = client.post("/", json=rpc("tasks/list", params)).json()
+        listed.extend(task["id"] for task in body["result"]["tasks"])
+        cursor = body["result"].get("nextCursor")
+        if cursor is None:
+            break
+    assert sorted(listed) == ["t1", "t2", "t3"]
+
+    body = client.post("/", json=rpc("tasks/list", {"cursor": "bogus"})).json()
+    assert body["error"]["code"] == -32602
+
+
+def test_batch_runs_calls_and_answers_each(client):
+    client.post("/", json=rpc("tasks/send", send_params("t1")))
+    batch = [
+        rpc("tasks/get", {"id": "t1"}, request_id=1),
+        rpc("tasks/get", {"id": "missing"}, request_id=2),
+        rpc("tasks/sendSubscribe", send_params("t2"), request_id=3),
+        {"jsonrpc": "2.0", "id": 4, "method": "tasks/unknown"},
+    ]
+
+    body = client.post("/", json=batch).json()
+
+    assert [response["id"] for response in body] == [1, 2, 3, 4]
+    assert body[0]["result"]["id"] == "t1"
+    assert body[1]["error"]["code"] == -32001
+    assert body[2]["error"]["code"] == -32600
+    assert body[3]["error"]["code"] == -32601
+
+
+def test_empty_batch_is_rejected(client):
+    response = client.post("/", json=[])
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == -32600
+
+
+def test_unknown_method_is_reported_with_request_id(client):
+    response = client.post("/", json=rpc("tasks/unknown", {}, request_id=7))
+    body = response.json()
+    assert body["id"] == 7
+    assert body["error"]["code"] == -32601
+
+
+def test_invalid_json_is_a_parse_error(client):
+    response = client.post("/", content=b"{not json")
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == -32700
+
+
+# --- Streaming tests ---
+def test_stream_events_carry_ids_and_resume(client):
+    with client.stream(
+        "POST", "/", json=rpc("tasks/sendSubscribe", send_params("t1"), "s")
+    ) as response:
+        events = read_sse(response)
+
+    assert [event["id"] for event in events] == ["1", "2"]
+    first = json.loads(events[0]["data"])
+    assert first["id"] == "s"
+    assert first["result"]["status"]["state"] == "working"
+
+    with client.stream(
+        "POST",
+        "/",
+        json=rpc("tasks/resubscribe", {"id": "t1"}, "r"),
+        headers={"Last-Event-ID": "1"},
+    ) as response:
+        resumed = read_sse(response)
+
+    assert [event["id"] for event in resumed] == ["2"]
+    assert json.loads(resumed[0]["data"])["result"]["final"] is True
+
+
+def test_metrics_count_calls_and_streams(client):
+    client.post("/", json=rpc("tasks/send", send_params("t-metrics")))
+    client.post("/", json=rpc("tasks/get", {"id": "missing"}))
+    with client.stream(
+        "POST", "/", json=rpc("tasks/sendSubscribe", send_params("t-stream"))
+    ) as response:
+        read_sse(response)
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'a2a_requests_total{method="tasks/send",outcome="ok"} 1' in text
+    assert 'a2a_requests_total{method="tasks/get",outcome="error"} 1' in text
+    assert 'phase_seconds_count{method="tasks/send",phase="handle"} 1' in text
+    assert 'a2a_stream_events_count{method="tasks/sendSubscribe"} 1' in text
+    assert 'a2a_task_manager_size{kind="tasks"} 2' in text
+
+
+def test_agent_card_is_cached_with_etag(server, client):
+    response = client.get("/.well-known/agent.json")
+    etag = response.headers["etag"]
+
+    assert response.json()["name"] == server.agent_card.name
+    assert "max-age=" in response.headers["cache-control"]
+    assert etag.startswith('W/"')
+    assert response.headers["vary"] == "Accept-Encoding"
+    revalidated = client.get("/.well-known/agent.json", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag
+    assert revalidated.headers["vary"] == "Accept-Encoding"
+
+    server.agent_card = server.agent_card.model_copy(update={"name": "Renamed"})
+    response = client.get("/.well-known/agent.json", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Renamed"
+    assert response.headers["etag"] != etag
+
+
+def test_compressed_agent_card_shares_the_weak_etag(agent_card):
+    card = agent_card.model_copy(update={"description": "Echoes. " * 200})
+    server = A2AServer(agent_card=card, task_manager=EchoTaskManager())
+
+    with TestClient(server.app) as client:
+        plain = client.get("/.well-known/agent.json", headers={"Accept-Encoding": ""})
+        gzipped = client.get(
+            "/.well-known/agent.json", headers={"Accept-Encoding": "gzip"}
+        )
+        revalidated = client.get(
+            "/.well-known/agent.json",
+            headers={
+                "Accept-Encoding": "gzip",
+                "If-None-Match": gzipped.headers["etag"],
+            },
+        )
+
+    assert "content-encoding" not in plain.headers
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["etag"] == plain.headers["etag"]
+    assert gzipped.headers["etag"].startswith('W/"')
+    assert gzipped.headers["vary"] == "Accept-Encoding"
+    assert revalidated.status_code == 304
+
+
+def test_large_responses_are_compressed(client):
+    params = send_params("t-big")
+    params["message"]["parts"][0]["text"] = "exchange rates " * 500
+    client.post("/", json=rpc("tasks/send", params))
+    get = rpc("tasks/get", {"id": "t-big", "historyLength": 10})
+
+    response = client.post("/", json=get, headers={"Accept-Encoding": "gzip"})
+    small = client.post(
+        "/", json=rpc("tasks/get", {"id": "t-big"}), headers={"Accept-Encoding": "gzip"}
+    )
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < 1000
+    assert response.json()["result"]["history"][0]["parts"][0]["text"].startswith(
+        "exchange rates"
+    )
+    assert "content-encoding" not in small.headers
+
+
+def test_compressed_requests_are_decoded(client):
+    body = gzip.compress(json.dumps(rpc("tasks/send", send_params("t-gz"))).encode())
+    response = client.post(
+        "/",
+        content=body,
+        headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+    )
+    assert response.json()["result"]["id"] == "t-gz"
+
+    unsupported = client.post(
+        "/", content=b"{}", headers={"Content-Encoding": "compress"}
+    )
+    assert unsupported.status_code == 415
+
+
+def test_draining_server_refuses_new_tasks(server, client):
+    client.post("/", json=rpc("tasks/send", send_params("t-before")))
+    asyncio.run(server.drain(timeout=0))
+
+    refused = client.post("/", json=rpc("tasks/send", send_params("t-after")))
+    existing = client.post("/", json=rpc("tasks/get", {"id": "t-before"}))
+
+    assert refused.status_code == 503
+    assert refused.headers["retry-after"] == "1"
+    assert refused.json()["error"]["code"] == -32099
+    assert existing.json()["result"]["status"]["state"] == "completed"
+
+
+def test_oversized_body_is_rejected(agent_card):
+    server = A2AServer(
+        agent_card=agent_card,
+        task_manager=EchoTaskManager(),
+        body_limits=BodyLimits(max_body_size=4096),
+    )
+    params = send_params("t-huge")
+    params["message"]["parts"][0]["text"] = "x" * 5000
+
+    with TestClient(server.app) as client:
+        declared = client.post("/", json=rpc("tasks/send", params))
+        streamed = client.post(
+            "/", content=iter([json.dumps(rpc("tasks/send", params)).encode()])
+        )
+
+    assert declared.status_code == 413
+    assert streamed.status_code == 413
+    assert declared.json()["error"]["code"] == -32600
+
+
+def test_large_file_parts_are_spilled_to_files(agent_card, tmp_path):
+    manager = EchoTaskManager()
+    server = A2AServer(
+        agent_card=agent_card,
+        task_manager=manager,
+        body_limits=BodyLimits(
+            spool_size=1024, spill_threshold=1024, spill_dir=str(tmp_path)
+        ),
+    )
+    content = os.urandom(3000)
+    params = send_params("t-file")
+    params["message"]["parts"].append(
+        {
+            "type": "file",
+            "file": {"name": "a.bin", "bytes": base64.b64encode(content).decode()},
+        }
+    )
+
+    with TestClient(server.app) as client:
+        client.post("/", json=rpc("tasks/send", params))
+        task = client.post(
+            "/", json=rpc("tasks/get", {"id": "t-file", "historyLength": 1})
+        ).json()["result"]
+
+        # Stored as a reference to a file, returned with the content inline.
+        stored = manager.task_store.tasks["t-file"].history[0].parts[1].file
+        spilled = list(tmp_path.iterdir())
+        assert stored.bytes.startswith(REFERENCE_PREFIX)
+        assert [path.read_bytes() for path in spilled] == [content]
+
+        file = task["history"][0]["parts"][1]["file"]
+        assert file == {"name": "a.bin", "bytes": base64.b64encode(content).decode()}
+
+        asyncio.run(manager.task_store.delete_task("t-file"))
+        assert list(tmp_path.iterdir()) == []
+
+
+class DigestTaskManager(EchoTaskManager):
+    """An agent answering with the SHA-256 digest of each file it is sent."""
+
+    async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
+        await self.upsert_task(request.params)
+        digests = []
+        for part in request.params.message.parts:
+            if isinstance(part, FilePart):
+                with self.open_file(part.file) as content:
+                    digests.append(hashlib.sha256(content.read()).hexdigest())
+        artifact = Artifact(parts=[TextPart(text=" ".join(digests))])
+        task = await self.update_store(
+            request.params.id, TaskStatus(state=TaskState.COMPLETED), [artifact]
+        )
+        return SendTaskResponse(id=request.id, result=task)
+
+
+def test_agents_read_spilled_and_inline_files_alike(agent_card, tmp_path, monkeypatch):
+    # Scan the long string in many steps.
+    monkeypatch.setattr(request_body, "_SCAN_STEP", 100)
+    server = A2AServer(
+        agent_card=agent_card,
+        task_manager=DigestTaskManager(),
+        body_limits=BodyLimits(spill_threshold=1024, spill_dir=str(tmp_path)),
+    )
+    large, small = os.urandom(3000), os.urandom(30)
+    params = send_params("t-digest")
+    for content in (large, small):
+        params["message"]["parts"].append(
+            {"type": "file", "file": {"bytes": base64.b64encode(content).decode()}}
+        )
+
+    with TestClient(server.app) as client:
+        task = client.post("/", json=rpc("tasks/send", params)).json()["result"]
+        # Only the large file was spilled.
+        assert len(list(tmp_path.iterdir())) == 1
+
+    digests = task["artifacts"][0]["parts"][0]["text"].split()
+    assert digests == [
+        hashlib.sha256(content).hexdigest() for content in (large, small)
+    ]
+
+
+def test_spilled_files_of_unsaved_tasks_are_deleted(agent_card, tmp_path):
+    server = A2AServer(
+        agent_card=agent_card,
+        task_manager=EchoTaskManager(),
+        body_limits=BodyLimits(spill_threshold=1024, spill_dir=str(tmp_path)),
+    )
+    params = send_params("t-invalid")
+    params["message"]["parts"].append(
+        {"type": "file", "file": {"bytes": base64.b64encode(os.urandom(3000)).decode()}}
+    )
+    params["message"]["role"] = "nobody"
+
+    with TestClient(server.app) as client:
+        response = client.post("/", json=rpc("tasks/send", params)).json()
+
+    assert response["error"]["code"] == -32600
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_msgpack_requests_and_streams(client):
+    msgpack = pytest.importorskip("msgpack")
+    content = os.urandom(2000)
+    params = send_params("t-msgpack")
+    params["message"]["parts"].append({"type": "file", "file": {"bytes": content}})
+    headers = {
+        "Content-Type": "application/msgpack",
+        "Accept": "application/msgpack",
+    }
+
+    sent = client.post(
+        "/", content=msgpack.packb(rpc("tasks/send", params)), headers=headers
+    )
+    got = client.post(
+        "/",
+        content=msgpack.packb(
+            rpc("tasks/get", {"id": "t-msgpack", "historyLength": 1})
+        ),
+        headers=headers,
+    )
+
+    assert sent.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(sent.content)["result"]["status"]["state"] == "completed"
+    file = msgpack.unpackb(got.content)["result"]["history"][0]["parts"][1]["file"]
+    assert file["bytes"] == content
+
+    headers["Accept"] = "application/vnd.a2a.msgpack-stream"
+    params["id"] = "t-msgpack-stream"
+    with client.stream(
+        "POST",
+        "/",
+        content=msgpack.packb(rpc("tasks/sendSubscribe", params)),
+        headers=headers,
+    ) as response:
+        body = response.read()
+    frames = []
+    while body:
+        length = int.from_bytes(body[:4], "big")
+        frames.append(msgpack.unpackb(body[4 : 4 + length]))
+        body = body[4 + length :]
+    assert [frame["id"] for frame in frames] == [1, 2]
+    assert frames[-1]["data"]["result"]["final"] is True
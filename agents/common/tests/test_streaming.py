@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from common.server.event_journal import JournalEntry
+from common.server.streaming import SlowConsumerPolicy, SubscriberQueue
+from common.types import Artifact, TaskArtifactUpdateEvent, TaskSendParams, TextPart
+from conftest import EchoTaskManager, send_params, status_event
+
+
+def status_entry(seq: int, final: bool = False) -> JournalEntry:
+    return JournalEntry.create(seq, status_event("t1", final))
+
+
+def artifact_entry(seq: int) -> JournalEntry:
+    artifact = Artifact(parts=[TextPart(text="result")])
+    return JournalEntry.create(seq, TaskArtifactUpdateEvent(id="t1", artifact=artifact))
+
+
+def drain(queue: SubscriberQueue) -> list:
+    async def run() -> list:
+        return [(await queue.get()).seq for _ in range(len(queue))]
+
+    return asyncio.run(run())
+
+
+# --- SubscriberQueue tests ---
+def test_drop_oldest_keeps_newest_events():
+    queue = SubscriberQueue("t1", maxsize=2, policy=SlowConsumerPolicy.DROP_OLDEST)
+    for seq in (1, 2, 3):
+        assert queue.offer(status_entry(seq))
+
+    assert queue.stats().dropped == 1
+    assert queue.stats().lag == 3
+    assert drain(queue) == [2, 3]
+
+
+def test_coalesce_drops_superseded_status_updates_only():
+    queue = SubscriberQueue("t1", maxsize=2, policy=SlowConsumerPolicy.COALESCE)
+    queue.offer(artifact_entry(1))
+    queue.offer(status_entry(2))
+    queue.offer(status_entry(3, final=True))
+
+    assert queue.stats().coalesced == 1
+    assert drain(queue) == [1, 3]
+
+
+def test_coalesce_disconnects_when_nothing_can_be_merged():
+    queue = SubscriberQueue("t1", maxsize=1, policy=SlowConsumerPolicy.COALESCE)
+    queue.offer(artifact_entry(1))
+
+    assert not queue.offer(artifact_entry(2))
+    assert queue.disconnected
+
+
+@pytest.mark.parametrize("maxsize", [0, -1])
+def test_queue_rejects_non_positive_size(maxsize):
+    with pytest.raises(ValueError):
+        SubscriberQueue("t1", maxsize=maxsize)
+    with pytest.raises(ValueError):
+        EchoTaskManager(subscriber_queue_size=maxsize)
+
+
+def test_disconnected_subscriber_receives_final_error():
+    async def scenario() -> None:
+        queue = SubscriberQueue("t1", maxsize=1, policy=SlowConsumerPolicy.DISCONNECT)
+        queue.offer(status_entry(1))
+        queue.offer(status_entry(2))
+
+        entry = await queue.get()
+        assert entry.is_final
+        assert entry.event.code == -32603
+
+    asyncio.run(scenario())
+
+
+# --- Fan-out tests ---
+def test_stalled_subscriber_does_not_block_others():
+    async def scenario() -> None:
+        manager = EchoTaskManager(
+            subscriber_queue_size=1, slow_consumer_policy=SlowConsumerPolicy.DISCONNECT
+        )
+        await manager.upsert_task(TaskSendParams(**send_params("t1")))
+        await manager.setup_sse_consumer("t1")  # never consumed
+        active = await manager.setup_sse_consumer("t1")
+
+        for seq in range(3):
+            await asyncio.wait_for(
+                manager.enqueue_events_for_sse("t1", status_event("t1")), 1
+            )
+            assert (await active.get()).seq == seq + 1
+
+        stats = manager.subscriber_stats("t1")
+        assert [s.disconnected for s in stats] == [True, False]
+        assert stats[1].lag == 0
+
+    asyncio.run(scenario())
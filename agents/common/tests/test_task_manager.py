@@ -0,0 +1,254 @@
+import asyncio
+
+import pytest
+from common.types import (
+    CancelTaskRequest,
+    GetTaskRequest,
+    TaskSendParams,
+    TaskState,
+    TaskStatus,
+)
+from common.utils.striped_lock import StripedLock
+from conftest import EchoTaskManager, send_params
+
+
+# --- StripedLock tests ---
+def test_striped_lock_is_stable_per_key():
+    locks = StripedLock(8)
+    assert locks.for_key("task-1") is locks.for_key("task-1")
+    assert len(locks) == 8
+
+
+def test_striped_lock_rejects_empty_pool():
+    with pytest.raises(ValueError):
+        StripedLock(0)
+
+
+# --- InMemoryTaskManager tests ---
+def test_get_task_does_not_wait_for_busy_task_lock():
+    async def scenario() -> None:
+        manager = EchoTaskManager(lock_stripes=1024)
+        await manager.upsert_task(TaskSendParams(**send_params("busy")))
+        await manager.upsert_task(TaskSendParams(**send_params("idle")))
+        assert manager.task_locks.for_key("busy") is not manager.task_locks.for_key(
+            "idle"
+        )
+
+        async with manager.task_locks.for_key("busy"):
+            response = await asyncio.wait_for(
+                manager.on_get_task(GetTaskRequest(params={"id": "busy"})), 1
+            )
+            updated = await asyncio.wait_for(
+                manager.update_store("idle", TaskStatus(state=TaskState.WORKING), []),
+                1,
+            )
+
+        assert response.result is not None
+        assert response.result.id == "busy"
+        assert updated.status.state == TaskState.WORKING
+
+    asyncio.run(scenario())
+
+
+def test_get_task_returns_history_window():
+    async def scenario() -> None:
+        manager = EchoTaskManager()
+        await manager.upsert_task(TaskSendParams(**send_params("t1", "first")))
+        await manager.upsert_task(TaskSendParams(**send_params("t1", "second")))
+
+        response = await manager.on_get_task(
+            GetTaskRequest(params={"id": "t1", "historyLength": 1})
+        )
+
+        assert response.result is not None
+        assert response.result.history is not None
+        assert [m.parts[0].text for m in response.result.history] == ["second"]
+        stored = await manager.task_store.get_task("t1")
+        assert response.result.history[0] is stored.history[-1]
+
+    asyncio.run(scenario())
+
+
+def test_get_task_pages_history_with_cursor():
+    async def scenario() -> None:
+        manager = EchoTaskManager()
+        for i in range(5):
+            await manager.upsert_task(TaskSendParams(**send_params("t1", f"m{i}")))
+        stored = await manager.task_store.get_task("t1")
+
+        pages, cursor = [], None
+        while True:
+            params = {"id": "t1", "historyLength": 2, "historyCursor": cursor}
+            task = (await manager.on_get_task(GetTaskRequest(params=params))).result
+            assert task is not None and task.history is not None
+            pages.append([m.parts[0].text for m in task.history])
+            assert task.metadata is None
+            cursor = task.nextHistoryCursor
+            if cursor is None:
+                break
+
+        assert pages == [["m3", "m4"], ["m1", "m2"], ["m0"]]
+        assert stored is not None and stored.metadata is None
+
+    asyncio.run(scenario())
+
+
+def test_get_task_unknown_id():
+    async def scenario() -> None:
+        manager = EchoTaskManager()
+        response = await manager.on_get_task(GetTaskRequest(params={"id": "nope"}))
+        assert response.error is not None
+        assert response.error.code == -32001
+
+    asyncio.run(scenario())
+
+
+# --- Cancellation tests ---
+def test_cancel_stops_running_work_and_ends_stream():
+    async def scenario() -> None:
+        manager = EchoTaskManager()
+        await manager.upsert_task(TaskSendParams(**send_params("t1")))
+        queue = await manager.setup_sse_consumer("t1")
+        started = asyncio.Event()
+
+        async def work() -> None:
+            started.set()
+            await asyncio.sleep(3600)
+
+        running = manager.task_registry.spawn("t1", work())
+        await started.wait()
+
+        response = await manager.on_cancel_task(CancelTaskRequest(params={"id": "t1"}))
+
+        assert running.cancelled()
+        assert not manager.task_registry.is_running("t1")
+        assert response.result is not None
+        assert response.result.status.state == TaskState.CANCELED
+        final = await queue.get()
+        assert final.is_final
+        assert final.event.status.state == TaskState.CANCELED
+
+    asyncio.run(scenario())
+
+
+def test_cancel_completed_task_is_rejected():
+    async def scenario() -> None:
+        manager = EchoTaskManager()
+        await manager.upsert_task(TaskSendParams(**send_params("t1")))
+        await manager.update_store("t1", TaskStatus(state=TaskState.COMPLETED), [])
+
+        response = await manager.on_cancel_task(CancelTaskRequest(params={"id": "t1"}))
+
+        assert response.error is not None
+        assert response.error.code == -32002
+
+    asyncio.run(scenario())
+
+
+def test_cancel_is_not_overwritten_by_finishing_work():
+    async def scenario() -> None:
+        manager = EchoTaskManager()
+        await manager.upsert_task(TaskSendParams(**send_params("t1")))
+        started = asyncio.Event()
+
+        async def work() -> None:
+            started.set()
+            try:
+                await asyncio.sleep(3600)
+            finally:
+                # A run recording its answer as it unwinds.
+                await manager.update_store_if_active(
+                    "t1", TaskStatus(state=TaskState.COMPLETED), []
+                )
+
+        manager.task_registry.spawn("t1", work())
+        await started.wait()
+
+        response = await manager.on_cancel_task(CancelTaskRequest(params={"id": "t1"}))
+
+        assert response.result.status.state == TaskState.CANCELED
+        task = await manager.task_store.get_task("t1")
+        assert task.status.state == TaskState.CANCELED
+
+    asyncio.run(scenario())
+
+
+def test_cancel_loses_to_work_that_finished_first():
+    async def scenario() -> None:
+        manager = EchoTaskManager()
+        await manager.upsert_task(TaskSendParams(**send_params("t1")))
+        finished = await manager.update_store_if_active(
+            "t1", TaskStatus(state=TaskState.COMPLETED), []
+        )
+
+        assert finished is not None
+        assert (
+            await manager.update_store_if_active(
+                "t1", TaskStatus(state=TaskState.CANCELED), []
+            )
+            is None
+        )
+        task = await manager.task_store.get_task("t1")
+        assert task.status.state == TaskState.COMPLETED
+
+    asyncio.run(scenario())
+
+
+# --- Drain tests ---
+def test_drain_waits_for_work_and_interrupts_the_rest():
+    async def scenario() -> None:
+        manager = EchoTaskManager()
+        for task_id in ("quick", "slow"):
+            await manager.upsert_task(TaskSendParams(**send_params(task_id)))
+        queue = await manager.setup_sse_consumer("slow")
+
+        async def quick() -> None:
+            await asyncio.sleep(0.01)
+            await manager.update_store(
+                "quick", TaskStatus(state=TaskState.COMPLETED), []
+            )
+
+        manager.task_registry.spawn("quick", quick())
+        slow = manager.task_registry.spawn("slow", asyncio.sleep(3600))
+
+        await manager.drain(timeout=0.2)
+
+        assert slow.cancelled()
+        assert len(manager.task_registry) == 0
+        quick_task = await manager.task_store.get_task("quick")
+        slow_task = await manager.task_store.get_task("slow")
+        assert quick_task.status.state == TaskState.COMPLETED
+        assert slow_task.status.state == TaskState.FAILED
+        final = await queue.get()
+        assert final.is_final
+        assert final.event.status.state == TaskState.FAILED
+
+    asyncio.run(scenario())
+
+
+def test_drain_cancels_the_leftover_work_together():
+    async def scenario() -> None:
+        manager = EchoTaskManager()
+
+        async def stubborn() -> None:
+            try:
+                await asyncio.sleep(3600)
+            finally:
+                # Unwinding takes a while, e.g. to save agent state.
+                await asyncio.shield(asyncio.sleep(0.2))
+
+        for i in range(5):
+            await manager.upsert_task(TaskSendParams(**send_params(f"t{i}")))
+            manager.task_registry.spawn(f"t{i}", stubborn())
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await manager.drain(timeout=0)
+
+        assert loop.time() - started < 0.6
+        assert len(manager.task_registry) == 0
+        for i in range(5):
+            task = await manager.task_store.get_task(f"t{i}")
+            assert task.status.state == TaskState.FAILED
+
+    asyncio.run(scenario())
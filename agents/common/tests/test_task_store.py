@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+from common.server.redis_backend import RedisTaskStore
+from common.server.task_store import InMemoryTaskStore, SQLiteTaskStore
+from common.types import (
+    Message,
+    PushNotificationConfig,
+    Task,
+    TaskSendParams,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+from conftest import EchoTaskManager, send_params
+
+
+def make_task(
+    task_id: str, state: TaskState = TaskState.WORKING, session_id: str = "session-1"
+) -> Task:
+    return Task(
+        id=task_id,
+        sessionId=session_id,
+        status=TaskStatus(state=state),
+        history=[Message(role="user", parts=[TextPart(text="hi")])],
+    )
+
+
+# --- SQLiteTaskStore tests ---
+def test_sqlite_store_round_trip(tmp_path):
+    async def scenario() -> None:
+        store = SQLiteTaskStore(str(tmp_path / "tasks.db"))
+        await store.save_task(make_task("t1"))
+        await store.set_push_notification_info(
+            "t1", PushNotificationConfig(url="http://callback")
+        )
+
+        task = await store.get_task("t1")
+        config = await store.get_push_notification_info("t1")
+        assert task is not None and task.status.state == TaskState.WORKING
+        assert config is not None and config.url == "http://callback"
+
+        await store.delete_task("t1")
+        assert await store.get_task("t1") is None
+        assert await store.get_push_notification_info("t1") is None
+        await store.close()
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_store_survives_restart(tmp_path):
+    path = str(tmp_path / "tasks.db")
+
+    async def write() -> None:
+        store = SQLiteTaskStore(path)
+        await store.save_task(make_task("t1", TaskState.COMPLETED))
+        await store.close()
+
+    async def read() -> None:
+        store = SQLiteTaskStore(path)
+        task = await store.get_task("t1")
+        assert task is not None and task.status.state == TaskState.COMPLETED
+        await store.close()
+
+    asyncio.run(write())
+    asyncio.run(read())
+
+
+def test_sqlite_store_group_commits_concurrent_writes(tmp_path):
+    async def scenario() -> None:
+        store = SQLiteTaskStore(str(tmp_path / "tasks.db"), commit_interval=0.05)
+        await asyncio.gather(*(store.save_task(make_task(f"t{i}")) for i in range(50)))
+
+        assert store.commit_count == 1
+        assert await store.get_task("t49") is not None
+        await store.close()
+
+    asyncio.run(scenario())
+
+
+def test_manager_updates_through_sqlite_store(tmp_path):
+    async def scenario() -> None:
+        store = SQLiteTaskStore(str(tmp_path / "tasks.db"))
+        manager = EchoTaskManager(task_store=store)
+        await manager.upsert_task(TaskSendParams(**send_params("t1")))
+        await manager.update_store("t1", TaskStatus(state=TaskState.COMPLETED), [])
+
+        task = await store.get_task("t1")
+        assert task is not None and task.status.state == TaskState.COMPLETED
+        await store.close()
+
+    asyncio.run(scenario())
+
+
+# --- Listing tests ---
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def store_factory(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryTaskStore
+    if request.param == "redis":
+        url = request.getfixturevalue("redis_url")
+        return lambda: RedisTaskStore.from_url(url)
+    return lambda: SQLiteTaskStore(str(tmp_path / "tasks.db"))
+
+
+def test_list_tasks_filters_and_pages(store_factory):
+    async def scenario() -> None:
+        store = store_factory()
+        for i in range(5):
+            await store.save_task(make_task(f"a{i}", session_id="a"))
+        await store.save_task(make_task("b0", TaskState.COMPLETED, session_id="b"))
+
+        listed, before = [], None
+        while True:
+            page, before = await store.list_tasks(
+                session_id="a", before=before, limit=2
+            )
+            listed.extend(task.id for task in page)
+            if before is None:
+                break
+        assert sorted(listed) == [f"a{i}" for i in range(5)]
+
+        page, before = await store.list_tasks(state=TaskState.COMPLETED)
+        assert [task.id for task in page] == ["b0"] and before is None
+
+        await asyncio.sleep(0.01)
+        await store.save_task(make_task("a2", TaskState.COMPLETED, session_id="a"))
+        page, _ = await store.list_tasks(limit=1)
+        assert [task.id for task in page] == ["a2"]
+        page, _ = await store.list_tasks(session_id="a", state=TaskState.WORKING)
+        assert sorted(task.id for task in page) == ["a0", "a1", "a3", "a4"]
+
+        await store.delete_task("a2")
+        page, _ = await store.list_tasks(state=TaskState.COMPLETED)
+        assert [task.id for task in page] == ["b0"]
+        await store.close()
+
+    asyncio.run(scenario())
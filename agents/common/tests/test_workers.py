@@ -0,0 +1,98 @@
+import httpx
+import pytest
+from common.server import A2AServer
+from common.server.workers import WorkerPool, owner_of
+from conftest import EchoTaskManager, read_sse, rpc, send_params
+from starlette.testclient import TestClient
+
+TASK_IDS = [f"task-{i}" for i in range(8)]
+
+
+@pytest.fixture
+def servers(agent_card):
+    servers = [
+        A2AServer(agent_card=agent_card, task_manager=EchoTaskManager())
+        for _ in range(2)
+    ]
+    for index, server in enumerate(servers):
+        server.worker_pool = WorkerPool(
+            index,
+            len(servers),
+            "/unused",
+            transport_factory=lambda other: httpx.ASGITransport(servers[other].app),
+        )
+    return servers
+
+
+def test_owner_of_spreads_tasks():
+    owners = [owner_of(f"task-{i}", 4) for i in range(1000)]
+    assert owner_of("task-1", 4) == owners[1]
+    assert all(owners.count(worker) > 200 for worker in range(4))
+
+
+# --- Routing tests ---
+def test_calls_are_served_by_the_owning_worker(servers):
+    with TestClient(servers[0].app) as client:
+        for task_id in TASK_IDS:
+            client.post("/", json=rpc("tasks/send", send_params(task_id)))
+
+        for index, server in enumerate(servers):
+            owned = {t for t in TASK_IDS if owner_of(t, len(servers)) == index}
+            assert set(server.task_manager.task_store.tasks) == owned
+
+        response = client.post("/", json=rpc("tasks/get", {"id": TASK_IDS[1]}))
+        assert response.json()["result"]["id"] == TASK_IDS[1]
+
+        batch = [rpc("tasks/get", {"id": t}, request_id=t) for t in TASK_IDS]
+        body = client.post("/", json=batch).json()
+        assert [response["result"]["id"] for response in body] == TASK_IDS
+
+
+def test_streams_are_relayed_from_the_owning_worker(servers):
+    task_id = next(t for t in TASK_IDS if owner_of(t, len(servers)) == 1)
+    with TestClient(servers[0].app) as client:
+        with client.stream(
+            "POST", "/", json=rpc("tasks/sendSubscribe", send_params(task_id))
+        ) as response:
+            events = read_sse(response)
+
+    assert [event["id"] for event in events] == ["1", "2"]
+    assert task_id in servers[1].task_manager.task_store.tasks
+
+
+def test_list_tasks_pages_across_workers(servers):
+    with TestClient(servers[1].app) as client:
+        for task_id in TASK_IDS:
+            client.post("/", json=rpc("tasks/send", send_params(task_id)))
+
+        listed, cursor = [], None
+        while True:
+            params = {"limit": 3, "cursor": cursor}
+            result = client.post("/", json=rpc("tasks/list", params)).json()["result"]
+            assert len(result["tasks"]) <= 3
+            listed.extend(task["id"] for task in result["tasks"])
+            cursor = result.get("nextCursor")
+            if cursor is None:
+                break
+
+    assert sorted(listed) == sorted(TASK_IDS)
+
+
+def test_task_manager_factory_builds_one_manager_per_worker(agent_card):
+    built = []
+
+    def build():
+        built.append(EchoTaskManager())
+        return built[-1]
+
+    server = A2AServer(agent_card=agent_card, task_manager_factory=build)
+    assert server.task_manager is None and built == []
+
+    # What each worker does once forked.
+    server.build_task_manager()
+
+    assert server.task_manager is built[0]
+    assert server.spilled_files is built[0].task_store.spilled_files
+    with TestClient(server.app) as client:
+        response = client.post("/", json=rpc("tasks/send", send_params("t1")))
+    assert response.json()["result"]["status"]["state"] == "completed"
@@ -98,6 +98,12 @@ class Task(BaseModel):
     metadata: dict[str, Any] | None = None
 
 
+class GetTaskResult(Task):
+    # Position to pass as `historyCursor` for the older history, when there
+    # is any left.
+    nextHistoryCursor: int | None = None
+
+
 class TaskStatusUpdateEvent(BaseModel):
     id: str
     status: TaskStatus
@@ -131,6 +137,14 @@ class TaskIdParams(BaseModel):
 
 class TaskQueryParams(TaskIdParams):
     historyLength: int | None = None
+    # Page through older history: only messages before this position are
+    # returned. The position for the next page is returned as the result's
+    # `nextHistoryCursor`.
+    historyCursor: int | None = Field(default=None, ge=0)
+
+
+class TaskResubscriptionParams(TaskIdParams):
+    lastEventId: int | None = None
 
 
 class TaskSendParams(BaseModel):
@@ -143,6 +157,20 @@ class TaskSendParams(BaseModel):
     metadata: dict[str, Any] | None = None
 
 
+class TaskListParams(BaseModel):
+    sessionId: str | None = None
+    state: TaskState | None = None
+    cursor: str | None = None
+    limit: int = Field(default=50, ge=1, le=500)
+    historyLength: int | None = None
+    metadata: dict[str, Any] | None = None
+
+
+class TaskListResult(BaseModel):
+    tasks: List[Task]
+    nextCursor: str | None = None
+
+
 class TaskPushNotificationConfig(BaseModel):
     id: str
     pushNotificationConfig: PushNotificationConfig
@@ -197,7 +225,7 @@ class GetTaskRequest(JSONRPCRequest):
 
 
 class GetTaskResponse(JSONRPCResponse):
-    result: Task | None = None
+    result: GetTaskResult | None = None
 
 
 class CancelTaskRequest(JSONRPCRequest):
@@ -227,9 +255,18 @@ class GetTaskPushNotificationResponse(JSONRPCResponse):
     result: TaskPushNotificationConfig | None = None
 
 
+class ListTasksRequest(JSONRPCRequest):
+    method: Literal["tasks/list",] = "tasks/list"
+    params: TaskListParams = Field(default_factory=TaskListParams)
+
+
+class ListTasksResponse(JSONRPCResponse):
+    result: TaskListResult | None = None
+
+
 class TaskResubscriptionRequest(JSONRPCRequest):
     method: Literal["tasks/resubscribe",] = "tasks/resubscribe"
-    params: TaskIdParams
+    params: TaskResubscriptionParams
 
 
 A2ARequest = TypeAdapter(
@@ -242,6 +279,7 @@ A2ARequest = TypeAdapter(
             GetTaskPushNotificationRequest,
             TaskResubscriptionRequest,
             SendTaskStreamingRequest,
+            ListTasksRequest,
         ],
         Field(discriminator="method"),
     ]
@@ -310,6 +348,14 @@ class ContentTypeNotSupportedError(JSONRPCError):
     data: None = None
 
 
+class ServerBusyError(JSONRPCError):
+    # Implementation-defined server error, from the end of the range so that
+    # it stays clear of the codes A2A assigns from -32001 upwards.
+    code: int = -32099
+    message: str = "Server is busy, retry later"
+    data: Any | None = None
+
+
 class AgentProvider(BaseModel):
     organization: str
     url: str | None = None
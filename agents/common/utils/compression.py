@@ -0,0 +1,117 @@
+"""HTTP content codings shared by A2AServer and A2AClient.
+
+gzip is always available; zstd is offered when the zstandard package is
+installed. zstd compresses JSON about as well as gzip at a fraction of the
+CPU cost, so it is preferred when both sides support it.
+"""
+
+import gzip
+import zlib
+from typing import Any, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Smallest body worth compressing; below this the saving is a few bytes and
+# does not pay for the CPU time.
+DEFAULT_MINIMUM_SIZE = 1024
+
+
+class UnsupportedEncoding(ValueError):
+    """Raised for a content coding this process cannot decode."""
+
+
+class DecodingError(ValueError):
+    """Raised when a compressed body is corrupt."""
+
+
+class SizeLimitExceeded(ValueError):
+    """Raised when a body decompresses to more than the allowed size."""
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Supported content codings, most preferred first."""
+    return ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+
+ACCEPT_ENCODING = ", ".join(available_encodings())
+
+_DECODE_ERRORS: Tuple[type, ...] = (OSError, EOFError, zlib.error)
+if zstandard is not None:
+    _DECODE_ERRORS += (zstandard.ZstdError,)
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the coding to use for a response, given an Accept-Encoding header.
+
+    Returns:
+        The most preferred supported coding the client accepts, or None to
+        send the response uncompressed.
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    for coding in available_encodings():
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    raise UnsupportedEncoding(f"Unsupported content encoding: {encoding}")
+
+
+def decompress(data: Any, encoding: Optional[str], max_size: int = 0) -> bytes:
+    """Decode a body sent with the given Content-Encoding header.
+
+    Args:
+        data: The encoded body, any bytes-like object.
+        encoding: The Content-Encoding header value.
+        max_size: Largest decoded size accepted, 0 for no limit. Decoding
+            stops as soon as the limit is passed, so a small body expanding
+            to gigabytes is rejected early.
+
+    Raises:
+        UnsupportedEncoding: If the coding is not supported.
+        DecodingError: If the body is not valid for its coding.
+        SizeLimitExceeded: If the decoded body is larger than `max_size`.
+    """
+    encoding = (encoding or "identity").strip().lower()
+    if encoding == "identity":
+        return bytes(data)
+    try:
+        if encoding == "gzip":
+            decompressor = zlib.decompressobj(wbits=31)
+            decoded = decompressor.decompress(data, max_size + 1 if max_size else 0)
+            if not decompressor.eof and not (max_size and len(decoded) > max_size):
+                raise DecodingError("Truncated gzip body")
+        elif encoding == "zstd" and zstandard is not None:
+            reader = zstandard.ZstdDecompressor().stream_reader(data)
+            decoded = reader.read(max_size + 1) if max_size else reader.readall()
+        else:
+            raise UnsupportedEncoding(f"Unsupported content encoding: {encoding}")
+    except _DECODE_ERRORS as e:
+        raise DecodingError(f"Invalid {encoding} body: {e}") from e
+    if max_size and len(decoded) > max_size:
+        raise SizeLimitExceeded(f"Body decompresses to more than {max_size} bytes")
+    return decoded
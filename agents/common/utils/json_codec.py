@@ -0,0 +1,28 @@
+"""JSON decoding and encoding, using orjson when it is installed.
+
+Both backends raise `json.JSONDecodeError` (orjson's error subclasses it) on
+malformed input, so callers can handle errors the same way either way.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def loads(data: bytes | bytearray | memoryview | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        # The json module does not take buffers.
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
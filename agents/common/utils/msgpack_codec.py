@@ -0,0 +1,125 @@
+"""MessagePack encoding of JSON-RPC messages, offered when msgpack is installed.
+
+Messages keep the structure of their JSON form, except that the content of
+file parts (`FileContent.bytes`) travels as raw binary instead of base64
+text, which saves a third of its size and the base64 work on both sides.
+
+Streamed responses are a sequence of frames, each a 4-byte big-endian length
+followed by a MessagePack map holding the event id (`id`, the SSE event id
+of the same event, or nil) and the JSON-RPC response (`data`).
+"""
+
+import base64
+import binascii
+import struct
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the environment
+    msgpack = None
+
+MEDIA_TYPE = "application/msgpack"
+STREAM_MEDIA_TYPE = "application/vnd.a2a.msgpack-stream"
+
+_FRAME_HEADER = struct.Struct(">I")
+
+# Stores the raw content of a file part elsewhere and returns the reference
+# to keep as its `bytes`, or returns None to keep the content inline.
+Spill = Callable[[bytes], Optional[str]]
+
+
+class DecodeError(ValueError):
+    """Raised for a malformed MessagePack message."""
+
+
+def available() -> bool:
+    return msgpack is not None
+
+
+def _require() -> Any:
+    if msgpack is None:
+        raise ImportError(
+            "The MessagePack wire format requires the msgpack package: "
+            "pip install msgpack"
+        )
+    return msgpack
+
+
+def _pack_files(value: Any) -> Any:
+    if isinstance(value, dict):
+        packed = {key: _pack_files(item) for key, item in value.items()}
+        content = packed.get("bytes")
+        if isinstance(content, str):
+            try:
+                packed["bytes"] = base64.b64decode(content, validate=True)
+            except binascii.Error:
+                pass
+        return packed
+    if isinstance(value, list):
+        return [_pack_files(item) for item in value]
+    return value
+
+
+def _unpack_files(value: Any, spill: Optional[Spill]) -> Any:
+    if isinstance(value, dict):
+        content = value.get("bytes")
+        if isinstance(content, bytes):
+            value = dict(value)
+            reference = spill(content) if spill is not None else None
+            if reference is not None:
+                value["bytes"] = reference
+            else:
+                value["bytes"] = base64.b64encode(content).decode()
+        return {key: _unpack_files(item, spill) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_unpack_files(item, spill) for item in value]
+    return value
+
+
+def dumps(value: Any) -> bytes:
+    """Encode a JSON-compatible message, sending file contents as binary."""
+    return bytes(_require().packb(_pack_files(value), use_bin_type=True))
+
+
+def loads(data: bytes | memoryview, spill: Optional[Spill] = None) -> Any:
+    """Decode a message into its JSON-compatible form.
+
+    Args:
+        data: The encoded message.
+        spill: Called with the content of each file part; when it returns a
+            reference, the part holds it instead of base64 content.
+
+    Raises:
+        DecodeError: If the message is malformed.
+    """
+    codec = _require()
+    try:
+        value = codec.unpackb(data, raw=False)
+    except (ValueError, codec.UnpackException) as e:
+        raise DecodeError(f"Invalid MessagePack message: {e}") from e
+    return _unpack_files(value, spill)
+
+
+def frame(event_id: Optional[int], value: Any) -> bytes:
+    body = dumps({"id": event_id, "data": value})
+    return _FRAME_HEADER.pack(len(body)) + body
+
+
+async def read_frames(
+    chunks: AsyncIterable[bytes],
+) -> AsyncIterator[Tuple[Optional[int], Any]]:
+    """Split a stream of frames, yielding the event id and message of each."""
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= _FRAME_HEADER.size:
+            (length,) = _FRAME_HEADER.unpack_from(buffer)
+            end = _FRAME_HEADER.size + length
+            if len(buffer) < end:
+                break
+            message = loads(bytes(buffer[_FRAME_HEADER.size : end]))
+            del buffer[:end]
+            yield message.get("id"), message.get("data")
+    if buffer:
+        raise DecodeError("Stream ended inside a frame")
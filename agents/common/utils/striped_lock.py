@@ -0,0 +1,43 @@
+"""Striped asyncio lock utility."""
+
+import asyncio
+import zlib
+from typing import List
+
+
+class StripedLock:
+    """A fixed pool of asyncio locks selected by key.
+
+    Keys hashing to different stripes never contend with each other, while the
+    pool size stays bounded regardless of how many keys are seen.
+    """
+
+    def __init__(self, stripes: int = 64) -> None:
+        """Initialize the lock pool.
+
+        Args:
+            stripes: Number of locks in the pool. Must be positive.
+
+        Raises:
+            ValueError: If stripes is not positive.
+        """
+        if stripes < 1:
+            raise ValueError("stripes must be a positive integer")
+        self._locks: List[asyncio.Lock] = [asyncio.Lock() for _ in range(stripes)]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    def for_key(self, key: str) -> asyncio.Lock:
+        """Return the lock guarding the given key.
+
+        A stable CRC32 hash is used so the stripe assignment does not depend on
+        the interpreter's hash randomization.
+
+        Args:
+            key: The key to lock on, typically a task id.
+
+        Returns:
+            The asyncio lock for the key's stripe.
+        """
+        return self._locks[zlib.crc32(key.encode()) % len(self._locks)]
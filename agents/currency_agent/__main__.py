@@ -1,8 +1,15 @@
-from common.server import A2AServer
+from common.server import (
+    A2AServer,
+    AdmissionController,
+    MethodLimit,
+    RedisEventBus,
+    RedisTaskStore,
+    SQLiteTaskStore,
+)
 from common.types import AgentCard, AgentCapabilities, AgentSkill, MissingAPIKeyError
 from common.utils.push_notification_auth import PushNotificationSenderAuth
 from agents.langgraph.task_manager import AgentTaskManager
-from agents.langgraph.agent import CurrencyAgent
+from agents.langgraph.agent import CurrencyAgent, rate_cache
 import click
 import os
 import logging
@@ -16,9 +23,57 @@ logger = logging.getLogger(__name__)
 @click.command()
 @click.option("--host", "host", default="localhost")
 @click.option("--port", "port", default=10000)
-def main(host, port):
+@click.option(
+    "--task-db", "task_db", default=None, help="SQLite file to persist tasks in"
+)
+@click.option(
+    "--redis-url", "redis_url", default=None, help="Redis server shared by all replicas"
+)
+@click.option("--workers", "workers", default=1, help="Number of worker processes")
+@click.option(
+    "--max-concurrency",
+    "max_concurrency",
+    default=16,
+    help="Agent calls run at once per method, per worker",
+)
+@click.option(
+    "--max-queue",
+    "max_queue",
+    default=64,
+    help="Agent calls waiting for a slot before new ones are rejected",
+)
+@click.option(
+    "--agent-concurrency",
+    "agent_concurrency",
+    default=16,
+    help="Agent runs in flight at once, per worker",
+)
+@click.option(
+    "--drain-timeout",
+    "drain_timeout",
+    default=30.0,
+    help="Seconds running tasks get to finish on shutdown",
+)
+def main(
+    host,
+    port,
+    task_db,
+    redis_url,
+    workers,
+    max_concurrency,
+    max_queue,
+    agent_concurrency,
+    drain_timeout,
+):
     """Starts the Currency Agent server."""
     try:
+        if workers > 1 and task_db:
+            # SQLite connections must not be shared across forked workers.
+            raise click.UsageError("--task-db cannot be combined with --workers")
+        if task_db and redis_url:
+            # Tasks are kept in Redis then, the SQLite file would go unused.
+            raise click.UsageError("--task-db cannot be combined with --redis-url")
+
         if not os.getenv("GOOGLE_API_KEY"):
             raise MissingAPIKeyError("GOOGLE_API_KEY environment variable not set.")
 
@@ -43,19 +98,45 @@ def main(host, port):
 
         notification_sender_auth = PushNotificationSenderAuth()
         notification_sender_auth.generate_jwk()
+
+        def build_task_manager():
+            # Built in each worker after the fork: the Gemini and Redis clients
+            # must not be shared between processes.
+            task_store = SQLiteTaskStore(task_db) if task_db else None
+            event_bus = None
+            if redis_url:
+                task_store = RedisTaskStore.from_url(redis_url)
+                event_bus = RedisEventBus.from_url(redis_url)
+            return AgentTaskManager(
+                agent=CurrencyAgent(),
+                notification_sender_auth=notification_sender_auth,
+                task_store=task_store,
+                event_bus=event_bus,
+                max_concurrency=agent_concurrency,
+            )
+
+        limit = MethodLimit(
+            max_concurrency, max_queue=max_queue, queue_timeout=5.0, retry_after=5.0
+        )
+        admission = AdmissionController(
+            {"tasks/send": limit, "tasks/sendSubscribe": limit}
+        )
         server = A2AServer(
             agent_card=agent_card,
-            task_manager=AgentTaskManager(agent=CurrencyAgent(), notification_sender_auth=notification_sender_auth),
+            task_manager_factory=build_task_manager,
             host=host,
             port=port,
+            admission=admission,
+            drain_timeout=drain_timeout,
         )
 
+        server.metrics.register(rate_cache.collect)
         server.app.add_route(
             "/.well-known/jwks.json", notification_sender_auth.handle_jwks_endpoint, methods=["GET"]
         )
 
         logger.info(f"Starting server on {host}:{port}")
-        server.start()
+        server.start(workers=workers)
     except MissingAPIKeyError as e:
         logger.error(f"Error: {e}")
         exit(1)
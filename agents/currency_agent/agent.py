@@ -3,15 +3,20 @@ from langchain_core.tools import tool
 from langgraph.prebuilt import create_react_agent
 from langgraph.checkpoint.memory import MemorySaver
 from langchain_core.messages import AIMessage, ToolMessage
-import httpx
-from typing import Any, Dict, AsyncIterable, Literal
+from typing import Any, Dict, AsyncIterable, List, Literal
 from pydantic import BaseModel
+from .frankfurter import FrankfurterClient
+from .rates import RateCache, RatesEngine
 
 memory = MemorySaver()
+frankfurter = FrankfurterClient()
+rate_cache = RateCache()
+# Every pair of currencies is derived from one table of rates per date.
+rates_engine = RatesEngine(frankfurter.arates, rate_cache)
 
 
 @tool
-def get_exchange_rate(
+async def get_exchange_rate(
     currency_from: str = "USD",
     currency_to: str = "EUR",
     currency_date: str = "latest",
@@ -25,22 +30,37 @@ def get_exchange_rate(
 
     Returns:
         A dictionary containing the exchange rate data, or an error message if the request fails.
-    """    
-    try:
-        response = httpx.get(
-            f"https://api.frankfurter.app/{currency_date}",
-            params={"from": currency_from, "to": currency_to},
-        )
-        response.raise_for_status()
+    """
+    return await rates_engine.exchange_rate(currency_from, currency_to, currency_date)
+
 
-        data = response.json()
-        if "rates" not in data:
-            return {"error": "Invalid API response format."}
-        return data
-    except httpx.HTTPError as e:
-        return {"error": f"API request failed: {e}"}
-    except ValueError:
-        return {"error": "Invalid JSON response from API."}
+class Conversion(BaseModel):
+    """An amount of one currency to convert into another."""
+    currency_from: str
+    currency_to: str
+    amount: float = 1.0
+    currency_date: str = "latest"
+
+
+@tool
+async def convert_currencies(conversions: List[Conversion]):
+    """Use this to convert several amounts or currency pairs at once.
+
+    Args:
+        conversions: The conversions, each with the currency to convert from and to
+            (e.g., "USD" and "EUR"), the amount (defaults to 1) and the date of the
+            rate or "latest" (the default).
+
+    Returns:
+        A list with the rate and converted amount of each conversion, or an error message.
+    """
+    conversions = [Conversion.model_validate(c) for c in conversions]
+    return await rates_engine.convert(
+        [
+            (c.currency_from, c.currency_to, c.amount, c.currency_date)
+            for c in conversions
+        ]
+    )
 
 
 class ResponseFormat(BaseModel):
@@ -52,7 +72,8 @@ class CurrencyAgent:
 
     SYSTEM_INSTRUCTION = (
         "You are a specialized assistant for currency conversions. "
-        "Your sole purpose is to use the 'get_exchange_rate' tool to answer questions about currency exchange rates. "
+        "Your sole purpose is to use the 'get_exchange_rate' tool to answer questions about currency exchange rates, "
+        "or the 'convert_currencies' tool when a question involves several amounts or currency pairs. "
         "If the user asks about anything other than currency conversion or exchange rates, "
         "politely state that you cannot help with that topic and can only assist with currency-related queries. "
         "Do not attempt to answer unrelated questions or use tools for other purposes."
@@ -63,23 +84,24 @@ class CurrencyAgent:
      
     def __init__(self):
         self.model = ChatGoogleGenerativeAI(model="gemini-2.0-flash")
-        self.tools = [get_exchange_rate]
+        self.tools = [get_exchange_rate, convert_currencies]
 
         self.graph = create_react_agent(
             self.model, tools=self.tools, checkpointer=memory, prompt = self.SYSTEM_INSTRUCTION, response_format=ResponseFormat
         )
 
-    def invoke(self, query, sessionId) -> str:
+    async def invoke(self, query, sessionId) -> Dict[str, Any]:
         config = {"configurable": {"thread_id": sessionId}}
-        self.graph.invoke({"messages": [("user", query)]}, config)        
-        return self.get_agent_response(config)
+        state = await self.graph.ainvoke({"messages": [("user", query)]}, config)
+        return self._agent_response(state)
 
     async def stream(self, query, sessionId) -> AsyncIterable[Dict[str, Any]]:
         inputs = {"messages": [("user", query)]}
         config = {"configurable": {"thread_id": sessionId}}
 
-        for item in self.graph.stream(inputs, config, stream_mode="values"):
-            message = item["messages"][-1]
+        state = {}
+        async for state in self.graph.astream(inputs, config, stream_mode="values"):
+            message = state["messages"][-1]
             if (
                 isinstance(message, AIMessage)
                 and message.tool_calls
@@ -95,14 +117,13 @@ class CurrencyAgent:
                     "is_task_complete": False,
                     "require_user_input": False,
                     "content": "Processing the exchange rates..",
-                }            
-        
-        yield self.get_agent_response(config)
-
-        
-    def get_agent_response(self, config):
-        current_state = self.graph.get_state(config)        
-        structured_response = current_state.values.get('structured_response')
+                }
+
+        # The last values streamed are the final state of the run.
+        yield self._agent_response(state)
+
+    def _agent_response(self, values):
+        structured_response = values.get('structured_response')
         if structured_response and isinstance(structured_response, ResponseFormat): 
             if structured_response.status == "input_required":
                 return {
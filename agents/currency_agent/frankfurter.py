@@ -0,0 +1,108 @@
+"""Client of the Frankfurter exchange rate API.
+
+Requests share pooled keep-alive connections, so a lookup does not pay for a
+new TCP and TLS handshake, and are bounded by explicit timeouts. The API is
+https://api.frankfurter.app by default; set FRANKFURTER_API_URL to use
+another server, such as a local stub in tests and benchmarks.
+"""
+
+import asyncio
+import os
+import weakref
+from typing import Any, Dict, Optional
+
+import httpx
+
+DEFAULT_API_URL = "https://api.frankfurter.app"
+DEFAULT_TIMEOUT = httpx.Timeout(10.0, connect=3.0)
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=32, max_keepalive_connections=16, keepalive_expiry=60.0
+)
+
+
+class FrankfurterClient:
+    """Looks up exchange rates, returning an "error" dict when a lookup fails.
+
+    Args:
+        base_url: The API to query; FRANKFURTER_API_URL, read on the first
+            request, or the public API by default.
+        timeout: Timeouts of each request.
+        limits: Connection pool limits.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        timeout: httpx.Timeout = DEFAULT_TIMEOUT,
+        limits: httpx.Limits = DEFAULT_LIMITS,
+    ) -> None:
+        self._base_url = base_url
+        self.timeout = timeout
+        self.limits = limits
+        # Pooled connections belong to the event loop that opened them.
+        self._async_clients: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, httpx.AsyncClient
+        ] = weakref.WeakKeyDictionary()
+
+    @property
+    def base_url(self) -> str:
+        if self._base_url is None:
+            self._base_url = os.getenv("FRANKFURTER_API_URL", DEFAULT_API_URL)
+        return self._base_url
+
+    async def arates(
+        self,
+        currency_from: str,
+        currency_to: Optional[str] = None,
+        currency_date: str = "latest",
+    ) -> Dict[str, Any]:
+        """Rates of `currency_from` on a date, into `currency_to` or all others."""
+        try:
+            response = await self._get_async_client().get(
+                f"/{currency_date}", params=_params(currency_from, currency_to)
+            )
+            return _parse(response)
+        except httpx.HTTPError as e:
+            return {"error": f"API request failed: {e}"}
+        except ValueError:
+            return {"error": "Invalid JSON response from API."}
+
+    async def aclose(self) -> None:
+        """Close the connection pools of every event loop the client ran on."""
+        current = asyncio.get_running_loop()
+        clients = list(self._async_clients.items())
+        self._async_clients.clear()
+        for loop, client in clients:
+            if loop is current:
+                await client.aclose()
+            elif loop.is_running():
+                closing = asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+                await asyncio.wrap_future(closing)
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            # The pools of closed loops can no longer be closed; drop them so
+            # their sockets are freed.
+            for stale in [old for old in self._async_clients if old.is_closed()]:
+                del self._async_clients[stale]
+            client = self._async_clients[loop] = httpx.AsyncClient(
+                base_url=self.base_url, timeout=self.timeout, limits=self.limits
+            )
+        return client
+
+
+def _params(currency_from: str, currency_to: Optional[str]) -> Dict[str, str]:
+    params = {"from": currency_from}
+    if currency_to is not None:
+        params["to"] = currency_to
+    return params
+
+
+def _parse(response: httpx.Response) -> Dict[str, Any]:
+    response.raise_for_status()
+    data = response.json()
+    if not isinstance(data, dict) or "rates" not in data:
+        return {"error": "Invalid API response format."}
+    return data
@@ -0,0 +1,356 @@
+import asyncio
+import copy
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from zoneinfo import ZoneInfo
+
+from common.server.metrics import CounterFamily, GaugeFamily
+
+RateKey = Tuple[str, str, str]
+
+# Fetches the rates of a base currency on a date into the given currency, or
+# into every other one when it is None; FrankfurterClient.arates.
+FetchRates = Callable[[str, Optional[str], str], Awaitable[Dict[str, Any]]]
+
+# Frankfurter republishes the ECB reference rates once per working day,
+# shortly after 16:00 Frankfurt time: 15:00 UTC in winter (CET), 14:00 UTC in
+# summer (CEST).
+PUBLISH_HOUR = 16
+PUBLISH_TIMEZONE = ZoneInfo("Europe/Berlin")
+
+
+@dataclass(frozen=True)
+class RateCacheStats:
+    hits: int
+    misses: int
+    coalesced: int
+    size: int
+
+
+class RateCache:
+    """Cache of exchange rate lookups made on one event loop.
+
+    Entries are keyed on the upper-cased currency pair and the date. Rates of
+    a past date never change and are kept until evicted by the `max_entries`
+    LRU bound. "latest" and today's rates expire after `latest_ttl` seconds,
+    and never later than the next upstream publication. Lookups missing the
+    same key at the same time share a single fetch. Responses with an "error"
+    key are passed on but not cached.
+    """
+
+    def __init__(
+        self,
+        latest_ttl: float = 900.0,
+        max_entries: int = 4096,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.latest_ttl = latest_ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[RateKey, Tuple[Dict[str, Any], float]]" = (
+            OrderedDict()
+        )
+        self._flights: Dict[RateKey, "asyncio.Task[Dict[str, Any]]"] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def key(currency_from: str, currency_to: str, currency_date: str) -> RateKey:
+        return (
+            currency_from.strip().upper(),
+            currency_to.strip().upper(),
+            currency_date.strip().lower() or "latest",
+        )
+
+    async def aget(
+        self,
+        currency_from: str,
+        currency_to: str,
+        currency_date: str,
+        fetch: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """Return the cached rates, awaiting `fetch` on a miss."""
+        key = self.key(currency_from, currency_to, currency_date)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(fetch())
+            flight.add_done_callback(lambda done: self._land(key, done))
+            self._flights[key] = flight
+            self.misses += 1
+        else:
+            self.coalesced += 1
+        # Shielded, so a cancelled lookup leaves the fetch to the others.
+        return copy.deepcopy(await asyncio.shield(flight))
+
+    def stats(self) -> RateCacheStats:
+        return RateCacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            coalesced=self.coalesced,
+            size=len(self._entries),
+        )
+
+    def collect(self) -> List[CounterFamily]:
+        """Metric families for `ServerMetrics.register`."""
+        stats = self.stats()
+        lookups = CounterFamily(
+            "currency_rate_cache_lookups_total",
+            "Exchange rate lookups, by result.",
+            ("result",),
+        )
+        lookups.inc("hit", amount=stats.hits)
+        lookups.inc("miss", amount=stats.misses)
+        lookups.inc("coalesced", amount=stats.coalesced)
+        size = GaugeFamily("currency_rate_cache_entries", "Exchange rates cached.", ())
+        size.set(value=stats.size)
+        return [lookups, size]
+
+    def _lookup(self, key: RateKey) -> Optional[Dict[str, Any]]:
+        cached = self._entries.get(key)
+        if cached is None or cached[1] <= self._clock():
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return copy.deepcopy(cached[0])
+
+    def _land(self, key: RateKey, flight: "asyncio.Task[Dict[str, Any]]") -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Retrieving the exception also keeps asyncio from logging it when
+        # every lookup waiting for it was cancelled.
+        if flight.cancelled() or flight.exception() is not None:
+            return
+        value = flight.result()
+        if "error" not in value:
+            self._store(key, value)
+
+    def _store(self, key: RateKey, value: Dict[str, Any]) -> None:
+        self._entries[key] = (value, self._expiry(key[2]))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _expiry(self, currency_date: str) -> float:
+        now = self._clock()
+        today = datetime.fromtimestamp(now, timezone.utc).date()
+        try:
+            historical = date.fromisoformat(currency_date) < today
+        except ValueError:
+            historical = False
+        if historical:
+            return float("inf")
+        return min(now + self.latest_ttl, _next_publication(now))
+
+
+def _next_publication(now: float) -> float:
+    """The timestamp of the first 16:00 in Frankfurt after `now`."""
+    current = datetime.fromtimestamp(now, PUBLISH_TIMEZONE)
+    # Wall-clock arithmetic: the next day's 16:00 keeps its own UTC offset.
+    publication = current.replace(hour=PUBLISH_HOUR, minute=0, second=0, microsecond=0)
+    if publication <= current:
+        publication += timedelta(days=1)
+    return publication.timestamp()
+
+
+class UnknownCurrency(ValueError):
+    def __init__(self, currency: str) -> None:
+        super().__init__(f"Unknown currency: {currency}")
+        self.currency = currency
+
+
+class RateTable:
+    """The rates of every currency against one base on one date.
+
+    Rates are held in a flat array of doubles indexed by currency, so a cross
+    rate is the ratio of two entries. Tables are not modified once built, and
+    copies share them.
+    """
+
+    __slots__ = ("base", "date", "currencies", "_index", "_rates")
+
+    def __init__(self, base: str, date: str, rates: Mapping[str, float]) -> None:
+        self.base = base.upper()
+        self.date = date
+        others = sorted(
+            currency.upper() for currency in rates if currency.upper() != self.base
+        )
+        self.currencies: Tuple[str, ...] = (self.base, *others)
+        self._index = {currency: i for i, currency in enumerate(self.currencies)}
+        upper = {currency.upper(): rate for currency, rate in rates.items()}
+        self._rates = array("d", [1.0, *(float(upper[c]) for c in others)])
+
+    @classmethod
+    def from_response(cls, data: Mapping[str, Any]) -> "RateTable":
+        """Build a table from a Frankfurter response for all currencies."""
+        return cls(data["base"], data["date"], data["rates"])
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "RateTable":
+        return self
+
+    def __contains__(self, currency: str) -> bool:
+        return currency.strip().upper() in self._index
+
+    def rate(self, currency_from: str, currency_to: str) -> float:
+        """The price of one `currency_from` in `currency_to`.
+
+        Raises:
+            UnknownCurrency: If the table has no rate for either currency.
+        """
+        rates = self._rates
+        return rates[self._position(currency_to)] / rates[self._position(currency_from)]
+
+    def rates(self, pairs: Iterable[Tuple[str, str]]) -> List[float]:
+        """The rates of a batch of `(currency_from, currency_to)` pairs.
+
+        Raises:
+            UnknownCurrency: If the table has no rate for a currency.
+        """
+        rates = self._rates
+        position = self._position
+        return [
+            rates[position(target)] / rates[position(source)]
+            for source, target in pairs
+        ]
+
+    def convert(self, conversions: Iterable[Tuple[str, str, float]]) -> List[float]:
+        """Convert each `(currency_from, currency_to, amount)` of a batch.
+
+        Raises:
+            UnknownCurrency: If the table has no rate for a currency.
+        """
+        conversions = list(conversions)
+        rates = self.rates((source, target) for source, target, _ in conversions)
+        return [amount * rate for (_, _, amount), rate in zip(conversions, rates)]
+
+    def _position(self, currency: str) -> int:
+        # Currency codes usually come normalized already.
+        position = self._index.get(currency)
+        if position is not None:
+            return position
+        try:
+            return self._index[currency.strip().upper()]
+        except KeyError:
+            raise UnknownCurrency(currency) from None
+
+
+class RatesEngine:
+    """Exchange rates and conversions computed from one rate table per date.
+
+    The table of all rates against `base` is fetched with a single request
+    per date, cached in `cache` like any other lookup, and every pair of
+    currencies is derived from it locally.
+    """
+
+    def __init__(self, fetch: FetchRates, cache: RateCache, base: str = "EUR") -> None:
+        self.fetch = fetch
+        self.cache = cache
+        self.base = base
+
+    async def table(self, currency_date: str = "latest") -> RateTable:
+        """The rate table of a date.
+
+        Raises:
+            LookupError: If the table could not be fetched.
+        """
+        entry = await self.cache.aget(
+            self.base, "*", currency_date, lambda: self._fetch_table(currency_date)
+        )
+        if "error" in entry:
+            raise LookupError(entry["error"])
+        return entry["table"]
+
+    async def exchange_rate(
+        self, currency_from: str, currency_to: str, currency_date: str = "latest"
+    ) -> Dict[str, Any]:
+        """One rate, in the shape of a Frankfurter response, or an "error"."""
+        try:
+            table = await self.table(currency_date)
+            rate = table.rate(currency_from, currency_to)
+        except (LookupError, UnknownCurrency) as e:
+            return {"error": str(e)}
+        return {
+            "amount": 1.0,
+            "base": currency_from.strip().upper(),
+            "date": table.date,
+            "rates": {currency_to.strip().upper(): rate},
+        }
+
+    async def convert(
+        self, conversions: Sequence[Tuple[str, str, float, str]]
+    ) -> List[Dict[str, Any]]:
+        """Convert a batch of `(currency_from, currency_to, amount, date)`.
+
+        The tables of the dates involved are fetched concurrently, one per
+        date, and the conversions of each date computed together. Each result
+        holds the rate and converted amount, or an "error".
+        """
+        results: List[Dict[str, Any]] = [
+            {
+                "from": currency_from.strip().upper(),
+                "to": currency_to.strip().upper(),
+                "amount": amount,
+            }
+            for currency_from, currency_to, amount, _ in conversions
+        ]
+        by_date: Dict[str, List[int]] = {}
+        for i, conversion in enumerate(conversions):
+            by_date.setdefault(conversion[3], []).append(i)
+        tables = await asyncio.gather(
+            *(self._table_or_error(currency_date) for currency_date in by_date)
+        )
+
+        for indexes, table in zip(by_date.values(), tables):
+            if isinstance(table, LookupError):
+                for i in indexes:
+                    results[i]["error"] = str(table)
+                continue
+            known = []
+            for i in indexes:
+                missing = [c for c in conversions[i][:2] if c not in table]
+                if missing:
+                    results[i]["error"] = str(UnknownCurrency(missing[0]))
+                else:
+                    known.append(i)
+            rates = table.rates(conversions[i][:2] for i in known)
+            for i, rate in zip(known, rates):
+                results[i].update(
+                    date=table.date, rate=rate, converted=conversions[i][2] * rate
+                )
+        return results
+
+    async def _table_or_error(
+        self, currency_date: str
+    ) -> Union[RateTable, LookupError]:
+        try:
+            return await self.table(currency_date)
+        except LookupError as e:
+            return e
+
+    async def _fetch_table(self, currency_date: str) -> Dict[str, Any]:
+        data = await self.fetch(self.base, None, currency_date)
+        if "error" in data:
+            return data
+        try:
+            return {"table": RateTable.from_response(data)}
+        except (KeyError, TypeError, ValueError):
+            return {"error": "Invalid API response format."}
@@ -1,5 +1,7 @@
 from typing import AsyncIterable
 from common.types import (
+    CancelTaskRequest,
+    CancelTaskResponse,
     SendTaskRequest,
     TaskSendParams,
     Message,
@@ -24,11 +26,13 @@ from common.types import (
     InvalidParamsError,
 )
 from common.server.task_manager import InMemoryTaskManager
-from agents.langgraph.agent import CurrencyAgent
+from common.server.task_store import TaskStore
+from common.server.event_bus import EventBus
+from .agent import CurrencyAgent, frankfurter
 from common.utils.push_notification_auth import PushNotificationSenderAuth
 import common.server.utils as utils
-from typing import Union
 import asyncio
+from typing import Optional, Union
 import logging
 import traceback
 
@@ -36,17 +40,36 @@ logger = logging.getLogger(__name__)
 
 
 class AgentTaskManager(InMemoryTaskManager):
-    def __init__(self, agent: CurrencyAgent, notification_sender_auth: PushNotificationSenderAuth):
-        super().__init__()
+    def __init__(
+        self,
+        agent: CurrencyAgent,
+        notification_sender_auth: PushNotificationSenderAuth,
+        task_store: Optional[TaskStore] = None,
+        event_bus: Optional[EventBus] = None,
+        max_concurrency: int = 16,
+    ):
+        super().__init__(task_store=task_store, event_bus=event_bus)
         self.agent = agent
         self.notification_sender_auth = notification_sender_auth
+        # Bounds the agent runs, streamed or not, in flight at once; the
+        # others wait for a slot without holding up the event loop.
+        self.agent_slots = asyncio.Semaphore(max_concurrency)
+
+    async def close(self) -> None:
+        await super().close()
+        await frankfurter.aclose()
+
+    async def _stream_agent(self, query, session_id) -> AsyncIterable[dict]:
+        async with self.agent_slots:
+            async for item in self.agent.stream(query, session_id):
+                yield item
 
     async def _run_streaming_agent(self, request: SendTaskStreamingRequest):
         task_send_params: TaskSendParams = request.params
         query = self._get_user_query(task_send_params)
 
         try:
-            async for item in self.agent.stream(query, task_send_params.sessionId):
+            async for item in self._stream_agent(query, task_send_params.sessionId):
                 is_task_complete = item["is_task_complete"]
                 require_user_input = item["require_user_input"]
                 artifact = None
@@ -67,11 +90,14 @@ class AgentTaskManager(InMemoryTaskManager):
                     end_stream = True
 
                 task_status = TaskStatus(state=task_state, message=message)
-                latest_task = await self.update_store(
+                latest_task = await self.update_store_if_active(
                     task_send_params.id,
                     task_status,
                     None if artifact is None else [artifact],
                 )
+                if latest_task is None:
+                    # Cancelled; the cancellation sent the final event.
+                    return
                 await self.send_task_notification(latest_task)
 
                 if artifact:
@@ -135,8 +161,23 @@ class AgentTaskManager(InMemoryTaskManager):
 
         task_send_params: TaskSendParams = request.params
         query = self._get_user_query(task_send_params)
+        # Run the agent as tracked work of the task, so tasks/cancel stops it.
+        run = self.task_registry.spawn(
+            task_send_params.id, self._invoke_agent(query, task_send_params.sessionId)
+        )
+        try:
+            await asyncio.wait({run})
+        except asyncio.CancelledError:
+            run.cancel()
+            raise
+        if run.cancelled():
+            task = await self.task_store.get_task(task_send_params.id)
+            return SendTaskResponse(
+                id=request.id,
+                result=self.append_task_history(task, task_send_params.historyLength),
+            )
         try:
-            agent_response = self.agent.invoke(query, task_send_params.sessionId)
+            agent_response = run.result()
         except Exception as e:
             logger.error(f"Error invoking agent: {e}")
             raise ValueError(f"Error invoking agent: {e}")
@@ -144,6 +185,10 @@ class AgentTaskManager(InMemoryTaskManager):
             request, agent_response
         )
 
+    async def _invoke_agent(self, query, session_id) -> dict:
+        async with self.agent_slots:
+            return await self.agent.invoke(query, session_id)
+
     async def on_send_task_subscribe(
         self, request: SendTaskStreamingRequest
     ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
@@ -159,9 +204,15 @@ class AgentTaskManager(InMemoryTaskManager):
                     return JSONRPCResponse(id=request.id, error=InvalidParamsError(message="Push notification URL is invalid"))
 
             task_send_params: TaskSendParams = request.params
+            # Also reopens a task a previous turn left completed, failed or
+            # canceled, so the writes of this run are not refused.
+            task = await self.update_store(
+                task_send_params.id, TaskStatus(state=TaskState.WORKING), None
+            )
+            await self.send_task_notification(task)
             sse_event_queue = await self.setup_sse_consumer(task_send_params.id, False)            
 
-            asyncio.create_task(self._run_streaming_agent(request))
+            self.task_registry.spawn(task_send_params.id, self._run_streaming_agent(request))
 
             return self.dequeue_events_for_sse(
                 request.id, task_send_params.id, sse_event_queue
@@ -195,13 +246,33 @@ class AgentTaskManager(InMemoryTaskManager):
         else:
             task_status = TaskStatus(state=TaskState.COMPLETED)
             artifact = Artifact(parts=parts)
-        task = await self.update_store(
+        task = await self.update_store_if_active(
             task_id, task_status, None if artifact is None else [artifact]
         )
+        if task is None:
+            # Cancelled while the agent was answering; keep the final status.
+            task = await self.task_store.get_task(task_id)
+            return SendTaskResponse(
+                id=request.id, result=self.append_task_history(task, history_length)
+            )
         task_result = self.append_task_history(task, history_length)
         await self.send_task_notification(task)
         return SendTaskResponse(id=request.id, result=task_result)
     
+    async def on_cancel_task(self, request: CancelTaskRequest) -> CancelTaskResponse:
+        response = await super().on_cancel_task(request)
+        if response.result is not None:
+            task = await self.task_store.get_task(request.params.id)
+            if task is not None:
+                await self.send_task_notification(task)
+        return response
+
+    async def interrupt_task(self, task_id: str) -> None:
+        await super().interrupt_task(task_id)
+        task = await self.task_store.get_task(task_id)
+        if task is not None:
+            await self.send_task_notification(task)
+
     def _get_user_query(self, task_send_params: TaskSendParams) -> str:
         part = task_send_params.message.parts[0]
         if not isinstance(part, TextPart):
@@ -217,25 +288,9 @@ class AgentTaskManager(InMemoryTaskManager):
         logger.info(f"Notifying for task {task.id} => {task.status.state}")
         await self.notification_sender_auth.send_push_notification(
             push_info.url,
-            data=task.model_dump(exclude_none=True)
+            data=self.task_document(task)
         )
 
-    async def on_resubscribe_to_task(
-        self, request
-    ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
-        task_id_params: TaskIdParams = request.params
-        try:
-            sse_event_queue = await self.setup_sse_consumer(task_id_params.id, True)
-            return self.dequeue_events_for_sse(request.id, task_id_params.id, sse_event_queue)
-        except Exception as e:
-            logger.error(f"Error while reconnecting to SSE stream: {e}")
-            return JSONRPCResponse(
-                id=request.id,
-                error=InternalError(
-                    message=f"An error occurred while reconnecting to stream: {e}"
-                ),
-            )
-    
     async def set_push_notification_info(self, task_id: str, push_notification_config: PushNotificationConfig):
         # Verify the ownership of notification URL by issuing a challenge request.
         is_verified = await self.notification_sender_auth.verify_push_notification_url(push_notification_config.url)
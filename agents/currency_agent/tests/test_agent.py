@@ -0,0 +1,174 @@
+import asyncio
+from typing import Any, List
+
+import pytest
+from currency_agent.rates import RateCache, RatesEngine
+
+# The agent needs LangGraph and the Gemini client.
+agent = pytest.importorskip("currency_agent.agent")
+messages = pytest.importorskip("langchain_core.messages")
+from langchain_core.language_models import BaseChatModel  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatResult  # noqa: E402
+from langchain_core.runnables import RunnableLambda  # noqa: E402
+
+
+class StubGemini(BaseChatModel):
+    """Answers with canned messages after a delay, only through the async API."""
+
+    replies: List[Any]
+    final: Any
+    delay: float = 0.05
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-gemini"
+
+    def _generate(self, *args, **kwargs):
+        raise AssertionError("the model was called synchronously")
+
+    async def _agenerate(self, *args, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.delay)
+        return ChatResult(generations=[ChatGeneration(message=self.replies.pop(0))])
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def with_structured_output(self, schema, **kwargs):
+        async def respond(messages):
+            await asyncio.sleep(self.delay)
+            return self.final
+
+        def block(messages):
+            raise AssertionError("the model was called synchronously")
+
+        return RunnableLambda(block, afunc=respond)
+
+
+class StubGraph:
+    def __init__(self, states) -> None:
+        self.states = states
+        self.calls = []
+
+    async def astream(self, inputs, config, stream_mode):
+        self.calls.append((inputs, config, stream_mode))
+        for state in self.states:
+            await asyncio.sleep(0)
+            yield state
+
+    def get_state(self, config):
+        raise AssertionError("the final state is the last one streamed")
+
+
+def test_stream_yields_updates_in_order():
+    lookup = messages.AIMessage(
+        content="",
+        tool_calls=[
+            {
+                "name": "get_exchange_rate",
+                "args": {"currency_from": "USD", "currency_to": "EUR"},
+                "id": "call-1",
+            }
+        ],
+    )
+    rates = messages.ToolMessage(
+        content='{"rates": {"EUR": 0.92}}', tool_call_id="call-1"
+    )
+    answer = messages.AIMessage(content="1 USD is 0.92 EUR.")
+    graph = StubGraph(
+        [
+            {"messages": [messages.HumanMessage(content="USD to EUR?")]},
+            {"messages": [lookup]},
+            {"messages": [lookup, rates]},
+            {
+                "messages": [lookup, rates, answer],
+                "structured_response": agent.ResponseFormat(
+                    status="completed", message="1 USD is 0.92 EUR."
+                ),
+            },
+        ]
+    )
+    currency_agent = agent.CurrencyAgent.__new__(agent.CurrencyAgent)
+    currency_agent.graph = graph
+
+    async def updates():
+        return [item async for item in currency_agent.stream("USD to EUR?", "s-1")]
+
+    assert asyncio.run(updates()) == [
+        {
+            "is_task_complete": False,
+            "require_user_input": False,
+            "content": "Looking up the exchange rates...",
+        },
+        {
+            "is_task_complete": False,
+            "require_user_input": False,
+            "content": "Processing the exchange rates..",
+        },
+        {
+            "is_task_complete": True,
+            "require_user_input": False,
+            "content": "1 USD is 0.92 EUR.",
+        },
+    ]
+    assert graph.calls == [
+        (
+            {"messages": [("user", "USD to EUR?")]},
+            {"configurable": {"thread_id": "s-1"}},
+            "values",
+        )
+    ]
+
+
+def test_agent_runs_the_graph_without_blocking_the_loop(monkeypatch):
+    lookup = messages.AIMessage(
+        content="",
+        tool_calls=[
+            {
+                "name": "get_exchange_rate",
+                "args": {"currency_from": "USD", "currency_to": "EUR"},
+                "id": "call-1",
+            }
+        ],
+    )
+    model = StubGemini(
+        replies=[lookup, messages.AIMessage(content="1 USD is 0.92 EUR.")],
+        final=agent.ResponseFormat(status="completed", message="1 USD is 0.92 EUR."),
+    )
+    fetches = []
+
+    async def fetch(base, currency_to, currency_date):
+        fetches.append((base, currency_to, currency_date))
+        await asyncio.sleep(0.01)
+        return {"base": base, "date": "2024-03-01", "rates": {"USD": 1.08}}
+
+    monkeypatch.setattr(agent, "ChatGoogleGenerativeAI", lambda **kwargs: model)
+    monkeypatch.setattr(agent, "rates_engine", RatesEngine(fetch, RateCache()))
+    currency_agent = agent.CurrencyAgent()
+
+    async def scenario():
+        ticks = 0
+        done = asyncio.Event()
+
+        async def ticker():
+            nonlocal ticks
+            while not done.is_set():
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        ticking = asyncio.ensure_future(ticker())
+        updates = [item async for item in currency_agent.stream("USD?", "s-graph")]
+        done.set()
+        await ticking
+        return updates, ticks
+
+    updates, ticks = asyncio.run(scenario())
+
+    assert [update["content"] for update in updates] == [
+        "Looking up the exchange rates...",
+        "Processing the exchange rates..",
+        "1 USD is 0.92 EUR.",
+    ]
+    assert updates[-1]["is_task_complete"]
+    assert fetches == [("EUR", None, "latest")]
+    # Three model calls of 50ms each; the loop kept running meanwhile.
+    assert ticks >= 15
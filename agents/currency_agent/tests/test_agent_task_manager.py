@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+from common.types import (
+    Message,
+    SendTaskStreamingRequest,
+    TaskSendParams,
+    TaskState,
+    TextPart,
+)
+from common.utils.push_notification_auth import PushNotificationSenderAuth
+
+# The task manager imports the agent, which needs LangGraph.
+task_manager = pytest.importorskip("currency_agent.task_manager")
+
+
+class StubAgent:
+    """Streams one working update, then completes with the query echoed."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.runs = 0
+
+    async def stream(self, query, session_id):
+        self.runs += 1
+        yield {
+            "is_task_complete": False,
+            "require_user_input": False,
+            "content": "Looking up the exchange rates...",
+        }
+        await asyncio.sleep(self.delay)
+        yield {
+            "is_task_complete": True,
+            "require_user_input": False,
+            "content": f"Answered {query}",
+        }
+
+
+def subscribe_request(task_id: str, text: str) -> SendTaskStreamingRequest:
+    return SendTaskStreamingRequest(
+        params=TaskSendParams(
+            id=task_id,
+            sessionId="s-1",
+            message=Message(role="user", parts=[TextPart(text=text)]),
+        )
+    )
+
+
+async def stream_turn(manager, task_id: str, text: str) -> list:
+    stream = await manager.on_send_task_subscribe(subscribe_request(task_id, text))
+    return [event.entry.event async for event in stream]
+
+
+def make_manager(agent: StubAgent):
+    return task_manager.AgentTaskManager(
+        agent=agent, notification_sender_auth=PushNotificationSenderAuth()
+    )
+
+
+def test_second_streaming_turn_on_a_finished_task():
+    agent = StubAgent()
+    manager = make_manager(agent)
+
+    async def scenario():
+        first = await asyncio.wait_for(stream_turn(manager, "t1", "USD?"), 5)
+        second = await asyncio.wait_for(stream_turn(manager, "t1", "GBP?"), 5)
+        return first, second, await manager.task_store.get_task("t1")
+
+    first, second, task = asyncio.run(scenario())
+
+    assert first[-1].final and first[-1].status.state == TaskState.COMPLETED
+    assert second[-1].final and second[-1].status.state == TaskState.COMPLETED
+    assert second[-2].artifact.parts[0].text == "Answered GBP?"
+    assert agent.runs == 2
+    assert task.status.state == TaskState.COMPLETED
+    assert [message.role for message in task.history].count("user") == 2
+
+
+def test_task_interrupted_by_a_drain_can_be_sent_again():
+    agent = StubAgent(delay=3600)
+    manager = make_manager(agent)
+
+    async def scenario():
+        interrupted = asyncio.ensure_future(stream_turn(manager, "t1", "USD?"))
+        while agent.runs == 0:
+            await asyncio.sleep(0.001)
+        await manager.drain(timeout=0)
+        first = await asyncio.wait_for(interrupted, 5)
+
+        agent.delay = 0
+        second = await asyncio.wait_for(stream_turn(manager, "t1", "USD?"), 5)
+        return first, second, await manager.task_store.get_task("t1")
+
+    first, second, task = asyncio.run(scenario())
+
+    assert first[-1].final and first[-1].status.state == TaskState.FAILED
+    assert [event.status.state for event in second if hasattr(event, "status")] == [
+        TaskState.WORKING,
+        TaskState.COMPLETED,
+    ]
+    assert second[-1].final
+    assert task.status.state == TaskState.COMPLETED
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+import pytest
+from currency_agent.frankfurter import FrankfurterClient
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        self.server.requests.append((url.path, parse_qs(url.query)))
+        self.server.peers.add(self.client_address)
+        if url.path == "/broken":
+            status, body = 200, b"not json"
+        elif url.path == "/slow":
+            threading.Event().wait(0.5)
+            status, body = 200, b"{}"
+        elif url.path == "/2024-02-30":
+            status, body = 404, b'{"message": "not found"}'
+        else:
+            status = 200
+            body = json.dumps(
+                {"base": "USD", "date": "2024-03-01", "rates": {"EUR": 0.92}}
+            ).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.requests, server.peers = [], set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def stub_url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_base_url_from_environment(monkeypatch, stub):
+    monkeypatch.setenv("FRANKFURTER_API_URL", stub_url(stub))
+    client = FrankfurterClient()
+
+    async def lookup():
+        try:
+            return await client.arates("USD", "EUR")
+        finally:
+            await client.aclose()
+
+    rates = asyncio.run(lookup())
+
+    assert rates["rates"] == {"EUR": 0.92}
+    assert stub.requests == [("/latest", {"from": ["USD"], "to": ["EUR"]})]
+
+
+def test_async_requests_reuse_connections(stub):
+    client = FrankfurterClient(stub_url(stub))
+
+    async def lookup():
+        for _ in range(5):
+            await client.arates("USD", currency_date="2024-03-01")
+        await client.aclose()
+
+    asyncio.run(lookup())
+
+    assert len(stub.requests) == 5
+    assert stub.requests[0] == ("/2024-03-01", {"from": ["USD"]})
+    assert len(stub.peers) == 1
+
+
+def test_failures_become_error_responses(stub):
+    client = FrankfurterClient(stub_url(stub), timeout=httpx.Timeout(0.1, connect=1.0))
+
+    async def lookup(currency_date):
+        return await client.arates("USD", "EUR", currency_date)
+
+    async def lookups():
+        try:
+            return [await lookup(day) for day in ("2024-02-30", "broken", "slow")]
+        finally:
+            await client.aclose()
+
+    missing, broken, slow = asyncio.run(lookups())
+
+    assert missing["error"].startswith("API request failed")
+    assert broken == {"error": "Invalid JSON response from API."}
+    assert slow["error"].startswith("API request failed")
+
+
+def test_aclose_closes_the_pools_of_every_loop(stub):
+    client = FrankfurterClient(stub_url(stub))
+    other = asyncio.new_event_loop()
+    thread = threading.Thread(target=other.run_forever, daemon=True)
+    thread.start()
+
+    async def lookup():
+        await client.arates("USD")
+        return client._async_clients[asyncio.get_running_loop()]
+
+    async def lookups():
+        elsewhere = asyncio.run_coroutine_threadsafe(lookup(), other)
+        pools = [await lookup(), await asyncio.wrap_future(elsewhere)]
+        await client.aclose()
+        return pools
+
+    try:
+        here, elsewhere = asyncio.run(lookups())
+    finally:
+        other.call_soon_threadsafe(other.stop)
+        thread.join(5)
+        other.close()
+
+    assert here is not elsewhere
+    assert here.is_closed and elsewhere.is_closed
+    assert len(client._async_clients) == 0
@@ -0,0 +1,254 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from common.server.metrics import ServerMetrics
+from currency_agent.rates import RateCache, RatesEngine, RateTable, UnknownCurrency
+
+# 2024-03-01 10:00 UTC, five hours before the day's publication.
+MORNING = datetime(2024, 3, 1, 10, tzinfo=timezone.utc).timestamp()
+
+
+class Clock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Fetcher:
+    def __init__(self, result=None) -> None:
+        self.calls = 0
+        self.result = result or {"base": "USD", "rates": {"EUR": 0.92}}
+
+    async def __call__(self):
+        self.calls += 1
+        return self.result
+
+
+def lookup(cache, currency_from, currency_to, currency_date, fetch):
+    return asyncio.run(cache.aget(currency_from, currency_to, currency_date, fetch))
+
+
+def test_hits_share_normalized_key():
+    cache = RateCache(clock=Clock(MORNING))
+    fetch = Fetcher()
+
+    first = lookup(cache, "usd", "eur", "latest", fetch)
+    first["rates"]["EUR"] = 0
+    second = lookup(cache, " USD", "EUR ", "LATEST", fetch)
+
+    assert fetch.calls == 1
+    assert second["rates"]["EUR"] == 0.92
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.size) == (1, 1, 1)
+
+
+def test_latest_expires_at_publication_historical_never():
+    clock = Clock(MORNING)
+    cache = RateCache(latest_ttl=24 * 3600, clock=clock)
+    latest, historical = Fetcher(), Fetcher()
+    lookup(cache, "USD", "EUR", "latest", latest)
+    lookup(cache, "USD", "EUR", "2024-02-01", historical)
+
+    clock.now += 4 * 3600
+    lookup(cache, "USD", "EUR", "latest", latest)
+    assert latest.calls == 1
+
+    clock.now += 2 * 3600
+    lookup(cache, "USD", "EUR", "latest", latest)
+    clock.now += 365 * 24 * 3600
+    lookup(cache, "USD", "EUR", "2024-02-01", historical)
+    assert latest.calls == 2
+    assert historical.calls == 1
+
+
+def test_publication_follows_frankfurt_summer_time():
+    # 2024-07-01 13:00 UTC is 15:00 CEST, an hour before the publication.
+    clock = Clock(datetime(2024, 7, 1, 13, tzinfo=timezone.utc).timestamp())
+    cache = RateCache(latest_ttl=24 * 3600, clock=clock)
+    fetch = Fetcher()
+    lookup(cache, "USD", "EUR", "latest", fetch)
+
+    clock.now += 50 * 60
+    lookup(cache, "USD", "EUR", "latest", fetch)
+    assert fetch.calls == 1
+
+    # 14:00 UTC is 16:00 CEST.
+    clock.now += 10 * 60
+    lookup(cache, "USD", "EUR", "latest", fetch)
+    assert fetch.calls == 2
+
+
+def test_latest_ttl():
+    clock = Clock(MORNING)
+    cache = RateCache(latest_ttl=60, clock=clock)
+    fetch = Fetcher()
+    lookup(cache, "USD", "EUR", "2024-03-01", fetch)
+    clock.now += 61
+    lookup(cache, "USD", "EUR", "2024-03-01", fetch)
+
+    assert fetch.calls == 2
+
+
+def test_errors_are_not_cached():
+    cache = RateCache(clock=Clock(MORNING))
+    fetch = Fetcher({"error": "API request failed"})
+
+    assert lookup(cache, "USD", "EUR", "latest", fetch) == {
+        "error": "API request failed"
+    }
+    lookup(cache, "USD", "EUR", "latest", fetch)
+    assert fetch.calls == 2
+    assert cache.stats().size == 0
+
+    async def fail():
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError):
+        lookup(cache, "USD", "EUR", "latest", fail)
+    assert cache.stats().size == 0
+
+
+def test_max_entries_evicts_least_recently_used():
+    cache = RateCache(max_entries=2, clock=Clock(MORNING))
+    fetch = Fetcher()
+    lookup(cache, "USD", "EUR", "latest", fetch)
+    lookup(cache, "USD", "GBP", "latest", fetch)
+    lookup(cache, "USD", "EUR", "latest", fetch)
+    lookup(cache, "USD", "JPY", "latest", fetch)
+    lookup(cache, "USD", "EUR", "latest", fetch)
+
+    assert fetch.calls == 3
+    assert cache.stats().size == 2
+
+
+def test_registered_collector_is_rendered():
+    cache = RateCache(clock=Clock(MORNING))
+    lookup(cache, "USD", "EUR", "latest", Fetcher())
+    metrics = ServerMetrics()
+    metrics.register(cache.collect)
+
+    text = metrics.render()
+
+    assert 'currency_rate_cache_lookups_total{result="miss"} 1' in text
+    assert "currency_rate_cache_entries 1" in text
+
+
+def test_concurrent_async_misses_share_one_fetch():
+    cache = RateCache(clock=Clock(MORNING))
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"rates": {"EUR": 0.92}}
+
+    async def lookups():
+        first = await asyncio.gather(
+            *(cache.aget("USD", "EUR", "latest", fetch) for _ in range(8))
+        )
+        return first + [await cache.aget("usd", "eur", "latest", fetch)]
+
+    results = asyncio.run(lookups())
+
+    assert len(calls) == 1
+    assert results == [{"rates": {"EUR": 0.92}}] * 9
+    stats = cache.stats()
+    assert (stats.misses, stats.coalesced, stats.hits) == (1, 7, 1)
+
+
+def test_cancelled_async_lookup_leaves_fetch_to_others():
+    cache = RateCache(clock=Clock(MORNING))
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        return {"rates": {"EUR": 0.92}}
+
+    async def lookups():
+        leader = asyncio.ensure_future(cache.aget("USD", "EUR", "latest", fetch))
+        follower = asyncio.ensure_future(cache.aget("USD", "EUR", "latest", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(lookups()) == {"rates": {"EUR": 0.92}}
+    assert cache.stats().size == 1
+
+
+# --- RateTable and RatesEngine tests ---
+TABLE = {
+    "amount": 1.0,
+    "base": "EUR",
+    "date": "2024-03-01",
+    "rates": {"USD": 1.08, "GBP": 0.855, "JPY": 162.0},
+}
+
+
+def test_rate_table_cross_rates():
+    table = RateTable.from_response(TABLE)
+
+    assert table.currencies == ("EUR", "GBP", "JPY", "USD")
+    assert table.rate("EUR", "GBP") == 0.855
+    assert table.rate("usd", "jpy") == pytest.approx(150.0)
+    assert table.rates([("GBP", "EUR"), ("USD", "USD")]) == [
+        pytest.approx(1 / 0.855),
+        1.0,
+    ]
+    assert table.convert([("USD", "GBP", 108.0)]) == [pytest.approx(85.5)]
+    with pytest.raises(UnknownCurrency):
+        table.rate("EUR", "XXX")
+
+
+class TableFetcher:
+    def __init__(self) -> None:
+        self.calls = []
+
+    async def __call__(self, base, currency_to, currency_date):
+        self.calls.append((base, currency_to, currency_date))
+        if currency_date == "1900-01-01":
+            return {"error": "API request failed: 404"}
+        return dict(TABLE, date=currency_date)
+
+
+def test_engine_fetches_one_table_per_date():
+    fetch = TableFetcher()
+    engine = RatesEngine(fetch, RateCache(clock=Clock(MORNING)))
+
+    async def lookups():
+        rate = await engine.exchange_rate("usd", "jpy", "2024-03-01")
+        results = await engine.convert(
+            [
+                ("EUR", "GBP", 10.0, "2024-03-01"),
+                ("EUR", "XXX", 1.0, "2024-03-01"),
+                ("USD", "EUR", 1.08, "2024-02-01"),
+                ("USD", "EUR", 1.0, "1900-01-01"),
+            ]
+        )
+        return rate, results
+
+    rate, (gbp, unknown, usd, missing) = asyncio.run(lookups())
+
+    assert rate == {
+        "amount": 1.0,
+        "base": "USD",
+        "date": "2024-03-01",
+        "rates": {"JPY": pytest.approx(150.0)},
+    }
+    assert gbp["converted"] == pytest.approx(8.55)
+    assert gbp["date"] == "2024-03-01"
+    assert unknown["error"] == "Unknown currency: XXX"
+    assert usd["rate"] == pytest.approx(1 / 1.08)
+    assert usd["converted"] == pytest.approx(1.0)
+    assert missing == {
+        "from": "USD",
+        "to": "EUR",
+        "amount": 1.0,
+        "error": "API request failed: 404",
+    }
+    assert sorted(fetch.calls) == [
+        ("EUR", None, "1900-01-01"),
+        ("EUR", None, "2024-02-01"),
+        ("EUR", None, "2024-03-01"),
+    ]
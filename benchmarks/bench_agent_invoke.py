@@ -0,0 +1,195 @@
+"""Benchmark tasks/get latency while tasks/send calls wait on the agent.
+
+Sends a batch of tasks/send calls whose handler simulates an LLM round trip,
+and meanwhile polls tasks/get through the same A2AServer at a fixed rate,
+reporting the latency percentiles of the scheduled polls. The round trip is
+simulated three ways:
+
+    blocking  a synchronous call on the event loop, as agent.invoke was
+    thread    a synchronous call offloaded to a thread, bounded by a semaphore
+    async     an awaited call, as agent.invoke is now, bounded by a semaphore
+
+Usage:
+    PYTHONPATH=agents python benchmarks/bench_agent_invoke.py --sends 50
+"""
+
+import argparse
+import asyncio
+import math
+import statistics
+import time
+import uuid
+from typing import AsyncIterable, List, Union
+
+import httpx
+from common.server import A2AServer
+from common.server.event_journal import StreamEvent
+from common.server.task_manager import InMemoryTaskManager
+from common.types import (
+    AgentCapabilities,
+    AgentCard,
+    JSONRPCResponse,
+    SendTaskRequest,
+    SendTaskResponse,
+    SendTaskStreamingRequest,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+)
+
+
+class SimulatedAgentTaskManager(InMemoryTaskManager):
+    def __init__(self, mode: str, latency: float, max_concurrency: int) -> None:
+        super().__init__()
+        self.mode = mode
+        self.latency = latency
+        self.agent_slots = asyncio.Semaphore(max_concurrency)
+
+    async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
+        await self.upsert_task(request.params)
+        await self.update_store(
+            request.params.id, TaskStatus(state=TaskState.WORKING), None
+        )
+        await self._simulate_agent()
+        task = await self.update_store(
+            request.params.id, TaskStatus(state=TaskState.COMPLETED), None
+        )
+        return SendTaskResponse(id=request.id, result=task)
+
+    async def on_send_task_subscribe(
+        self, request: SendTaskStreamingRequest
+    ) -> Union[AsyncIterable[StreamEvent], JSONRPCResponse]:
+        task_id = request.params.id
+        await self.upsert_task(request.params)
+        queue = await self.setup_sse_consumer(task_id)
+        self.task_registry.spawn(task_id, self._stream(task_id))
+        return self.dequeue_events_for_sse(request.id, task_id, queue)
+
+    async def _stream(self, task_id: str) -> None:
+        await self._simulate_agent()
+        status = TaskStatus(state=TaskState.COMPLETED)
+        await self.update_store(task_id, status, None)
+        await self.enqueue_events_for_sse(
+            task_id, TaskStatusUpdateEvent(id=task_id, status=status, final=True)
+        )
+
+    async def _simulate_agent(self) -> None:
+        if self.mode == "blocking":
+            time.sleep(self.latency)
+            return
+        async with self.agent_slots:
+            if self.mode == "thread":
+                await asyncio.to_thread(time.sleep, self.latency)
+            else:
+                await asyncio.sleep(self.latency)
+
+
+def rpc(method: str, params: dict) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "id": uuid.uuid4().hex,
+        "method": method,
+        "params": params,
+    }
+
+
+def send_params(task_id: str) -> dict:
+    return {
+        "id": task_id,
+        "message": {"role": "user", "parts": [{"type": "text", "text": "USD to EUR?"}]},
+    }
+
+
+async def run(
+    mode: str,
+    sends: int,
+    pollers: int,
+    interval: float,
+    latency: float,
+    max_concurrency: int,
+) -> List[float]:
+    card = AgentCard(
+        name="Bench",
+        url="http://bench/",
+        version="1.0.0",
+        capabilities=AgentCapabilities(),
+        skills=[],
+    )
+    server = A2AServer(
+        agent_card=card,
+        task_manager=SimulatedAgentTaskManager(mode, latency, max_concurrency),
+    )
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        await client.post("/", json=rpc("tasks/send", send_params("polled")))
+
+        samples: List[float] = []
+        done = asyncio.Event()
+
+        async def poll() -> None:
+            # Latency counts from when each poll was due, so time spent
+            # waiting for a blocked event loop to run the poller is included.
+            # Polls that fell due while an earlier one was held up could not
+            # be sent; each is recorded as answered when the loop came back.
+            due = time.perf_counter()
+            while not done.is_set():
+                await client.post("/", json=rpc("tasks/get", {"id": "polled"}))
+                answered = time.perf_counter()
+                while due <= answered:
+                    samples.append(answered - due)
+                    due += interval
+                await asyncio.sleep(max(due - time.perf_counter(), 0))
+
+        polling = [asyncio.create_task(poll()) for _ in range(pollers)]
+        # Let the pollers start before the sends take the loop.
+        await asyncio.sleep(0.05)
+        await asyncio.gather(
+            *(
+                client.post("/", json=rpc("tasks/send", send_params(f"task-{i}")))
+                for i in range(sends)
+            )
+        )
+        done.set()
+        await asyncio.gather(*polling)
+    return samples
+
+
+def report(name: str, samples: List[float], elapsed: float) -> None:
+    ordered = sorted(samples)
+    p99 = ordered[math.ceil(len(ordered) * 0.99) - 1]
+    print(
+        f"{name:<9} sends done in {elapsed:6.2f}s  gets={len(samples):>6} "
+        f"p50={statistics.median(ordered) * 1e3:9.3f}ms "
+        f"p99={p99 * 1e3:9.3f}ms "
+        f"max={ordered[-1] * 1e3:9.3f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sends", type=int, default=50)
+    parser.add_argument("--pollers", type=int, default=4)
+    parser.add_argument("--interval", type=float, default=0.01)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--agent-concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    for mode in ("blocking", "thread", "async"):
+        started = time.perf_counter()
+        samples = asyncio.run(
+            run(
+                mode,
+                args.sends,
+                args.pollers,
+                args.interval,
+                args.latency,
+                args.agent_concurrency,
+            )
+        )
+        report(mode, samples, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
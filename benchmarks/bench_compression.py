@@ -0,0 +1,86 @@
+"""Benchmark bytes saved against CPU spent compressing `tasks/get` responses.
+
+Builds `tasks/get` response bodies of increasing size, a task with a long
+text history and a base64 file artifact, and reports the compressed size and
+the time to compress and decompress each with every supported coding.
+
+Usage:
+    PYTHONPATH=agents python benchmarks/bench_compression.py --number 200
+"""
+
+import argparse
+import base64
+import os
+import timeit
+from typing import Any, Dict
+
+from common.utils import compression, json_codec
+
+
+def response_body(history: int, file_bytes: int) -> bytes:
+    messages = [
+        {
+            "role": "user" if i % 2 == 0 else "agent",
+            "parts": [
+                {
+                    "type": "text",
+                    "text": f"Turn {i}: the exchange rate for USD to EUR on "
+                    f"2024-03-{i % 28 + 1:02d} was {0.9 + i / 1000:.4f}.",
+                }
+            ],
+        }
+        for i in range(history)
+    ]
+    # Random bytes stand in for an already compressed file, such as an image.
+    data = base64.b64encode(os.urandom(file_bytes)).decode()
+    task: Dict[str, Any] = {
+        "id": "task-1",
+        "sessionId": "session-1",
+        "status": {"state": "completed", "timestamp": "2024-03-01T12:00:00"},
+        "history": messages,
+        "artifacts": [
+            {
+                "parts": [
+                    {"type": "file", "file": {"mimeType": "image/png", "bytes": data}}
+                ]
+            }
+        ],
+    }
+    return json_codec.dumps({"jsonrpc": "2.0", "id": 1, "result": task})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"codings: {', '.join(compression.available_encodings())}")
+    for history, file_bytes in ((2, 0), (20, 0), (200, 0), (200, 64_000)):
+        body = response_body(history, file_bytes)
+        print(f"history={history} file={file_bytes}B: {len(body)} bytes")
+        for encoding in compression.available_encodings():
+            compressed = compression.compress(body, encoding)
+            encode = min(
+                timeit.repeat(
+                    lambda: compression.compress(body, encoding),
+                    number=args.number,
+                    repeat=3,
+                )
+            )
+            decode = min(
+                timeit.repeat(
+                    lambda: compression.decompress(compressed, encoding),
+                    number=args.number,
+                    repeat=3,
+                )
+            )
+            print(
+                f"  {encoding:5} {len(compressed):8} bytes"
+                f" ({len(compressed) / len(body):6.1%})"
+                f"  compress {encode / args.number * 1e6:8.1f} us"
+                f"  decompress {decode / args.number * 1e6:8.1f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark the per-request cost of decoding and routing a JSON-RPC call.
+
+The baseline reproduces the previous path: `json.loads` of the body, then
+validation against the `A2ARequest` discriminated union, then an isinstance
+chain to pick the handler. The current path decodes with `json_codec` (orjson
+when installed), looks the method up in the server's dispatch table and
+validates against that request model only.
+
+Usage:
+    PYTHONPATH=agents python benchmarks/bench_request_parsing.py --number 20000
+"""
+
+import argparse
+import json
+import timeit
+from typing import Any, Callable, Dict
+
+from common.server.server import A2AServer
+from common.types import (
+    A2ARequest,
+    CancelTaskRequest,
+    GetTaskPushNotificationRequest,
+    GetTaskRequest,
+    ListTasksRequest,
+    SendTaskRequest,
+    SendTaskStreamingRequest,
+    SetTaskPushNotificationRequest,
+    TaskResubscriptionRequest,
+)
+from common.utils import json_codec
+
+PAYLOADS: Dict[str, Dict[str, Any]] = {
+    "tasks/get": {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "tasks/get",
+        "params": {"id": "task-1", "historyLength": 5},
+    },
+    "tasks/send": {
+        "jsonrpc": "2.0",
+        "id": 2,
+        "method": "tasks/send",
+        "params": {
+            "id": "task-1",
+            "sessionId": "session-1",
+            "acceptedOutputModes": ["text", "text/plain"],
+            "message": {
+                "role": "user",
+                "parts": [{"type": "text", "text": "How much is 10 USD in EUR?"}],
+            },
+        },
+    },
+}
+
+
+def baseline(body: bytes) -> str:
+    request = A2ARequest.validate_python(json.loads(body))
+    for request_type in (
+        GetTaskRequest,
+        ListTasksRequest,
+        SendTaskRequest,
+        SendTaskStreamingRequest,
+        CancelTaskRequest,
+        SetTaskPushNotificationRequest,
+        GetTaskPushNotificationRequest,
+        TaskResubscriptionRequest,
+    ):
+        if isinstance(request, request_type):
+            return request.method
+    raise ValueError("Unexpected request type")
+
+
+def fast_path(server: A2AServer) -> Callable[[bytes], str]:
+    def parse(body: bytes) -> str:
+        return server._parse(json_codec.loads(body)).method
+
+    return parse
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    codec = "orjson" if json_codec.orjson is not None else "json"
+    print(f"codec: {codec}, {args.number} calls per measurement")
+    current = fast_path(A2AServer())
+    for method, payload in PAYLOADS.items():
+        body = json.dumps(payload).encode()
+        assert baseline(body) == current(body) == method
+        for name, parse in (("baseline", baseline), ("dispatch", current)):
+            seconds = min(
+                timeit.repeat(lambda: parse(body), number=args.number, repeat=5)
+            )
+            print(f"{method:12} {name:9} {seconds / args.number * 1e6:7.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
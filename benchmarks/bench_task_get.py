@@ -0,0 +1,192 @@
+"""Benchmark tasks/get latency while many tasks are streaming updates.
+
+Each streaming task repeatedly does a short piece of simulated agent work and
+then records a status update through `update_store`, while a set of pollers
+issue tasks/get for random tasks. The baseline manager is a copy of the
+previous `update_store`/`on_get_task` code: one global lock taken by readers
+and writers, never held across an await. The striped manager is the current
+InMemoryTaskManager with its per-task locks and lock-free reads.
+
+Usage:
+    PYTHONPATH=agents python benchmarks/bench_task_get.py --tasks 1000
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import statistics
+import time
+from typing import AsyncIterable, Dict, List, Optional, Union, cast
+
+from common.server.task_manager import InMemoryTaskManager
+from common.types import (
+    Artifact,
+    GetTaskRequest,
+    GetTaskResponse,
+    GetTaskResult,
+    JSONRPCResponse,
+    Message,
+    SendTaskRequest,
+    SendTaskResponse,
+    SendTaskStreamingRequest,
+    SendTaskStreamingResponse,
+    Task,
+    TaskNotFoundError,
+    TaskSendParams,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+
+
+class BenchTaskManager(InMemoryTaskManager):
+    async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
+        raise NotImplementedError
+
+    async def on_send_task_subscribe(
+        self, request: SendTaskStreamingRequest
+    ) -> Union[AsyncIterable[SendTaskStreamingResponse], JSONRPCResponse]:
+        raise NotImplementedError
+
+
+class GlobalLockTaskManager(BenchTaskManager):
+    """Baseline: the previous task paths, guarded by one global lock."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.lock = asyncio.Lock()
+        self.tasks: Dict[str, Task] = {}
+
+    async def upsert_task(self, task_send_params: TaskSendParams) -> Task:
+        async with self.lock:
+            task = Task(
+                id=task_send_params.id,
+                sessionId=task_send_params.sessionId,
+                status=TaskStatus(state=TaskState.SUBMITTED),
+                history=[task_send_params.message],
+            )
+            self.tasks[task_send_params.id] = task
+            return task
+
+    async def update_store(
+        self, task_id: str, status: TaskStatus, artifacts: Optional[List[Artifact]]
+    ) -> Task:
+        async with self.lock:
+            task = self.tasks[task_id]
+            task.status = status
+            if status.message is not None:
+                if task.history is None:
+                    task.history = []
+                task.history.append(status.message)
+            if artifacts is not None:
+                if task.artifacts is None:
+                    task.artifacts = []
+                task.artifacts.extend(artifacts)
+            return task
+
+    async def on_get_task(self, request: GetTaskRequest) -> GetTaskResponse:
+        async with self.lock:
+            task = self.tasks.get(request.params.id)
+            if task is None:
+                return GetTaskResponse(id=request.id, error=TaskNotFoundError())
+            task_result = cast(Task, task.model_copy())
+            history_length = request.params.historyLength
+            if task_result.history and history_length:
+                task_result.history = task_result.history[-history_length:]
+            else:
+                task_result.history = []
+        result = GetTaskResult.model_construct(**dict(task_result))
+        return GetTaskResponse(id=request.id, result=result)
+
+
+async def stream_task(
+    manager: InMemoryTaskManager, task_id: str, work_delay: float, stop: asyncio.Event
+) -> None:
+    message = Message(role="agent", parts=[TextPart(text="working")])
+    while not stop.is_set():
+        # Simulated agent work between two updates, outside any lock.
+        await asyncio.sleep(work_delay)
+        await manager.update_store(
+            task_id, TaskStatus(state=TaskState.WORKING, message=message), []
+        )
+
+
+async def poll_tasks(
+    manager: InMemoryTaskManager,
+    task_ids: List[str],
+    samples: List[float],
+    stop: asyncio.Event,
+) -> None:
+    while not stop.is_set():
+        request = GetTaskRequest(
+            params={"id": random.choice(task_ids), "historyLength": 1}
+        )
+        started = time.perf_counter()
+        await manager.on_get_task(request)
+        samples.append(time.perf_counter() - started)
+        await asyncio.sleep(0.001)
+
+
+async def run(
+    manager: InMemoryTaskManager,
+    tasks: int,
+    pollers: int,
+    duration: float,
+    work_delay: float,
+) -> List[float]:
+    task_ids = [f"task-{i}" for i in range(tasks)]
+    for task_id in task_ids:
+        await manager.upsert_task(
+            TaskSendParams(
+                id=task_id,
+                message=Message(role="user", parts=[TextPart(text="hi")]),
+            )
+        )
+
+    stop = asyncio.Event()
+    samples: List[float] = []
+    workers = [
+        asyncio.create_task(stream_task(manager, task_id, work_delay, stop))
+        for task_id in task_ids
+    ]
+    workers += [
+        asyncio.create_task(poll_tasks(manager, task_ids, samples, stop))
+        for _ in range(pollers)
+    ]
+    await asyncio.sleep(duration)
+    stop.set()
+    await asyncio.gather(*workers)
+    return samples
+
+
+def report(name: str, samples: List[float]) -> None:
+    ordered = sorted(samples)
+    p99 = ordered[math.ceil(len(ordered) * 0.99) - 1]
+    print(
+        f"{name:<12} requests={len(samples):>7} "
+        f"p50={statistics.median(ordered) * 1e3:8.3f}ms "
+        f"p99={p99 * 1e3:8.3f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--pollers", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--work-delay", type=float, default=0.001)
+    args = parser.parse_args()
+
+    for name, manager in (
+        ("global-lock", GlobalLockTaskManager()),
+        ("striped", BenchTaskManager()),
+    ):
+        samples = asyncio.run(
+            run(manager, args.tasks, args.pollers, args.duration, args.work_delay)
+        )
+        report(name, samples)
+
+
+if __name__ == "__main__":
+    main()